@@ -0,0 +1,68 @@
+"""
+messages/sec of extracting the emojis of message contents
+
+    python -m benchmarks.emoji_extract --messages 200000
+
+compares the previous `emoji_list` scan followed by a custom emoji regex
+with the single precompiled pass of `EmojiExtractor`. The lookup of custom
+emojis by the converters (and the command `Context` they needed) is not
+included, so the previous approach is measured at its best
+"""
+import argparse
+import random
+import re
+import time
+from collections import Counter
+from typing import Callable, List
+
+from emoji import emoji_list
+
+from bot.utils import EmojiExtractor
+
+WORDS = ("hello", "there", "what", "about", "the", "exam", "tomorrow", "lol", "anyone", "knows")
+EMOJIS = ("😂", "👍🏽", "🔖", "❤️", "🇨🇿", "👨‍👩‍👧‍👦", "<:kek:1054601880090705940>", "<a:danceblob:1054602472657780816>")
+
+
+def make_messages(count: int) -> List[str]:
+    rand = random.Random(42)
+    return [
+        " ".join(rand.choice(EMOJIS) if rand.random() < 0.1 else rand.choice(WORDS)
+                 for _ in range(rand.randint(3, 40)))
+        for _ in range(count)
+    ]
+
+
+def scan_extract(messages: List[str]) -> int:
+    found = 0
+    for content in messages:
+        unicode_emojis = [item['emoji'] for item in emoji_list(content)]
+        discord_emojis = re.findall(r"<a?:\w+:\d+>", content)
+        found += sum(Counter(unicode_emojis + discord_emojis).values())
+    return found
+
+
+def single_pass_extract(messages: List[str]) -> int:
+    extractor = EmojiExtractor()
+    return sum(sum(extractor.extract(content).values()) for content in messages)
+
+
+def measure(name: str, extract: Callable[[List[str]], int], messages: List[str]) -> None:
+    start = time.perf_counter()
+    found = extract(messages)
+    elapsed = time.perf_counter() - start
+    print(f"{name:>12}: {len(messages) / elapsed:>12,.0f} messages/sec ({elapsed:.2f}s, {found} emojis)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--messages', type=int, default=200_000)
+    args = parser.parse_args()
+
+    messages = make_messages(args.messages)
+    EmojiExtractor.compile()
+    measure("emoji_list", scan_extract, messages)
+    measure("single pass", single_pass_extract, messages)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+rows/sec of converting `server.messages` records into `MessageEntity`
+
+    python -m benchmarks.entity_convert --rows 1000000
+
+compares the previous `cls(**dict(record.items()))` conversion
+with the positional converter used by `Entity.convert_many`,
+records are tuples with the `keys`/`items` of `asyncpg.Record`
+"""
+import argparse
+import time
+from datetime import datetime
+from typing import Any, Callable, Iterator, List, Tuple
+
+from bot.db import MessageEntity
+
+COLUMNS = ('channel_id', 'thread_id', 'author_id', 'id', 'content', 'is_command',
+           'created_at', 'edited_at', 'deleted_at')
+
+
+class Record(tuple):  # type: ignore[type-arg]
+    def keys(self) -> Iterator[str]:
+        return iter(COLUMNS)
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        return zip(COLUMNS, self)
+
+
+def make_records(count: int) -> List[Record]:
+    created_at = datetime(2022, 10, 1, 12, 22)
+    return [Record((10, None, 20, i, f"message {i}", False, created_at, None, None)) for i in range(count)]
+
+
+def dict_convert(records: List[Record]) -> List[MessageEntity]:
+    return [MessageEntity(**{k: v for (k, v) in record.items()}) for record in records]
+
+
+def measure(name: str, convert: Callable[[List[Record]], List[MessageEntity]], records: List[Record]) -> None:
+    start = time.perf_counter()
+    convert(records)
+    elapsed = time.perf_counter() - start
+    print(f"{name:>12}: {len(records) / elapsed:>12,.0f} rows/sec ({elapsed:.2f}s)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    records = make_records(args.rows)
+    measure("dict", dict_convert, records)
+    measure("positional", MessageEntity.convert_many, records)  # type: ignore[arg-type]
+
+
+if __name__ == '__main__':
+    main()
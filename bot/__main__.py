@@ -11,7 +11,8 @@ from dotenv import load_dotenv
 
 from bot.bot import MasarykBOT
 from bot.cogs import setup_injections as setup_cog_injections
-from bot.db import connect_db, Pool, setup_injections as setup_db_injections
+from bot.cogs.logger.stats import HTTP_TRACE
+from bot.db import DatabaseManager, Pool, PoolMetrics, PoolPartitions, QueryMetrics, setup_injections as setup_db_injections
 from bot.utils import setup_logging, DatabaseRequiredException
 from bot.constants import CONFIG
 
@@ -57,21 +58,34 @@ bot = MasarykBOT(
         everyone=False,
         users=True
     ),
+    http_trace=HTTP_TRACE,
 )
 
 log = logging.getLogger()
 
 
-def setup_injections(db_pool: Optional[Pool], bot: commands.Bot) -> Callable[..., None]:
+def setup_injections(
+    database: Optional[DatabaseManager],
+    pool_metrics: PoolMetrics,
+    bot: commands.Bot
+) -> Callable[..., None]:
     def inner(binder: inject.Binder) -> None:
         binder.bind(commands.Bot, bot)
-        if db_pool:
-            binder.bind(Pool, db_pool)  # type: ignore[misc]
+        if database:
+            binder.bind_to_provider(Pool, database.partitions.get)  # type: ignore[misc]
+            binder.bind(PoolPartitions, database.partitions)
+            binder.bind(DatabaseManager, database)
+            binder.bind(PoolMetrics, pool_metrics)
+            binder.bind(QueryMetrics, QueryMetrics(slow_query_threshold=CONFIG.database.slow_query_ms / 1000))
             binder.install(setup_db_injections)
             binder.install(setup_cog_injections)
     return inner
 
 
+def dispatch_database_status(available: bool) -> None:
+    bot.dispatch("database_available" if available else "database_unavailable")
+
+
 # noinspection PyBroadException
 async def load_extensions() -> None:
     for extension in initial_cogs:
@@ -89,16 +103,22 @@ async def main() -> None:
         log.exception("discord bot token is required to run the bot, exiting...")
         exit(1)
 
-    pool: Optional[Pool] = None
+    database: Optional[DatabaseManager] = None
+    pool_metrics = PoolMetrics()
     if postgres_url := os.getenv("POSTGRES"):
-        pool = await connect_db(postgres_url)
+        database = DatabaseManager(postgres_url, CONFIG.database, pool_metrics, dispatch_database_status)
+        database.start()
 
     loop = asyncio.get_event_loop()
-    await loop.run_in_executor(None, lambda: inject.configure_once(setup_injections(pool, bot)))
+    await loop.run_in_executor(None, lambda: inject.configure_once(setup_injections(database, pool_metrics, bot)))
 
-    async with bot:
-        await load_extensions()
-        await bot.start(token, reconnect=True)
+    try:
+        async with bot:
+            await load_extensions()
+            await bot.start(token, reconnect=True)
+    finally:
+        if database:
+            await database.close()
 
 
 if __name__ == "__main__":
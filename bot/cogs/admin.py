@@ -4,9 +4,11 @@ from datetime import datetime
 from typing import NoReturn, Optional
 
 import discord as discord
+import inject
 from discord.ext import commands
 
-from bot.utils import Context
+from bot.db import Pool, PoolMetrics, PoolPartitions, QueryMetrics
+from bot.utils import Context, DiscordLimit
 
 log = logging.getLogger(__name__)
 
@@ -59,6 +61,38 @@ class AdminCog(commands.Cog):
         fmt = await ctx.bot.tree.sync()
         await ctx.send(f"synced {len(fmt)} commands")
 
+    @commands.command(aliases=['db'])
+    @commands.has_permissions(administrator=True)
+    async def pool(self, ctx: Context) -> None:
+        injector = inject.get_injector_or_die()
+        if Pool not in injector._bindings:  # type: ignore[misc]
+            await ctx.send("database is not connected")
+            return
+
+        partitions = inject.instance(PoolPartitions)
+        if not partitions.available:
+            await ctx.send("database is unavailable, reconnecting")
+            return
+
+        metrics = inject.instance(PoolMetrics)
+        content = '\n\n'.join(
+            f"[{partition.value}]\n{metrics.snapshot(pool)}"
+            for (partition, pool) in partitions.items()
+        )
+        await ctx.send(f"```\n{content}\n```")
+
+    @commands.command()
+    @commands.has_permissions(administrator=True)
+    async def queries(self, ctx: Context, limit: int = 10) -> None:
+        injector = inject.get_injector_or_die()
+        if Pool not in injector._bindings:  # type: ignore[misc]
+            await ctx.send("database is not connected")
+            return
+
+        stats = inject.instance(QueryMetrics).snapshot()[:limit]
+        content = '\n'.join(map(str, stats)) or "no queries recorded"
+        await ctx.send(f"```\n{content[:DiscordLimit.MESSAGE_LENGTH - 8]}\n```")
+
     @commands.command()
     @commands.has_permissions(administrator=True)
     async def logs(self, ctx: Context, filename: Optional[str] = None) -> None:
@@ -1,4 +1,5 @@
 import contextlib
+import logging
 from pathlib import Path
 from typing import Dict, List, Optional
 
@@ -10,7 +11,7 @@ from discord.ext.commands._types import Check
 from discord.utils import get
 
 from bot.constants import CONFIG
-from bot.db import CourseRepository
+from bot.db import CourseRepository, DatabaseUnavailable
 from bot.db.muni.course import CourseEntity
 from bot.utils import Context, GuildContext, requires_database
 from .course_service import CourseService
@@ -20,6 +21,8 @@ _reg_msg_path = Path(__file__).parent.parent.parent.joinpath('assets/course_regi
 with open(_reg_msg_path, 'r') as file:
     COURSE_REGISTRATION_MESSAGE = file.read()
 
+log = logging.getLogger(__name__)
+
 
 class NotInRegistrationChannel(commands.UserInputError):
     pass
@@ -71,6 +74,13 @@ class CourseCog(commands.Cog):
     @commands.Cog.listener()
     async def on_ready(self) -> None:
         self.course_registration_channels = self._service.load_course_registration_channels()
+        try:
+            await self._service.load_category_trie()
+        except DatabaseUnavailable:
+            log.warning("database is unavailable, course categories are loaded once it connects")
+
+    @commands.Cog.listener()
+    async def on_database_available(self) -> None:
         await self._service.load_category_trie()
 
     @commands.hybrid_group(aliases=['subject'])
@@ -124,15 +124,13 @@ class CourseService:
         return await self._course_repository.find_courses(course_codes)
 
     async def find_all_faculties(self) -> Iterable[FacultyEntity]:
-        result = []
-        async with self._uow.transaction(readonly=True) as trans:
-            async for faculties in await self._faculty_repository.find_all(conn=trans.conn):
-                result.extend(faculties)
-        return result
+        async with self._uow.transaction(readonly=True):
+            paginator = await self._faculty_repository.find_all()
+            return [faculty async for faculty in paginator.entities()]
 
     async def recover_database(self, guild: discord.Guild) -> int:
         recovered = 0
-        async with self._uow.transaction() as trans:
+        async with self._uow.transaction():
             for channel in guild.text_channels:
                 if not (course := await self._find_course_from_channel(channel)):
                     continue
@@ -145,7 +143,7 @@ class CourseService:
 
                 for member_id in shown_to:
                     student = StudentEntity(course.faculty, course.code, guild.id, member_id)
-                    await self._student_repository.insert(student, conn=trans.conn)
+                    await self._student_repository.insert(student)
 
                 recovered += 1
         return recovered
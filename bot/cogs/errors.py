@@ -9,6 +9,7 @@ from discord import File, app_commands
 from discord.ext import commands
 from discord.utils import get
 
+from bot.db import DatabaseUnavailable
 from bot.utils import Context
 from bot.constants import CONFIG
 
@@ -57,6 +58,13 @@ class ErrorCog(commands.Cog):
         commands.CommandInvokeError, commands.errors.HybridCommandError, app_commands.errors.CommandInvokeError)):
             exception = exception.original
 
+        if isinstance(exception, DatabaseUnavailable):
+            if isinstance(ctx, Context):
+                await ctx.send_error("database is currently unavailable, try again later")
+            else:
+                await ctx.send("database is currently unavailable, try again later")
+            return
+
         trace = self._format_error(ctx, exception)
         await self.log_error(trace, guild=ctx.guild)
 
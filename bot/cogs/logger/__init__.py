@@ -1,61 +1,331 @@
 import logging
-from contextlib import suppress
+import os
+from datetime import datetime, timedelta
+from typing import Optional, Sequence
 
+import discord
 import inject
 from discord.ext import commands, tasks
 
-from bot.cogs.logger.processors import Backup, setup_injections
+from bot.cogs.logger.processors import Backup, BackupSink, MessagePipeline, PROCESSORS, setup_injections
 from bot.cogs.logger.message_iterator import MessageIterator
 from bot.cogs.logger.history_iterator import HistoryIterator
-from bot.utils import requires_database, Context
+from bot.cogs.logger.live_ingest import LiveIngest
+from bot.cogs.logger.scheduler import BackupScheduler
+from bot.cogs.logger.stats import BackupStats
+from bot.cogs.logger.structure_sync import StructureSync
+from bot.cogs.logger.processors.bot import BotBackup
+from bot.constants import CONFIG
+from bot.db import DatabaseUnavailable, PoolPartition, use_partition
+from bot.utils import requires_database, Context, EmojiExtractor
 
 __all__ = [
     'MessageIterator',
     'HistoryIterator',
+    'LiveIngest',
+    'BackupScheduler',
+    'BackupStats',
+    'StructureSync',
     'LoggerCog', 'setup',
-    'BackupAlreadyRunning',
+    'BackupAlreadyRunning', 'is_backup_worker',
     'setup_injections'
 ]
 
 log = logging.getLogger(__name__)
 
+STRUCTURE_EVERY = timedelta(hours=24)
+
 
 class BackupAlreadyRunning(RuntimeError):
     pass
 
 
+def is_backup_worker() -> bool:
+    """worker mode is enabled in the config or by the `BACKUP_WORKER` environment variable"""
+    return CONFIG.backup.worker or os.getenv("BACKUP_WORKER", "").lower() in ("1", "true", "yes")
+
+
 class LoggerCog(commands.Cog):
-    @inject.autoparams('backup_bot')
-    def __init__(self, bot: commands.Bot, bot_backup: Backup[commands.Bot]) -> None:
+    @inject.autoparams('bot_backup', 'sink', 'live_ingest', 'emoji_extractor', 'scheduler', 'structure_sync', 'stats')
+    def __init__(
+        self,
+        bot: commands.Bot,
+        bot_backup: Backup[commands.Bot],
+        sink: BackupSink,
+        live_ingest: LiveIngest,
+        emoji_extractor: EmojiExtractor,
+        scheduler: BackupScheduler,
+        structure_sync: StructureSync,
+        stats: BackupStats
+    ) -> None:
         self.bot = bot
         self.backup_running: bool = False
         self.bot_backup = bot_backup
+        self.sink = sink
+        self.live_ingest = live_ingest
+        self.emoji_extractor = emoji_extractor
+        self.scheduler = scheduler
+        self.structure_sync = structure_sync
+        self.structure_synced_at: Optional[datetime] = None
+        self.stats = stats
+
+    async def cog_load(self) -> None:
+        self.stats.attach(self.bot)
+        self.stats_task.start()
+
+    async def cog_unload(self) -> None:
+        self.stats_task.cancel()
+        self.stats.detach(self.bot)
+        self.scheduler_task.cancel()
+        self.worker_task.cancel()
+        self.live_ingest_task.cancel()
+        await self.live_ingest.flush()
+        await self.sink.close()
 
     @commands.Cog.listener()
     async def on_ready(self) -> None:
-        self.backup_running = False
-        self.backup_task.start()
+        self.emoji_extractor.rebuild(self.bot.emojis)
+        await self.live_ingest.restart()
+        # events sent while the bot was disconnected are lost, the next tick reconciles the structure
+        self.structure_synced_at = None
+        if not self.live_ingest_task.is_running():
+            self.live_ingest_task.start()
+        if not self.scheduler_task.is_running():
+            self.backup_running = False
+            self.scheduler_task.start()
+        if is_backup_worker() and not self.worker_task.is_running():
+            self.worker_task.start()
+
+    @commands.Cog.listener()
+    async def on_guild_emojis_update(
+        self,
+        guild: discord.Guild,
+        before: Sequence[discord.Emoji],
+        after: Sequence[discord.Emoji]
+    ) -> None:
+        self.emoji_extractor.update_guild(guild, after)
+        await self.structure_sync.on_emojis_update(guild, before, after)
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild: discord.Guild) -> None:
+        await self.structure_sync.reconcile_guild(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_update(self, _before: discord.Guild, after: discord.Guild) -> None:
+        await self.structure_sync.on_guild_update(after)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member) -> None:
+        await self.structure_sync.on_member_update(member)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, _before: discord.Member, after: discord.Member) -> None:
+        await self.structure_sync.on_member_update(after)
+
+    @commands.Cog.listener()
+    async def on_user_update(self, _before: discord.User, after: discord.User) -> None:
+        await self.structure_sync.on_user_update(after)
 
-    @commands.hybrid_command()
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role: discord.Role) -> None:
+        await self.structure_sync.on_role_update(role)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, _before: discord.Role, after: discord.Role) -> None:
+        await self.structure_sync.on_role_update(after)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role) -> None:
+        await self.structure_sync.on_role_delete(role)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel: discord.abc.GuildChannel) -> None:
+        await self.structure_sync.on_channel_update(channel)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, _before: discord.abc.GuildChannel, after: discord.abc.GuildChannel) -> None:
+        await self.structure_sync.on_channel_update(after)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel) -> None:
+        await self.structure_sync.on_channel_delete(channel)
+
+    @commands.Cog.listener()
+    async def on_thread_create(self, thread: discord.Thread) -> None:
+        await self.structure_sync.on_thread_update(thread)
+
+    @commands.Cog.listener()
+    async def on_thread_update(self, _before: discord.Thread, after: discord.Thread) -> None:
+        await self.structure_sync.on_thread_update(after)
+
+    @commands.Cog.listener()
+    async def on_raw_thread_delete(self, payload: discord.RawThreadDeleteEvent) -> None:
+        await self.structure_sync.on_thread_delete(payload.thread_id, payload.guild_id)
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message) -> None:
+        self.scheduler.record_message(message)
+        await self.live_ingest.on_message(message)
+
+    @commands.Cog.listener()
+    async def on_message_edit(self, _before: discord.Message, after: discord.Message) -> None:
+        await self.live_ingest.on_message_edit(after)
+
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent) -> None:
+        await self.live_ingest.on_raw_message_edit(payload)
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent) -> None:
+        await self.live_ingest.on_message_delete([payload.message_id])
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent) -> None:
+        await self.live_ingest.on_message_delete(payload.message_ids)
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent) -> None:
+        await self.live_ingest.on_reaction(payload)
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent) -> None:
+        await self.live_ingest.on_reaction(payload)
+
+    @tasks.loop(minutes=1)
+    async def live_ingest_task(self) -> None:
+        try:
+            await self.live_ingest.flush()
+        except DatabaseUnavailable:
+            log.warning("database is unavailable, live messages are kept until it is back")
+
+    @commands.hybrid_group(invoke_without_command=True, fallback='queue')
     @commands.has_permissions(administrator=True)
-    async def backup(self, _ctx: Context) -> None:
+    async def backup(self, ctx: Context) -> None:
+        """channels waiting for the scheduled backup of their history"""
+        queue = self.scheduler.queue()
+        lines = [f"{'channel':<24} {'priority':>9} {'requests':>8} {'starts in':>10}"]
+        for queued in queue[:15]:
+            channel = self.bot.get_channel(queued.schedule.channel_id)
+            name = getattr(channel, 'name', str(queued.schedule.channel_id))
+            lines.append(f"{name[:24]:<24} {queued.priority:>9.0f} {queued.requests:>8} {_format_delta(queued.eta):>10}")
+        if len(queue) > 15:
+            lines.append(f"... and {len(queue) - 15} more channels")
+
+        await ctx.send(
+            f"**{len(queue)}** channels due, "
+            f"**{self.scheduler.budget.available:.0f}/{self.scheduler.budget.per_minute}** requests left (per minute), "
+            f"done in **{_format_delta(self.scheduler.eta())}**\n"
+            "```\n" + "\n".join(lines) + "\n```"
+        )
+
+    @backup.command(name='status')
+    @commands.has_permissions(administrator=True)
+    async def backup_status(self, ctx: Context) -> None:
+        """throughput of the backup and the remaining channels per guild"""
+        recent = self.stats.report(self.bot, since=self.stats.logged)
+        total = self.stats.report(self.bot)
+
+        lines = [f"{'':<16} {'recent':>10} {'total':>10}"]
+        for (name, recent_count, total_count) in [
+            ("messages/s", recent.messages, total.messages),
+            ("requests/s", recent.requests, total.requests),
+            ("rows/s", recent.rows, total.rows),
+        ]:
+            lines.append(f"{name:<16} {recent.per_second(recent_count):>10.2f} {total.per_second(total_count):>10.2f}")
+        lines.append(f"{'rate limits':<16} {recent.rate_limited:>10} {total.rate_limited:>10}")
+        lines.append(f"{'rate limit wait':<16} {recent.rate_limit_wait:>9.0f}s {total.rate_limit_wait:>9.0f}s")
+
+        lines.append("")
+        lines.append(f"{'guild':<24} {'channels':>8} {'messages':>9} {'done in':>10}")
+        for guild in total.guilds:
+            lines.append(f"{guild.name[:24]:<24} {guild.channels:>8} {guild.backlog:>9.0f} "
+                         f"{_format_delta(guild.eta):>10}")
+
+        await ctx.send(
+            f"backup {'running' if self.backup_running else 'idle'}, "
+            f"**{total.channels}** channels remaining, done in **{_format_delta(total.eta)}**\n"
+            "```\n" + "\n".join(lines) + "\n```"
+        )
+
+    @backup.command(name='run')
+    @commands.has_permissions(administrator=True)
+    async def backup_run(self, _ctx: Context) -> None:
+        """backup everything now, regardless of the schedule"""
         await self._backup()
 
-    @tasks.loop(hours=24)
-    async def backup_task(self) -> None:
-        log.info("running routine processors")
-        with suppress(BackupAlreadyRunning):
-            await self._backup()
+    @tasks.loop(seconds=CONFIG.backup.schedule_seconds)
+    async def scheduler_task(self) -> None:
+        """
+        keep the history backed up in small runs within the request budget,
+        the structure of guilds (members, roles, channels, ...) follows the gateway events
+        and is reconciled with its snapshot once a day
+        """
+        if self.backup_running:
+            return
+        self.backup_running = True
+        try:
+            with use_partition(PoolPartition.BULK):
+                now = datetime.now()
+                if self.structure_synced_at is None or now - self.structure_synced_at >= STRUCTURE_EVERY:
+                    assert isinstance(self.bot_backup, BotBackup)
+                    await self.bot_backup.backup_structure(self.bot)
+                    self.structure_synced_at = now
+                await self.scheduler.run(self.bot)
+        except DatabaseUnavailable:
+            log.warning("database is unavailable, skipping scheduled backup")
+        finally:
+            self.backup_running = False
+
+    @tasks.loop(minutes=10)
+    async def stats_task(self) -> None:
+        self.stats.log_report(self.bot)
+
+    @tasks.loop(seconds=CONFIG.backup.idle_seconds)
+    async def worker_task(self) -> None:
+        """
+        keep claiming channels enqueued by the schedulers, so the history backup
+        scales with the number of bot processes running in worker mode,
+        each process spends the request budget of its scheduler
+        """
+        if self.backup_running:
+            return
+        self.backup_running = True
+        try:
+            with use_partition(PoolPartition.BULK):
+                await self.scheduler.work(self.bot)
+        except DatabaseUnavailable:
+            log.warning("database is unavailable, backup worker is waiting")
+        finally:
+            self.backup_running = False
 
     async def _backup(self) -> None:
         if self.backup_running:
             raise BackupAlreadyRunning('backup process is already running')
         log.info("processors started")
         self.backup_running = True
-        await self.bot_backup.traverse_down(self.bot)
-        self.backup_running = False
+        try:
+            with use_partition(PoolPartition.BULK):
+                await self.bot_backup.traverse_down(self.bot)
+        finally:
+            await self.sink.flush()
+            self.backup_running = False
         log.info("processors finished")
 
+        for processor in PROCESSORS:
+            log.info("dedup %s", inject.instance(processor).dedup_stats)
+        for metrics in inject.instance(MessagePipeline).metrics:
+            log.info("stage %s", metrics)
+        reaction_backup = inject.instance(Backup[discord.Reaction])
+        log.info("reactions: %d synced, %d unchanged", reaction_backup.synced, reaction_backup.skipped)
+        log.info("backup %s", self.stats.report(self.bot))
+
+
+def _format_delta(delta: timedelta) -> str:
+    minutes = int(delta.total_seconds() // 60)
+    if minutes < 60:
+        return f"{minutes}m"
+    return f"{minutes // 60}h {minutes % 60:02}m"
+
 
 @requires_database
 async def setup(bot: commands.Bot) -> None:
@@ -1,56 +1,185 @@
+import asyncio
 import logging
+import os
+import socket
+from collections import deque
 from collections.abc import AsyncIterator
-from typing import Optional, cast
+from datetime import timedelta
+from typing import Deque, Dict, List, Optional, cast
 
 import discord.errors
 import inject
 from discord import TextChannel
 from discord.ext import commands
 
-from bot.db import LoggerRepository, ChannelRepository
+from bot.constants import CONFIG
+from bot.db import LoggerRepository, LoggerLeaseRepository, ChannelRepository
+from bot.db.utils import Id
 from .message_iterator import MessageIterator
 
 log = logging.getLogger(__name__)
 
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+PREFETCH = 4
+
 
 class HistoryIterator(AsyncIterator[MessageIterator]):
-    @inject.autoparams('logger_repository', 'channel_repository')
-    def __init__(self, bot: commands.Bot, logger_repository: LoggerRepository,
-                 channel_repository: ChannelRepository) -> None:
+    """
+    iterates over channels whose history is behind
+
+    channels are shared by all bot processes running the backup through
+    leases in `cogs.logger_leases`, every channel is claimed by one worker
+    at a time. The lease of the current channel is renewed in the background
+    and released once the next channel is requested and its window is done,
+    channels whose backup failed or stopped early are returned to the queue
+    with their attempts. When a lease is lost
+    (the worker was too slow and another worker claimed the channel),
+    the current `MessageIterator` is stopped after its last message,
+    the other worker resumes from its checkpoint
+
+    up to `prefetch` channels are claimed at once and resolved together,
+    from the gateway cache first and over http only on a miss.
+    A channel missing from the cache of its guild is deleted,
+    so deleted channels are usually found without a request
+    """
+
+    @inject.autoparams('logger_repository', 'channel_repository', 'lease_repository')
+    def __init__(
+        self,
+        bot: commands.Bot,
+        logger_repository: LoggerRepository,
+        channel_repository: ChannelRepository,
+        lease_repository: LoggerLeaseRepository,
+        worker_id: str = WORKER_ID,
+        lease: timedelta = timedelta(seconds=CONFIG.backup.lease_seconds),
+        enqueue_updatable: bool = True,
+        prefetch: int = PREFETCH
+    ) -> None:
         self.bot = bot
         self._logger_repository = logger_repository
         self._channel_repository = channel_repository
-        self.updatable_processes: list[LoggerRepository.UpdatableProcesses] = []
+        self._lease_repository = lease_repository
+        self.worker_id = worker_id
+        self.lease = lease
+        self.prefetch = prefetch
+
+        # the `BackupScheduler` enqueues the channels it picked itself
+        self._enqueued = not enqueue_updatable
+        self.enqueued = 0
+        self._leased: Optional[Id] = None
+        self._prefetched: Deque[TextChannel] = deque()
+        self._current: Optional[MessageIterator] = None
+        self._heartbeat: Optional[asyncio.Task[None]] = None
 
     def __aiter__(self) -> "HistoryIterator":
         return self
 
     async def __anext__(self) -> "MessageIterator":
-        if not self.updatable_processes:
+        await self._release()
+
+        if not self._enqueued:
             log.info('starting message processors batch')
-            self.updatable_processes = await self._logger_repository.find_updatable_processes()
-
-        channel: Optional[TextChannel] = None
-        while not channel:
-            channel = await self.get_next_channel_to_process()
-
-        return cast("MessageIterator", MessageIterator(channel))
-
-    async def get_next_channel_to_process(self) -> Optional[TextChannel]:
-        if not self.updatable_processes:
-            raise StopAsyncIteration
-
-        process = self.updatable_processes.pop()
-        try:
-            channel = await self.bot.fetch_channel(process.channel_id)
-            assert isinstance(channel, TextChannel)
-            return channel
-        except discord.NotFound:
-            log.info(f"Channel {process.channel_id} not longer exists, marking as deleted")
-            await self.mark_channel_as_deleted(process.channel_id)
-            return None
-        except discord.Forbidden:
-            return None
-
-    async def mark_channel_as_deleted(self, channel_id: int) -> None:
-        await self._channel_repository.soft_delete([(channel_id,)])
+            processes = await self._logger_repository.find_updatable_processes()
+            await self._lease_repository.enqueue([process.channel_id for process in processes])
+            self._enqueued = True
+            self.enqueued = len(processes)
+
+        channel = await self.get_next_channel_to_process()
+        self._leased = channel.id
+        self._current = cast("MessageIterator", MessageIterator(channel))
+        self._heartbeat = asyncio.create_task(self._keep_lease(channel.id, self._current))
+        return self._current
+
+    async def get_next_channel_to_process(self) -> TextChannel:
+        while not self._prefetched:
+            claimed = await self._lease_repository.claim(self.worker_id, self.lease, self.prefetch)
+            if not claimed:
+                raise StopAsyncIteration
+            self._prefetched.extend(await self.resolve_channels(claimed))
+        return self._prefetched.popleft()
+
+    async def resolve_channels(self, channel_ids: List[Id]) -> List[TextChannel]:
+        """
+        channels in the order of `channel_ids`, leases of channels
+        which were deleted or are not accessible are released
+        """
+        channels: Dict[Id, TextChannel] = {}
+        missing: List[Id] = []
+        for channel_id in channel_ids:
+            channel = self.bot.get_channel(channel_id)
+            if channel is None:
+                missing.append(channel_id)
+            elif isinstance(channel, TextChannel):
+                channels[channel_id] = channel
+
+        deleted: List[Id] = []
+        if missing:
+            guild_ids = await self._channel_repository.find_guild_ids(missing)
+            to_fetch: List[Id] = []
+            for channel_id in missing:
+                guild = self.bot.get_guild(guild_ids[channel_id]) if channel_id in guild_ids else None
+                if guild is not None and not guild.unavailable:
+                    deleted.append(channel_id)
+                else:
+                    to_fetch.append(channel_id)
+
+            fetched = await asyncio.gather(*map(self.bot.fetch_channel, to_fetch), return_exceptions=True)
+            for (channel_id, result) in zip(to_fetch, fetched):
+                if isinstance(result, TextChannel):
+                    channels[channel_id] = result
+                elif isinstance(result, discord.NotFound):
+                    deleted.append(channel_id)
+                elif isinstance(result, BaseException) and not isinstance(result, discord.HTTPException):
+                    raise result
+
+        if deleted:
+            log.info("channels %s no longer exist, marking as deleted", deleted)
+            await self.mark_channels_as_deleted(deleted)
+        for channel_id in channel_ids:
+            if channel_id not in channels:
+                await self._lease_repository.release(self.worker_id, channel_id)
+        return [channels[channel_id] for channel_id in channel_ids if channel_id in channels]
+
+    async def aclose(self) -> None:
+        """stop renewing and return the current and prefetched channels to the queue"""
+        await self._release()
+        if self._prefetched:
+            prefetched, self._prefetched = self._prefetched, deque()
+            await self._lease_repository.unlease(self.worker_id, [channel.id for channel in prefetched],
+                                                 attempted=False)
+
+    async def mark_channels_as_deleted(self, channel_ids: List[Id]) -> None:
+        await self._channel_repository.soft_delete_many(channel_ids)
+
+    async def _keep_lease(self, channel_id: Id, message_iterator: MessageIterator) -> None:
+        while True:
+            await asyncio.sleep(self.lease.total_seconds() / 3)
+            try:
+                leased = await self._lease_repository.heartbeat(
+                    self.worker_id, [channel_id, *(channel.id for channel in self._prefetched)], self.lease
+                )
+            except Exception as ex:
+                # the heartbeat has to keep running, a stopped one loses the lease silently
+                log.warning("failed to renew lease of channel %s, got %s", channel_id, ex)
+                continue
+
+            # prefetched channels claimed by another worker in the meantime are theirs now
+            self._prefetched = deque(channel for channel in self._prefetched if channel.id in leased)
+
+            if channel_id not in leased:
+                log.warning("lost lease of channel %s, stopping its backup", channel_id)
+                message_iterator.stop()
+                return
+
+    async def _release(self) -> None:
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+        current, self._current = self._current, None
+
+        if self._leased is not None:
+            channel_id, self._leased = self._leased, None
+            if current is not None and current.done:
+                await self._lease_repository.release(self.worker_id, channel_id)
+            else:
+                await self._lease_repository.unlease(self.worker_id, [channel_id])
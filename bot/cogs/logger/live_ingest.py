@@ -0,0 +1,106 @@
+import logging
+from datetime import datetime
+from typing import Iterable, Optional, Set
+
+import discord
+import inject
+from pytz import UTC
+
+from bot.cogs.logger.processors import Backup, BackupSink
+from bot.db import LoggerRepository, MessageEdit, MessageRepository, ReactionDelta, ReactionRepository
+from bot.utils import AnyEmote, get_emoji_id
+
+log = logging.getLogger(__name__)
+
+
+class LiveIngest:
+    """
+    stores messages and reactions as they arrive on the gateway
+
+    events are mapped by the backup processors and written in micro-batches
+    by the `BackupSink`. Channels with live messages are covered in `cogs.logger`
+    from the start of the gateway session up to the last `flush`, so the history
+    backup only fills the gaps between sessions.
+
+    a new session (`on_ready`) restarts the coverage, as events sent while
+    the bot was disconnected are lost. Resumed sessions replay missed events
+    and keep it
+    """
+
+    @inject.autoparams('message_backup', 'emoji_backup', 'message_repository', 'reaction_repository',
+                       'logger_repository', 'sink')
+    def __init__(
+        self,
+        message_backup: Backup[discord.Message],
+        emoji_backup: Backup[AnyEmote],
+        message_repository: MessageRepository,
+        reaction_repository: ReactionRepository,
+        logger_repository: LoggerRepository,
+        sink: BackupSink
+    ) -> None:
+        self.message_backup = message_backup
+        self.emoji_backup = emoji_backup
+        self.message_repository = message_repository
+        self.reaction_repository = reaction_repository
+        self.logger_repository = logger_repository
+        self.sink = sink
+
+        self.live_since: Optional[datetime] = None
+        self._covered: Set[int] = set()
+
+    async def restart(self) -> None:
+        if self.live_since is not None:
+            try:
+                await self.flush()
+            except Exception as ex:
+                # the rows stay buffered, the last session is left to the history backup
+                log.warning("failed to cover the last gateway session, got %s", ex)
+        self.live_since = datetime.now(tz=UTC)
+
+    async def on_message(self, message: discord.Message) -> None:
+        if message.guild is None:
+            return
+        await self.message_backup.traverse_down(message)
+        self._covered.add(message.channel.id)
+
+    async def on_message_edit(self, message: discord.Message) -> None:
+        if message.guild is None:
+            return
+        await self.message_backup.traverse_up(message)
+
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent) -> None:
+        # cached messages are stored by `on_message_edit`
+        if payload.cached_message is not None or payload.guild_id is None:
+            return
+        if 'content' not in payload.data:
+            return
+        await self.sink.add(self.message_repository, MessageEdit(payload.message_id, payload.data['content']),
+                            'edit_many')
+
+    async def on_message_delete(self, message_ids: Iterable[int]) -> None:
+        for message_id in message_ids:
+            await self.sink.add(self.message_repository, message_id, 'soft_delete_many')
+
+    async def on_reaction(self, payload: discord.RawReactionActionEvent) -> None:
+        if payload.guild_id is None:
+            return
+
+        emoji: AnyEmote = payload.emoji.name if payload.emoji.is_unicode_emoji() else payload.emoji
+        await self.emoji_backup.traverse_up(emoji)
+
+        delta = ReactionDelta(payload.message_id, get_emoji_id(emoji), payload.user_id,
+                              added=payload.event_type == 'REACTION_ADD')
+        await self.sink.add(self.reaction_repository, delta, 'apply_deltas')
+
+    async def flush(self) -> None:
+        """write buffered events and extend the coverage of channels up to now"""
+        now = datetime.now(tz=UTC)
+        covered, self._covered = self._covered, set()
+        try:
+            # the rows of the covered messages were added before, the window is covered once they are written
+            await self.sink.flush()
+            if covered and self.live_since is not None:
+                await self.logger_repository.cover_many([(channel_id, self.live_since, now) for channel_id in covered])
+        except Exception:
+            self._covered |= covered
+            raise
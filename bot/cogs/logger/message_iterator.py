@@ -1,6 +1,6 @@
 import logging
 from datetime import datetime, timedelta
-from typing import AsyncIterator, Optional, Union
+from typing import AsyncIterator, Awaitable, Callable, NamedTuple, Optional, Union
 
 import inject
 from discord import Message, TextChannel, Thread
@@ -8,58 +8,173 @@ from discord.utils import snowflake_time
 from pytz import UTC
 
 import bot.db
+from bot.cogs.logger.processors._sink import BackupSink
 from bot.utils import EmptyAsyncIterator
 
 log = logging.getLogger(__name__)
 
+CHECKPOINT_EVERY = 500
+MIN_WINDOW = 1_000
+MAX_WINDOW = 50_000
+WINDOW_MESSAGES_PER_DAY = 50
+MIN_BACKLOG = timedelta(days=3)
+
+
+class Window(NamedTuple):
+    from_date: datetime
+    after: datetime
+    before: Optional[datetime] = None
+
 
 class MessageIterator:
-    _from_date: datetime
+    """
+    iterates over the next window of messages of a channel
+
+    the progress is stored in `cogs.logger`, a window is started by `begin_process`,
+    its `to_date` is checkpointed every `CHECKPOINT_EVERY` messages and
+    it is closed by `end_process` once the window is exhausted. An unfinished
+    window is resumed after its last checkpoint.
+
+    messages seen live by the bot are covered by windows as well, so the
+    iterator only fills the first gap between the windows of the channel,
+    it stops `before` the next window and closes the gap.
+
+    the window size grows with the backlog of the channel, from `MIN_WINDOW`
+    messages up to `MAX_WINDOW` messages for channels that are years behind
+    """
+
+    _window: Window
+    _limit: int
     _iterator: AsyncIterator[Message]
     _current_message: Optional[Message] = None
+    _processed: int = 0
+    _stopped: bool = False
+    # the window was read to its end or there was nothing to read
+    done: bool = False
 
-    @inject.autoparams('logger_repository')
-    def __init__(self, channel: Union[TextChannel, Thread], logger_repository: bot.db.LoggerRepository) -> None:
+    # awaited before the progress is stored, lets consumers finish the messages they received
+    before_checkpoint: Optional[Callable[[], Awaitable[None]]] = None
+    # set by the `BackupScheduler`, which refreshes channels in small budgeted runs
+    max_messages: Optional[int] = None
+    min_backlog: timedelta = MIN_BACKLOG
+
+    @inject.autoparams('logger_repository', 'sink')
+    def __init__(
+        self,
+        channel: Union[TextChannel, Thread],
+        logger_repository: bot.db.LoggerRepository,
+        sink: BackupSink
+    ) -> None:
         self.channel = channel
         self.logger_repository = logger_repository
+        self.sink = sink
 
-    async def _get_next_from_date(self) -> datetime:
+    async def _get_channel_start(self) -> datetime:
+        if self.channel.created_at is None:
+            if self.channel.last_message_id is not None:
+                oldest_message = await anext(self.channel.history(oldest_first=True, limit=1))
+                return oldest_message.created_at
+            else:
+                return (await self.channel.fetch_message(self.channel.id)).created_at
+        else:
+            return self.channel.created_at
+
+    async def _get_next_window(self) -> Window:
         last_process = await self.logger_repository.find_last_process(self.channel.id)
         if last_process is None:
-            if self.channel.created_at is None:
-                if self.channel.last_message_id is not None:
-                    oldest_message = await anext(self.channel.history(oldest_first=True, limit=1))
-                    return oldest_message.created_at
-                else:
-                    return (await self.channel.fetch_message(self.channel.id)).created_at
-            else:
-                return self.channel.created_at
+            from_date = after = await self._get_channel_start()
         elif last_process.finished_at is None:
-            return last_process.from_date
+            from_date, after = last_process.from_date, last_process.to_date or last_process.from_date
         else:
-            return last_process.to_date
+            # live windows may start after the channel was created
+            first_process = await self.logger_repository.find_first_process(self.channel.id)
+            channel_start = self.channel.created_at or snowflake_time(self.channel.id)
+            if first_process is not None and first_process.from_date > channel_start:
+                from_date = after = channel_start
+            else:
+                from_date = after = last_process.to_date
+
+        next_process = await self.logger_repository.find_next_process(self.channel.id, from_date)
+        return Window(from_date, after, next_process.from_date if next_process else None)
+
+    async def _get_next_from_date(self) -> datetime:
+        return (await self._get_next_window()).from_date
+
+    @staticmethod
+    def _window_size(backlog: timedelta) -> int:
+        return max(MIN_WINDOW, min(MAX_WINDOW, backlog.days * WINDOW_MESSAGES_PER_DAY))
 
     async def history(self) -> AsyncIterator[Message]:
-        from_date = min(await self._get_next_from_date(), datetime.now(tz=UTC))
+        now = datetime.now(tz=UTC)
+        window = await self._get_next_window()
+        from_date, after, before = min(window.from_date, now), min(window.after, now), window.before
 
-        if abs(datetime.now(tz=UTC) - from_date) < timedelta(days=3):
+        if before is None and abs(now - after) < self.min_backlog:
+            self.done = True
+            return EmptyAsyncIterator()
+        if before is not None and before <= after:
+            self.done = True
             return EmptyAsyncIterator()
 
-        log.info("processing messages from %s in %s (%s)", from_date.date(), self.channel.name, self.channel.guild.name)
+        limit = self._window_size((before or now) - after)
+        if self.max_messages is not None:
+            limit = min(limit, self.max_messages)
+        if after != from_date:
+            log.info("resuming messages from %s in %s (%s)", after.date(), self.channel.name, self.channel.guild.name)
+        else:
+            log.info("processing messages from %s in %s (%s)", after.date(), self.channel.name, self.channel.guild.name)
 
         await self.logger_repository.begin_process((self.channel.id, from_date))
-        self._iterator = aiter(self.channel.history(after=from_date, limit=1_000))
-        self._from_date = from_date
+        self._iterator = aiter(self.channel.history(after=after, before=before, limit=limit))
+        self._window = Window(from_date, after, before)
+        self._limit = limit
         return self
 
     def __aiter__(self) -> "MessageIterator":
         return self
 
+    @property
+    def processed(self) -> int:
+        return self._processed
+
+    def stop(self) -> None:
+        """stop after the current message, the window stays unfinished and is resumed later"""
+        self._stopped = True
+
     async def __anext__(self) -> Message:
+        if self._stopped:
+            if self._current_message is not None:
+                await self._checkpoint(self._current_message.created_at)
+            raise StopAsyncIteration
+
+        if self._current_message is not None and self._processed % CHECKPOINT_EVERY == 0:
+            await self._checkpoint(self._current_message.created_at)
+
         try:
             self._current_message = await anext(self._iterator)
+            self._processed += 1
             return self._current_message
         except StopAsyncIteration:
-            to_date = datetime.now(tz=UTC) if self._current_message is None else self._current_message.created_at
-            await self.logger_repository.end_process((self.channel.id, self._from_date, to_date))
+            if self._window.before is not None and self._processed < self._limit:
+                # the whole gap was read, it is closed by the next window
+                to_date = self._window.before
+            elif self._current_message is None:
+                to_date = datetime.now(tz=UTC)
+            else:
+                to_date = self._current_message.created_at
+            # messages must be stored before the process is marked as finished
+            await self._drain()
+            await self.logger_repository.end_process((self.channel.id, self._window.from_date, to_date))
+            self.done = True
             raise StopAsyncIteration
+
+    async def _drain(self) -> None:
+        if self.before_checkpoint is not None:
+            await self.before_checkpoint()
+        await self.sink.flush()
+
+    async def _checkpoint(self, to_date: datetime) -> None:
+        # messages must be stored before the checkpoint moves past them
+        await self._drain()
+        await self.logger_repository.checkpoint_process((self.channel.id, self._window.from_date, to_date))
+        log.debug("checkpointed %s at %s", self.channel.name, to_date)
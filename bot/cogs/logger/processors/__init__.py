@@ -3,14 +3,17 @@ import inject
 from discord.ext import commands
 
 __all__ = [
-    'Backup',
+    'Backup', 'BackupSink', 'DedupStats', 'MessagePipeline', 'StageMetrics', 'PROCESSORS',
     'AttachmentBackup', 'BotBackup', 'CategoryBackup', 'EmojiBackup',
     'GuildBackup', 'MessageBackup', 'MessageEmojiBackup',
     'ReactionBackup', 'RoleBackup', 'ChannelBackup', 'ThreadBackup', 'UserBackup',
     'setup_injections'
 ]
 
-from bot.cogs.logger.processors._base import Backup
+from bot.cogs.logger.processors._base import Backup, DedupStats
+from bot.cogs.logger.processors._sink import BackupSink
+from bot.cogs.logger.processors._pipeline import MessagePipeline
+from bot.cogs.logger.processors._stage import StageMetrics
 from bot.cogs.logger.processors.attachment import AttachmentBackup
 from bot.cogs.logger.processors.bot import BotBackup
 from bot.cogs.logger.processors.category import CategoryBackup
@@ -23,10 +26,21 @@ from bot.cogs.logger.processors.message_emoji import MessageEmojiBackup
 from bot.cogs.logger.processors.reaction import ReactionBackup
 from bot.cogs.logger.processors.role import RoleBackup
 from bot.cogs.logger.processors.user import UserBackup
-from bot.utils import MessageAttachment, MessageEmote, AnyEmote
+from bot.utils import MessageAttachment, MessageEmote, AnyEmote, EmojiExtractor
+
+
+PROCESSORS = (
+    Backup[MessageAttachment], Backup[commands.Bot], Backup[discord.CategoryChannel], Backup[AnyEmote],
+    Backup[discord.Guild], Backup[discord.Message], Backup[MessageEmote], Backup[discord.Reaction],
+    Backup[discord.Role], Backup[discord.abc.GuildChannel], Backup[discord.Thread],
+    Backup[discord.User | discord.Member]
+)
 
 
 def setup_injections(binder: inject.Binder) -> None:
+    binder.bind_to_constructor(BackupSink, BackupSink)
+    binder.bind_to_constructor(MessagePipeline, MessagePipeline)
+    binder.bind_to_constructor(EmojiExtractor, EmojiExtractor)
     binder.bind_to_constructor(Backup[MessageAttachment], AttachmentBackup)
     binder.bind_to_constructor(Backup[commands.Bot], BotBackup)
     binder.bind_to_constructor(Backup[discord.CategoryChannel], CategoryBackup)
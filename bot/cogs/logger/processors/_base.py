@@ -1,20 +1,62 @@
 from abc import ABC, abstractmethod
-from typing import Generic, TypeVar
-from collections import deque
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Generic, Hashable, TypeVar
 
 T = TypeVar('T')
 R = TypeVar('R')
 
+DEFAULT_DEDUP_SIZE = 10_000
+
+
+@dataclass(frozen=True)
+class DedupStats:
+    name: str
+    size: int
+    hits: int
+    misses: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __str__(self) -> str:
+        return f"{self.name}: {self.hits} skipped, {self.misses} backed up ({self.hit_rate:.0%} hit rate)"
+
 
 class Backup(ABC, Generic[T]):
-    def __init__(self) -> None:
-        self._backedUp: deque[T] = deque(maxlen=200)
+    """
+    backs up an object and everything it references (`traverse_up`)
+    or contains (`traverse_down`)
+
+    objects are backed up only once while they are unchanged. The last
+    `dedup_size` objects are remembered by `key` (their snowflake id by
+    default) together with their `fingerprint`, an object whose fingerprint
+    did not change since its last backup is skipped
+    """
+
+    def __init__(self, dedup_size: int = DEFAULT_DEDUP_SIZE) -> None:
+        self.dedup_size = dedup_size
+        self._backed_up: OrderedDict[Hashable, Hashable] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
 
     @abstractmethod
     async def traverse_up(self, obj: T) -> None:
-        if obj not in self._backedUp:
-            self._backedUp.append(obj)
-            await self.backup(obj)
+        key, fingerprint = self.key(obj), self.fingerprint(obj)
+        if key in self._backed_up and self._backed_up[key] == fingerprint:
+            self._backed_up.move_to_end(key)
+            self._hits += 1
+            return
+
+        self._misses += 1
+        await self.backup(obj)
+
+        self._backed_up[key] = fingerprint
+        self._backed_up.move_to_end(key)
+        if len(self._backed_up) > self.dedup_size:
+            self._backed_up.popitem(last=False)
 
     @abstractmethod
     async def backup(self, obj: T) -> None:
@@ -23,3 +65,14 @@ class Backup(ABC, Generic[T]):
     @abstractmethod
     async def traverse_down(self, obj: T) -> None:
         await self.traverse_up(obj)
+
+    def key(self, obj: T) -> Hashable:
+        return getattr(obj, 'id', obj)
+
+    def fingerprint(self, obj: T) -> Hashable:
+        """values of the object that are stored in the database"""
+        return None
+
+    @property
+    def dedup_stats(self) -> DedupStats:
+        return DedupStats(type(self).__name__, len(self._backed_up), self._hits, self._misses)
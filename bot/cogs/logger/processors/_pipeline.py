@@ -0,0 +1,83 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Iterator, List
+
+import discord
+import inject
+
+from bot.cogs.logger.message_iterator import MessageIterator
+from bot.cogs.logger.processors._base import Backup
+from bot.cogs.logger.processors._sink import BackupSink
+from bot.cogs.logger.processors._stage import Stage, StageMetrics
+from bot.constants import CONFIG
+
+log = logging.getLogger(__name__)
+
+_history_enabled: ContextVar[bool] = ContextVar('history_enabled', default=True)
+
+
+@contextmanager
+def without_history() -> Iterator[None]:
+    """
+    traverse guilds without the history of text channels,
+    it is backed up in small runs by the `BackupScheduler` instead
+    """
+    token = _history_enabled.set(False)
+    try:
+        yield
+    finally:
+        _history_enabled.reset(token)
+
+
+class MessagePipeline:
+    """
+    backs up messages in three stages connected by bounded queues
+
+    fetch -> backup -> write
+
+    the history is fetched from discord while up to `workers` messages
+    are backed up concurrently (mapping, reaction users, attachments and emojis)
+    and the `BackupSink` writes full buffers to the database in the background.
+    Windows of a `MessageIterator` are checkpointed only after the messages
+    fetched so far went through all stages
+    """
+
+    @inject.autoparams('message_backup', 'sink')
+    def __init__(
+        self,
+        message_backup: Backup[discord.Message],
+        sink: BackupSink,
+        workers: int = CONFIG.backup.workers,
+        queue_size: int = CONFIG.backup.queue_size
+    ) -> None:
+        self.message_backup = message_backup
+        self.sink = sink
+        self.queue_size = queue_size
+        self.fetch_metrics = StageMetrics("fetch")
+        self.backup_metrics = StageMetrics("backup", workers=workers)
+
+    @property
+    def history_enabled(self) -> bool:
+        return _history_enabled.get()
+
+    @property
+    def metrics(self) -> List[StageMetrics]:
+        return [self.fetch_metrics, self.backup_metrics, self.sink.metrics]
+
+    async def run(self, messages: AsyncIterator[discord.Message]) -> None:
+        async with Stage(self.message_backup.traverse_down, self.backup_metrics, self.queue_size) as stage:
+            if isinstance(messages, MessageIterator):
+                messages.before_checkpoint = stage.join
+
+            while True:
+                start = time.perf_counter()
+                try:
+                    message = await anext(messages)
+                except StopAsyncIteration:
+                    break
+                self.fetch_metrics.record(1, time.perf_counter() - start)
+                await stage.put(message)
+
+            await stage.join()
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from bot.db.discord import REPOSITORIES
+from bot.db.manager import CONNECTION_LOST_ERRORS
+from bot.db.utils import Crud, DatabaseUnavailable, Entity, PoolPartition, use_partition
+from ._stage import StageMetrics
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MAX_ROWS = 1_000
+DEFAULT_MAX_DELAY = 5.0
+DEFAULT_MAX_PENDING = 10_000
+
+# writes failing with these are retried by the next flush, other errors are caused by the rows
+RETRIED_ERRORS = (DatabaseUnavailable, *CONNECTION_LOST_ERRORS)
+
+
+class BackupSink:
+    """
+    write-behind buffer between the backup processors and the database
+
+    mapped entities are collected per repository and written with `insert_many`
+    (or another bulk `method` of the repository, like `soft_delete_many`)
+    once `max_rows` entities are buffered or `max_delay` seconds have passed.
+    Buffers are always flushed in foreign key order
+    (guild -> user -> channel -> thread -> message -> reaction/attachment/emoji),
+    so a row is never written before the rows it references.
+    Inserts of a repository are written before its other methods.
+
+    full buffers are written in the background while the processors keep
+    adding rows, only when the buffer grows over `max_pending`,
+    `add` waits for the database to catch up
+
+    a write failed for an unavailable database keeps its rows (and the rows
+    not written after it) buffered and is raised by `flush`, so the callers
+    never move coverage, checkpoints or cursors past rows which are not stored.
+    Other errors are caused by the rows, the batch is split until the failing
+    rows are found, they are logged and dropped so they cannot block the sink.
+    Rows are written as upserts, so writing a batch again is harmless.
+
+    callbacks of `when_written` run only once the rows added before them are written
+    """
+
+    def __init__(
+        self,
+        max_rows: int = DEFAULT_MAX_ROWS,
+        max_delay: float = DEFAULT_MAX_DELAY,
+        max_pending: int = DEFAULT_MAX_PENDING
+    ) -> None:
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+
+        self._buffers: Dict[Tuple[Crud[Any], str], List[Any]] = {}
+        self._pending = 0
+        self._flush_lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task[None]] = None
+        self._background: Set[asyncio.Task[None]] = set()
+        self._callbacks: List[Callable[[], None]] = []
+        self.metrics = StageMetrics("write")
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def add(self, repository: Crud[Any], entity: Entity | Any, method: str = 'insert_many') -> None:
+        self._buffers.setdefault((repository, method), []).append(entity)
+        self._pending += 1
+
+        self.metrics.record_depth(self._pending)
+
+        if self._pending >= self.max_pending:
+            await self.flush()
+        elif self._pending >= self.max_rows and not self._flush_lock.locked():
+            self._flush_in_background()
+        else:
+            self._schedule_flush()
+
+    def when_written(self, callback: Callable[[], None]) -> None:
+        """call `callback` after the next flush which wrote every row buffered so far"""
+        self._callbacks.append(callback)
+
+    async def flush(self) -> None:
+        with use_partition(PoolPartition.BULK):
+            await self._flush()
+
+    async def _flush(self) -> None:
+        async with self._flush_lock:
+            buffers, self._buffers = self._buffers, {}
+            callbacks, self._callbacks = self._callbacks, []
+            self._pending -= sum(map(len, buffers.values()))
+
+            try:
+                for (repository, method) in sorted(buffers, key=self._write_order):
+                    entities = buffers[(repository, method)]
+                    start = time.perf_counter()
+                    try:
+                        written = await self._write(repository, method, entities)
+                    except Exception as ex:
+                        self.metrics.errors += 1
+                        log.error("failed to write %d rows with %s.%s, got %s",
+                                  len(entities), type(repository).__name__, method, ex)
+                        raise
+                    self.metrics.record(written, time.perf_counter() - start)
+                    del buffers[(repository, method)]
+            finally:
+                # rows which were not written are kept in front of the rows added meanwhile
+                for (key, entities) in buffers.items():
+                    self._buffers[key] = entities + self._buffers.get(key, [])
+                    self._pending += len(entities)
+                if buffers:
+                    self._callbacks = callbacks + self._callbacks
+                self.metrics.record_depth(self._pending)
+
+        for callback in callbacks:
+            callback()
+
+    async def _write(self, repository: Crud[Any], method: str, entities: List[Any]) -> int:
+        """write the rows in halves until the rows failing on their own are found, returns the written rows"""
+        try:
+            await getattr(repository, method)(entities)
+            return len(entities)
+        except RETRIED_ERRORS:
+            raise
+        except Exception as ex:
+            if len(entities) == 1:
+                self.metrics.errors += 1
+                log.error("dropped row %r of %s.%s, got %s", entities[0], type(repository).__name__, method, ex)
+                return 0
+        middle = len(entities) // 2
+        return (await self._write(repository, method, entities[:middle]) +
+                await self._write(repository, method, entities[middle:]))
+
+    async def close(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await self._try_flush()
+
+    async def _try_flush(self) -> None:
+        # failed rows stay buffered, the next flush writes them again
+        try:
+            await self.flush()
+        except Exception:
+            pass
+
+    def _flush_in_background(self) -> None:
+        # the task inherits the pool partition of the caller
+        task = asyncio.create_task(self._try_flush())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def _schedule_flush(self) -> None:
+        if self._timer is None or self._timer.done():
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.max_delay)
+        self._timer = None
+        await self._try_flush()
+
+    @staticmethod
+    def _write_order(buffer: Tuple[Crud[Any], str]) -> Tuple[int, bool]:
+        repository, method = buffer
+        repository_type = type(repository)
+        is_insert = method == 'insert_many'
+        if repository_type in REPOSITORIES:
+            return REPOSITORIES.index(repository_type), not is_insert
+        return len(REPOSITORIES), not is_insert
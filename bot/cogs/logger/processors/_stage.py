@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Generic, List, Optional, TypeVar
+
+log = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+@dataclass
+class StageMetrics:
+    """throughput and queue depth of one stage of the backup"""
+    name: str
+    workers: int = 1
+    processed: int = 0
+    busy: float = 0.0
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+    errors: int = 0
+
+    @property
+    def rate(self) -> float:
+        """items processed per second of work of one worker"""
+        return self.processed / self.busy if self.busy else 0.0
+
+    def record(self, items: int, duration: float) -> None:
+        self.processed += items
+        self.busy += duration
+
+    def record_depth(self, depth: int) -> None:
+        self.queue_depth = depth
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+
+    def __str__(self) -> str:
+        return (f"{self.name}: {self.processed} items with {self.workers} workers, {self.rate:.1f}/s per worker, "
+                f"queue {self.queue_depth} (max {self.max_queue_depth}), {self.errors} errors")
+
+
+class Stage(Generic[T]):
+    """
+    bounded queue consumed by `workers` concurrent tasks calling `handler`
+
+    `put` waits while the queue is full, so a slow stage slows down the
+    stages in front of it. The first error of the handler stops the stage,
+    it is raised by the following `put` or `join`
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[T], Awaitable[None]],
+        metrics: StageMetrics,
+        queue_size: int
+    ) -> None:
+        self.handler = handler
+        self.metrics = metrics
+        self._queue: asyncio.Queue[T] = asyncio.Queue(maxsize=queue_size)
+        self._workers: List[asyncio.Task[None]] = []
+        self._error: Optional[BaseException] = None
+
+    async def __aenter__(self) -> "Stage[T]":
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.metrics.workers)]
+        return self
+
+    async def __aexit__(self, *_exc: object) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self.metrics.record_depth(0)
+
+    async def put(self, item: T) -> None:
+        self._raise_error()
+        await self._queue.put(item)
+        self.metrics.record_depth(self._queue.qsize())
+
+    async def join(self) -> None:
+        """wait until all items put so far are handled"""
+        await self._queue.join()
+        self._raise_error()
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    async def _work(self) -> None:
+        while True:
+            item = await self._queue.get()
+            if self._error is not None:
+                # the stage failed, drop what is left so `join` does not wait for it
+                self._queue.task_done()
+                continue
+
+            start = time.perf_counter()
+            try:
+                await self.handler(item)
+            except Exception as ex:
+                self.metrics.errors += 1
+                self._error = ex
+            finally:
+                self.metrics.record(1, time.perf_counter() - start)
+                self.metrics.record_depth(self._queue.qsize())
+                self._queue.task_done()
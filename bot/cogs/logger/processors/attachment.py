@@ -1,23 +1,30 @@
+from typing import Hashable
+
 import inject
 
 from bot.cogs.logger.processors._base import Backup
+from bot.cogs.logger.processors._sink import BackupSink
 from bot.db import AttachmentEntity, AttachmentMapper, AttachmentRepository
 from bot.utils import MessageAttachment
 
 
 class AttachmentBackup(Backup[MessageAttachment]):
     @inject.autoparams()
-    def __init__(self, attachment_repository: AttachmentRepository, mapper: AttachmentMapper) -> None:
+    def __init__(self, attachment_repository: AttachmentRepository, mapper: AttachmentMapper, sink: BackupSink) -> None:
         super().__init__()
+        self.sink = sink
         self.attachment_repository = attachment_repository
         self.mapper = mapper
 
     async def traverse_up(self, attachment: MessageAttachment) -> None:
         await super().traverse_up(attachment)
 
+    def key(self, attachment: MessageAttachment) -> Hashable:
+        return attachment.attachment.id
+
     async def backup(self, attachment: MessageAttachment) -> None:
         entity: AttachmentEntity = await self.mapper.map(attachment)
-        await self.attachment_repository.insert(entity)
+        await self.sink.add(self.attachment_repository, entity)
 
     async def traverse_down(self, attachment: MessageAttachment) -> None:
         await super().traverse_down(attachment)
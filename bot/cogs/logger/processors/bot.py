@@ -1,14 +1,22 @@
+from typing import Optional
+
 import discord
 import inject
 from discord.ext import commands
 
+from bot.utils.progress import ProgressReporter
 from . import Backup
+from ._pipeline import MessagePipeline, without_history
+from ._sink import BackupSink
 from ..history_iterator import HistoryIterator
+from ..structure_sync import StructureSync
 
 
 class BotBackup(Backup[commands.Bot]):
-    def __init__(self) -> None:
+    @inject.autoparams()
+    def __init__(self, sink: BackupSink) -> None:
         super().__init__()
+        self.sink = sink
 
     async def traverse_up(self, bot: commands.Bot) -> None:
         await super().traverse_up(bot)
@@ -16,18 +24,50 @@ class BotBackup(Backup[commands.Bot]):
     async def backup(self, bot: commands.Bot) -> None:
         pass
 
-    @inject.autoparams('guild_backup', 'message_backup')
-    async def traverse_down(
-        self,
-        bot: commands.Bot,
-        guild_backup: Backup[discord.Guild],
-        message_backup: Backup[discord.Message]
-    ) -> None:
+    @inject.autoparams('guild_backup')
+    async def traverse_down(self, bot: commands.Bot, guild_backup: Backup[discord.Guild]) -> None:
         await super().traverse_down(bot)
 
         for guild in bot.guilds:
             await guild_backup.traverse_down(guild)
 
-        async for week in HistoryIterator(bot):
-            async for message in await week.history():
-                await message_backup.traverse_down(message)
+        # channels have to be stored before looking for channels to update
+        await self.sink.flush()
+
+        await self.backup_history(bot)
+
+    @inject.autoparams('structure_sync', 'channel_backup')
+    async def backup_structure(
+        self,
+        bot: commands.Bot,
+        structure_sync: "StructureSync",
+        channel_backup: Backup[discord.abc.GuildChannel]
+    ) -> None:
+        """
+        write the changes of guilds since the last sync,
+        then backup the threads of channels without the history of channels
+        """
+        await structure_sync.reconcile(bot)
+
+        with without_history():
+            for guild in bot.guilds:
+                for channel in guild.channels:
+                    await channel_backup.traverse_down(channel)
+        await self.sink.flush()
+
+    @inject.autoparams('pipeline')
+    async def backup_history(self, bot: commands.Bot, pipeline: MessagePipeline) -> None:
+        """backup history of channels that are behind, shared with other backup workers"""
+        history = HistoryIterator(bot)
+        progress: Optional[ProgressReporter] = None
+        try:
+            async for week in history:
+                # the channels are enqueued by the first step of the iterator
+                if progress is None:
+                    progress = ProgressReporter(max(1, history.enqueued), message="history backup progress %d%%")
+                await pipeline.run(await week.history())
+                progress.increment()
+        finally:
+            await history.aclose()
+
+        await self.sink.flush()
@@ -1,4 +1,5 @@
 import logging
+from typing import Hashable
 
 import discord
 import inject
@@ -6,14 +7,16 @@ from discord import CategoryChannel
 
 from bot.db import CategoryMapper, CategoryRepository, CategoryEntity
 from bot.cogs.logger.processors._base import Backup
+from bot.cogs.logger.processors._sink import BackupSink
 
 log = logging.getLogger(__name__)
 
 
 class CategoryBackup(Backup[CategoryChannel]):
     @inject.autoparams()
-    def __init__(self, category_repository: CategoryRepository, mapper: CategoryMapper) -> None:
+    def __init__(self, category_repository: CategoryRepository, mapper: CategoryMapper, sink: BackupSink) -> None:
         super().__init__()
+        self.sink = sink
         self.category_repository = category_repository
         self.mapper = mapper
 
@@ -22,10 +25,13 @@ class CategoryBackup(Backup[CategoryChannel]):
         await guild_backup.traverse_up(category.guild)
         await super().traverse_up(category)
 
+    def fingerprint(self, category: CategoryChannel) -> Hashable:
+        return category.name, category.position
+
     async def backup(self, category: CategoryChannel) -> None:
         log.debug('backing up category %s', category.name)
         entity: CategoryEntity = await self.mapper.map(category)
-        await self.category_repository.insert(entity)
+        await self.sink.add(self.category_repository, entity)
 
     @inject.autoparams()
     async def traverse_down(self, category: CategoryChannel, channel_backup: Backup[discord.abc.GuildChannel]) -> None:
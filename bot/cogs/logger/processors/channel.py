@@ -1,4 +1,5 @@
 import logging
+from typing import Hashable, List
 
 import discord
 import inject
@@ -6,17 +7,30 @@ from discord.abc import GuildChannel
 
 from bot.cogs.logger.message_iterator import MessageIterator
 from bot.cogs.logger.processors._base import Backup
-from bot.db import ChannelRepository, ChannelMapper, ChannelEntity
+from bot.cogs.logger.processors._pipeline import MessagePipeline
+from bot.cogs.logger.processors._sink import BackupSink
+from bot.cogs.logger.processors.thread import ThreadBackup
+from bot.db import ChannelRepository, ChannelMapper, ChannelEntity, LoggerRepository, LoggerThreadCursorRepository
 
 log = logging.getLogger(__name__)
 
 
 class ChannelBackup(Backup[GuildChannel]):
     @inject.autoparams()
-    def __init__(self, channel_repository: ChannelRepository, mapper: ChannelMapper) -> None:
+    def __init__(
+        self,
+        channel_repository: ChannelRepository,
+        mapper: ChannelMapper,
+        thread_cursor_repository: LoggerThreadCursorRepository,
+        logger_repository: LoggerRepository,
+        sink: BackupSink
+    ) -> None:
         super().__init__()
+        self.sink = sink
         self.channel_repository = channel_repository
         self.mapper = mapper
+        self.thread_cursor_repository = thread_cursor_repository
+        self.logger_repository = logger_repository
 
     @inject.autoparams()
     async def traverse_up(
@@ -34,19 +48,22 @@ class ChannelBackup(Backup[GuildChannel]):
             await guild_backup.traverse_up(channel.guild)
         await super().traverse_up(channel)
 
+    def fingerprint(self, channel: GuildChannel) -> Hashable:
+        return channel.name, channel.category_id
+
     async def backup(self, channel: GuildChannel) -> None:
         if not self.mapper.can_map(channel):
             return
 
         log.debug('backing up channel %s', channel.name)
         entity: ChannelEntity = await self.mapper.map(channel)
-        await self.channel_repository.insert(entity)
+        await self.sink.add(self.channel_repository, entity)
 
     @inject.autoparams()
     async def traverse_down(
         self,
         channel: GuildChannel,
-        message_backup: Backup[discord.Message],
+        pipeline: MessagePipeline,
         thread_backup: Backup[discord.Thread]
     ) -> None:
         if not self.mapper.can_map(channel):
@@ -59,11 +76,43 @@ class ChannelBackup(Backup[GuildChannel]):
                 for thread in channel.threads:
                     await thread_backup.traverse_down(thread)
 
-                async for thread in channel.archived_threads(limit=None):
-                    await thread_backup.traverse_down(thread)
+                await self._traverse_archived_threads(channel)
 
-            if isinstance(channel, discord.TextChannel):
-                async for message in await MessageIterator(channel).history():
-                    await message_backup.traverse_down(message)
+            if isinstance(channel, discord.TextChannel) and pipeline.history_enabled:
+                await pipeline.run(await MessageIterator(channel).history())
         except Exception as ex:
             log.error("Could not traverse_down channel %s, got %s", channel.name, ex)
+
+    @inject.autoparams('thread_backup')
+    async def _traverse_archived_threads(
+        self,
+        channel: discord.TextChannel | discord.ForumChannel,
+        thread_backup: Backup[discord.Thread]
+    ) -> None:
+        """
+        backup threads archived since the last backup, threads are listed by decreasing archive timestamp
+
+        the cursor moves only past threads whose history is complete, threads skipped
+        for a short backlog or cut off by the window size are listed again next time
+        """
+        cursor = await self.thread_cursor_repository.find_cursor(channel.id)
+        threads: List[discord.Thread] = []
+        async for thread in channel.archived_threads(limit=None):
+            if cursor is not None and thread.archive_timestamp <= cursor:
+                break
+            await thread_backup.traverse_down(thread)
+            threads.append(thread)
+        if not threads:
+            return
+
+        # threads must be stored before the cursor moves past them,
+        # a failed write is raised by the flush and keeps the cursor
+        await self.sink.flush()
+        archived_until = cursor
+        for thread in reversed(threads):
+            if not ThreadBackup.is_complete(thread, await self.logger_repository.find_last_process(thread.id)):
+                break
+            archived_until = thread.archive_timestamp
+
+        if archived_until is not None and archived_until != cursor:
+            await self.thread_cursor_repository.advance(channel.id, archived_until)
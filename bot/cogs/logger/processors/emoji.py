@@ -1,10 +1,12 @@
 import logging
+from typing import Hashable
 
 import discord
 import inject
 from discord import Emoji
 
 from bot.cogs.logger.processors._base import Backup
+from bot.cogs.logger.processors._sink import BackupSink
 from bot.db import EmojiRepository, EmojiMapper, EmojiEntity
 from bot.utils import AnyEmote
 
@@ -13,8 +15,9 @@ log = logging.getLogger(__name__)
 
 class EmojiBackup(Backup[AnyEmote]):
     @inject.autoparams()
-    def __init__(self, emoji_repository: EmojiRepository, mapper: EmojiMapper) -> None:
+    def __init__(self, emoji_repository: EmojiRepository, mapper: EmojiMapper, sink: BackupSink) -> None:
         super().__init__()
+        self.sink = sink
         self.emoji_repository = emoji_repository
         self.mapper = mapper
 
@@ -24,10 +27,16 @@ class EmojiBackup(Backup[AnyEmote]):
             await guild_backup.traverse_up(emoji.guild)
         await super().traverse_up(emoji)
 
+    def key(self, emoji: AnyEmote) -> Hashable:
+        return emoji if isinstance(emoji, str) else (emoji.id or emoji.name)
+
+    def fingerprint(self, emoji: AnyEmote) -> Hashable:
+        return None if isinstance(emoji, str) else (emoji.name, emoji.animated)
+
     async def backup(self, emoji: AnyEmote) -> None:
         log.debug('backing up emoji %s', emoji.name if hasattr(emoji, 'name') else emoji)
         entity: EmojiEntity = await self.mapper.map(emoji)
-        await self.emoji_repository.insert(entity)
+        await self.sink.add(self.emoji_repository, entity)
 
     async def traverse_down(self, emoji: AnyEmote) -> None:
         await super().traverse_down(emoji)
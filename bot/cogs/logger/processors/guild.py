@@ -1,4 +1,5 @@
 import logging
+from typing import Hashable
 
 import discord
 import inject
@@ -7,24 +8,29 @@ from discord import Guild
 from bot.db import GuildRepository, GuildMapper, GuildEntity
 from bot.utils import AnyEmote
 from . import Backup
+from ._sink import BackupSink
 
 log = logging.getLogger(__name__)
 
 
 class GuildBackup(Backup[Guild]):
     @inject.autoparams()
-    def __init__(self, guild_repository: GuildRepository, mapper: GuildMapper) -> None:
+    def __init__(self, guild_repository: GuildRepository, mapper: GuildMapper, sink: BackupSink) -> None:
         super().__init__()
+        self.sink = sink
         self.guild_repository = guild_repository
         self.mapper = mapper
 
     async def traverse_up(self, guild: Guild) -> None:
         await super().traverse_up(guild)
 
+    def fingerprint(self, guild: Guild) -> Hashable:
+        return guild.name, guild.icon
+
     async def backup(self, guild: Guild) -> None:
         log.debug('backing up guild %s', guild.name)
         entity: GuildEntity = await self.mapper.map(guild)
-        await self.guild_repository.insert(entity)
+        await self.sink.add(self.guild_repository, entity)
 
     @inject.autoparams()
     async def traverse_down(
@@ -1,5 +1,6 @@
 import asyncio
 import logging
+from typing import Hashable
 
 import discord
 import inject
@@ -9,6 +10,7 @@ from discord.ext import commands
 from bot.db import MessageRepository, MessageMapper, MessageEntity, MessageEmojiMapper
 from bot.utils import MessageEmote, MessageAttachment
 from bot.cogs.logger.processors._base import Backup
+from bot.cogs.logger.processors._sink import BackupSink
 
 log = logging.getLogger(__name__)
 
@@ -22,10 +24,12 @@ class MessageBackup(Backup[Message]):
         bot: commands.Bot,
         message_repository: MessageRepository,
         mapper: MessageMapper,
-        emoji_mapper: MessageEmojiMapper
+        emoji_mapper: MessageEmojiMapper,
+        sink: BackupSink
     ) -> None:
         super().__init__()
         self.bot = bot
+        self.sink = sink
         self.message_repository = message_repository
         self.mapper = mapper
         self.emoji_mapper = emoji_mapper
@@ -49,6 +53,9 @@ class MessageBackup(Backup[Message]):
         await user_backup.traverse_up(message.author)
         await super().traverse_up(message)
 
+    def fingerprint(self, message: Message) -> Hashable:
+        return message.edited_at
+
     async def backup(self, message: Message) -> None:
         if not isinstance(message.channel, (discord.abc.GuildChannel, discord.Thread)):
             return
@@ -56,7 +63,7 @@ class MessageBackup(Backup[Message]):
         log.debug('backing up message %s', message.content)
 
         entity: MessageEntity = await self.mapper.map(message)
-        await self.message_repository.insert(entity)
+        await self.sink.add(self.message_repository, entity)
 
         self.bot.dispatch("message_backup", message)
 
@@ -79,5 +86,5 @@ class MessageBackup(Backup[Message]):
         for attachment in message.attachments:
             await attachment_backup.traverse_down(MessageAttachment(message, attachment))
 
-        for emoji in await self.emoji_mapper.map_emojis(self.bot, message):
+        for emoji in self.emoji_mapper.map_emojis(message):
             await message_emoji_backup.traverse_down(emoji)
@@ -1,20 +1,29 @@
 import logging
+from typing import Hashable
 
 import discord
 import inject
 from discord.ext import commands
 
 from bot.cogs.logger.processors._base import Backup
+from bot.cogs.logger.processors._sink import BackupSink
 from bot.db.discord import MessageEmojiEntity, MessageEmojiMapper, MessageEmojiRepository
-from bot.utils import MessageEmote, AnyEmote
+from bot.utils import MessageEmote, AnyEmote, get_emoji_id
 
 log = logging.getLogger(__name__)
 
 
 class MessageEmojiBackup(Backup[MessageEmote]):
     @inject.autoparams()
-    def __init__(self, bot: commands.Bot, repository: MessageEmojiRepository, mapper: MessageEmojiMapper) -> None:
+    def __init__(
+        self,
+        bot: commands.Bot,
+        repository: MessageEmojiRepository,
+        mapper: MessageEmojiMapper,
+        sink: BackupSink
+    ) -> None:
         super().__init__()
+        self.sink = sink
         self.bot = bot
         self.repository = repository
         self.mapper = mapper
@@ -30,11 +39,17 @@ class MessageEmojiBackup(Backup[MessageEmote]):
         await emoji_backup.traverse_up(message_emoji.emoji)
         await super().traverse_up(message_emoji)
 
+    def key(self, emoji: MessageEmote) -> Hashable:
+        return emoji.message.id, get_emoji_id(emoji.emoji)
+
+    def fingerprint(self, emoji: MessageEmote) -> Hashable:
+        return emoji.count
+
     async def backup(self, emoji: MessageEmote) -> None:
         log.debug("Backung up message_emoji %s", emoji.emoji)
 
         entity: MessageEmojiEntity = await self.mapper.map(emoji)
-        await self.repository.insert(entity)
+        await self.sink.add(self.repository, entity)
 
     async def traverse_down(self, emoji: MessageEmote) -> None:
         await super().traverse_down(emoji)
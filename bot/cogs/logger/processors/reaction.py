@@ -1,19 +1,64 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Hashable, Optional, Tuple
+
 import discord
 import inject
 from discord import Reaction
 
-from bot.db import ReactionRepository, ReactionMapper, ReactionEntity
-from bot.utils import AnyEmote
+from bot.db import ReactionRepository, ReactionMapper, ReactionDelta
+from bot.db.utils import Id
+from bot.utils import AnyEmote, get_emoji_id
 from ._base import Backup
+from ._sink import BackupSink
+
+PREFETCH_REACTIONS = 5_000
+CACHED_WINDOWS = 16
+WINDOW_TTL = 600.0
+
+
+@dataclass
+class ReactionWindow:
+    """stored members of reactions to messages `first_id` to `last_id` of a channel"""
+    first_id: Id
+    last_id: Optional[Id]
+    members: Dict[Tuple[Id, Id], FrozenSet[Id]] = field(default_factory=dict)
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    def __contains__(self, message_id: Id) -> bool:
+        return self.first_id <= message_id and (self.last_id is None or message_id <= self.last_id)
+
+    @property
+    def expired(self) -> bool:
+        # reactions change live as well, stale windows would skip changed reactions
+        return time.monotonic() - self.loaded_at > WINDOW_TTL
 
 
 class ReactionBackup(Backup[Reaction]):
+    """
+    syncs reactions incrementally
+
+    members of stored reactions are prefetched for the following messages
+    of the channel, the users of a reaction are paged from discord only when
+    `reaction.count` differs from the number of stored members. Changes are
+    written as added and removed members instead of whole arrays,
+    the prefetched members are updated once the changes are written
+    """
+
     @inject.autoparams()
-    def __init__(self, reaction_repository: ReactionRepository, mapper: ReactionMapper) -> None:
+    def __init__(self, reaction_repository: ReactionRepository, mapper: ReactionMapper, sink: BackupSink) -> None:
         super().__init__()
+        self.sink = sink
         self.reaction_repository = reaction_repository
         self.mapper = mapper
 
+        self._windows: OrderedDict[Id, ReactionWindow] = OrderedDict()
+        self._load_lock = asyncio.Lock()
+        self.skipped = 0
+        self.synced = 0
+
     @inject.autoparams()
     async def traverse_up(
         self,
@@ -25,9 +70,51 @@ class ReactionBackup(Backup[Reaction]):
         await message_backup.traverse_up(reaction.message)
         await super().traverse_up(reaction)
 
+    def key(self, reaction: Reaction) -> Hashable:
+        return reaction.message.id, get_emoji_id(reaction.emoji)
+
+    def fingerprint(self, reaction: Reaction) -> Hashable:
+        return reaction.count
+
     async def backup(self, reaction: Reaction) -> None:
-        entity: ReactionEntity = await self.mapper.map(reaction)
-        await self.reaction_repository.insert(entity)
+        message_id, emoji_id = key = reaction.message.id, get_emoji_id(reaction.emoji)
+        window = await self._get_window(reaction.message)
+        stored = window.members.get(key, frozenset())
+        if len(stored) == reaction.count:
+            self.skipped += 1
+            return
+
+        self.synced += 1
+        current = frozenset(await self.mapper.map_user_ids(reaction))
+        for user_id in current - stored:
+            await self.sink.add(self.reaction_repository, ReactionDelta(message_id, emoji_id, user_id, True),
+                                'apply_deltas')
+        for user_id in stored - current:
+            await self.sink.add(self.reaction_repository, ReactionDelta(message_id, emoji_id, user_id, False),
+                                'apply_deltas')
+        # until the deltas are written, the reaction is compared with the stored members
+        self.sink.when_written(lambda: window.members.__setitem__(key, current))
 
     async def traverse_down(self, reaction: Reaction) -> None:
         await super().traverse_down(reaction)
+
+    async def _get_window(self, message: discord.Message) -> ReactionWindow:
+        channel_id = message.channel.id
+        async with self._load_lock:
+            window = self._windows.get(channel_id)
+            if window is None or window.expired or message.id not in window:
+                window = self._windows[channel_id] = await self._load_window(channel_id, message.id)
+            self._windows.move_to_end(channel_id)
+            while len(self._windows) > CACHED_WINDOWS:
+                self._windows.popitem(last=False)
+            return window
+
+    async def _load_window(self, channel_id: Id, message_id: Id) -> ReactionWindow:
+        rows = await self.reaction_repository.find_members_from(channel_id, message_id, PREFETCH_REACTIONS)
+        # the reactions of the last message could be cut off by the limit
+        last_id = rows[-1][0] - 1 if len(rows) == PREFETCH_REACTIONS else None
+        window = ReactionWindow(message_id, last_id)
+        for row_message_id, emoji_id, member_ids in rows:
+            if last_id is None or row_message_id <= last_id:
+                window.members[(row_message_id, emoji_id)] = frozenset(member_ids)
+        return window
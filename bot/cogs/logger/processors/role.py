@@ -1,4 +1,5 @@
 import logging
+from typing import Hashable
 
 import discord
 import inject
@@ -6,26 +7,31 @@ from discord import Role
 
 from bot.db import RoleRepository, RoleMapper, RoleEntity
 from bot.cogs.logger.processors._base import Backup
+from bot.cogs.logger.processors._sink import BackupSink
 
 log = logging.getLogger(__name__)
 
 
 class RoleBackup(Backup[Role]):
     @inject.autoparams()
-    def __init__(self, role_repository: RoleRepository, mapper: RoleMapper) -> None:
+    def __init__(self, role_repository: RoleRepository, mapper: RoleMapper, sink: BackupSink) -> None:
         super().__init__()
+        self.sink = sink
         self.role_repository = role_repository
         self.mapper = mapper
 
     @inject.autoparams()
     async def traverse_up(self, role: Role, guild_backup: Backup[discord.Guild]) -> None:
         await guild_backup.traverse_up(role.guild)
-        await self.backup(role)
+        await super().traverse_up(role)
+
+    def fingerprint(self, role: Role) -> Hashable:
+        return role.name, role.color.value
 
     async def backup(self, role: Role) -> None:
         log.debug("backing up role %s", role)
         entity: RoleEntity = await self.mapper.map(role)
-        await self.role_repository.insert(entity)
+        await self.sink.add(self.role_repository, entity)
 
     async def traverse_down(self, role: Role) -> None:
-        await self.backup(role)
+        await super().traverse_down(role)
@@ -1,22 +1,36 @@
 import logging
+from datetime import timedelta
+from typing import Hashable, Optional
 
 import discord
 import inject
 from discord import Thread
+from discord.utils import snowflake_time
 
 from bot.cogs.logger.message_iterator import MessageIterator
-from bot.db import ThreadMapper, ThreadRepository, ThreadEntity
+from bot.db import ThreadMapper, ThreadRepository, ThreadEntity, LoggerRepository, LoggerEntity
 from bot.cogs.logger.processors._base import Backup
+from bot.cogs.logger.processors._pipeline import MessagePipeline
+from bot.cogs.logger.processors._sink import BackupSink
 
 log = logging.getLogger(__name__)
 
 
 class ThreadBackup(Backup[Thread]):
     @inject.autoparams()
-    def __init__(self, repository: ThreadRepository, mapper: ThreadMapper) -> None:
+    def __init__(
+        self,
+        repository: ThreadRepository,
+        mapper: ThreadMapper,
+        logger_repository: LoggerRepository,
+        sink: BackupSink
+    ) -> None:
         super().__init__()
+        self.sink = sink
         self.repository = repository
         self.mapper = mapper
+        self.logger_repository = logger_repository
+        self.skipped = 0
 
     @inject.autoparams()
     async def traverse_up(self, thread: Thread, channel_backup: Backup[discord.abc.GuildChannel]) -> None:
@@ -25,20 +39,42 @@ class ThreadBackup(Backup[Thread]):
         await channel_backup.traverse_up(thread.parent)
         await super().traverse_up(thread)
 
+    def fingerprint(self, thread: Thread) -> Hashable:
+        return thread.name, thread.archived
+
     async def backup(self, thread: Thread) -> None:
         if not thread.parent:
             return
 
         log.debug('backing up thread %s', thread.name)
         entity: ThreadEntity = await self.mapper.map(thread)
-        await self.repository.insert(entity)
+        await self.sink.add(self.repository, entity)
 
     @inject.autoparams()
-    async def traverse_down(self, thread: Thread, message_backup: Backup[discord.Message]) -> None:
+    async def traverse_down(self, thread: Thread, pipeline: MessagePipeline) -> None:
         if not thread.parent:
             return
 
         await super().traverse_down(thread)
 
-        async for message in await MessageIterator(thread).history():
-            await message_backup.traverse_down(message)
+        if self.is_complete(thread, await self.logger_repository.find_last_process(thread.id)):
+            self.skipped += 1
+            return
+        message_iterator = MessageIterator(thread)
+        if thread.archived:
+            # archived threads get no new messages, waiting for a backlog would only delay them
+            message_iterator.min_backlog = timedelta()
+        await pipeline.run(await message_iterator.history())
+
+    @staticmethod
+    def is_complete(thread: Thread, last_process: Optional[LoggerEntity]) -> bool:
+        """the history of the thread is backed up past its last message"""
+        if last_process is None or last_process.finished_at is None or last_process.to_date is None:
+            return False
+        if thread.last_message_id is not None:
+            last_activity = snowflake_time(thread.last_message_id)
+        elif thread.archived:
+            last_activity = thread.archive_timestamp
+        else:
+            return False
+        return last_activity <= last_process.to_date
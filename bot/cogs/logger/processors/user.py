@@ -1,4 +1,5 @@
 import logging
+from typing import Hashable
 
 import discord
 import inject
@@ -6,14 +7,16 @@ from discord import User, Member
 
 from bot.db import UserRepository, UserMapper, UserEntity
 from . import Backup
+from ._sink import BackupSink
 
 log = logging.getLogger(__name__)
 
 
 class UserBackup(Backup[User | Member]):
     @inject.autoparams()
-    def __init__(self, user_repository: UserRepository, mapper: UserMapper) -> None:
+    def __init__(self, user_repository: UserRepository, mapper: UserMapper, sink: BackupSink) -> None:
         super().__init__()
+        self.sink = sink
         self.user_repository = user_repository
         self.mapper = mapper
 
@@ -23,10 +26,13 @@ class UserBackup(Backup[User | Member]):
             await guild_backup.traverse_up(user.guild)
         await super().traverse_up(user)
 
+    def fingerprint(self, user: User | Member) -> Hashable:
+        return user.name, user.avatar, user.bot
+
     async def backup(self, user: User | Member) -> None:
         log.debug('backing up user %s', user.name)
         entity: UserEntity = await self.mapper.map(user)
-        await self.user_repository.insert(entity)
+        await self.sink.add(self.user_repository, entity)
 
     async def traverse_down(self, user: User | Member) -> None:
         await super().traverse_down(user)
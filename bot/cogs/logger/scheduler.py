@@ -0,0 +1,264 @@
+import logging
+import math
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional
+
+import discord
+import inject
+from discord.ext import commands
+from discord.utils import snowflake_time
+from pytz import UTC
+
+from bot.constants import CONFIG
+from bot.db import LoggerRepository, LoggerLeaseRepository
+from bot.db.utils import Id
+from .history_iterator import HistoryIterator
+from .processors import BackupSink, MessagePipeline
+
+log = logging.getLogger(__name__)
+
+PAGE_SIZE = 100
+ACTIVITY_HALF_LIFE = timedelta(hours=6)
+IDLE_RATE = 0.05
+REFRESH_EVERY = timedelta(minutes=15)
+
+
+class ApiBudget:
+    """
+    token bucket of discord requests the history backup may spend
+
+    refilled by `per_minute` requests every minute up to `burst` requests,
+    so an idle scheduler can spend a few minutes of budget at once
+    """
+
+    def __init__(self, per_minute: float, burst: Optional[float] = None) -> None:
+        self.per_minute = per_minute
+        self.burst = burst if burst is not None else per_minute * 5
+        self._tokens = self.burst
+        self._refilled_at = time.monotonic()
+
+    @property
+    def available(self) -> float:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.per_minute / 60)
+        self._refilled_at = now
+        return self._tokens
+
+    def spend(self, requests: float) -> None:
+        self._tokens = self.available - requests
+
+    def time_for(self, requests: float) -> timedelta:
+        """time until the budget allows `requests` more requests"""
+        return timedelta(minutes=max(0.0, requests - self.available) / self.per_minute)
+
+
+@dataclass
+class ChannelSchedule:
+    """
+    what the scheduler knows about the backlog of a channel
+
+    the activity is a count of live messages decaying with `ACTIVITY_HALF_LIFE`,
+    channels without live messages are assumed to get `IDLE_RATE` messages an hour
+    as long as their last message is newer than their coverage
+    """
+    channel_id: Id
+    covered_until: Optional[datetime] = None
+    has_gap: bool = False
+    last_message_at: Optional[datetime] = None
+    activity: float = 0.0
+    activity_at: Optional[datetime] = None
+
+    @property
+    def has_new_messages(self) -> bool:
+        if self.covered_until is None or self.last_message_at is None:
+            return True
+        return self.last_message_at > self.covered_until
+
+    def record_message(self, at: datetime) -> None:
+        if self.activity_at is not None and at < self.activity_at:
+            # late events are added as decayed by the time of the last event
+            self.activity += 0.5 ** ((self.activity_at - at) / ACTIVITY_HALF_LIFE)
+        else:
+            self.activity = self._decayed_activity(at) + 1
+            self.activity_at = at
+        if self.last_message_at is None or at > self.last_message_at:
+            self.last_message_at = at
+
+    def rate(self, now: datetime) -> float:
+        """messages an hour"""
+        if not self.has_new_messages:
+            return 0.0
+        # for a steady rate the decayed count converges to rate * mean lifetime
+        mean_lifetime = ACTIVITY_HALF_LIFE / timedelta(hours=1) / math.log(2)
+        return max(IDLE_RATE, self._decayed_activity(now) / mean_lifetime)
+
+    def behind(self, now: datetime) -> timedelta:
+        return max(timedelta(), now - (self.covered_until or snowflake_time(self.channel_id)))
+
+    def backlog(self, now: datetime) -> float:
+        """estimated number of messages which are not backed up"""
+        return self.rate(now) * (self.behind(now) / timedelta(hours=1))
+
+    def requests(self, now: datetime) -> int:
+        return max(1, math.ceil(self.backlog(now) / PAGE_SIZE))
+
+    def priority(self, now: datetime) -> float:
+        # gaps are left by sessions of the bot, their end is known to have messages
+        return self.backlog(now) + (PAGE_SIZE if self.has_gap else 0)
+
+    def is_due(self, now: datetime, max_staleness: timedelta) -> bool:
+        if self.has_gap:
+            return True
+        if not self.has_new_messages:
+            return False
+        return self.backlog(now) >= PAGE_SIZE or self.behind(now) >= max_staleness
+
+    def _decayed_activity(self, now: datetime) -> float:
+        if self.activity_at is None:
+            return 0.0
+        return self.activity * 0.5 ** (max(timedelta(), now - self.activity_at) / ACTIVITY_HALF_LIFE)
+
+
+class QueuedChannel(NamedTuple):
+    schedule: ChannelSchedule
+    priority: float
+    requests: int
+    eta: timedelta
+
+
+class BackupScheduler:
+    """
+    backs up the history of channels continuously in small runs
+
+    channels are ranked by their estimated backlog, which grows with their
+    recent activity (live messages or the last message of the channel)
+    and the time since they were covered. Busy channels are due as soon
+    as a page of messages is missing, quiet channels once they are
+    `max_staleness` behind and channels without new messages never.
+
+    every `run` spends at most the requests left in the `ApiBudget`,
+    due channels are enqueued to the shared lease queue by priority,
+    so backup workers pick them up as well. Workers `work` off the queue
+    within the budget of their process
+    """
+
+    @inject.autoparams('logger_repository', 'lease_repository', 'pipeline', 'sink')
+    def __init__(
+        self,
+        logger_repository: LoggerRepository,
+        lease_repository: LoggerLeaseRepository,
+        pipeline: MessagePipeline,
+        sink: BackupSink,
+        requests_per_minute: float = CONFIG.backup.requests_per_minute,
+        max_staleness: timedelta = timedelta(days=CONFIG.backup.max_staleness_days)
+    ) -> None:
+        self.logger_repository = logger_repository
+        self.lease_repository = lease_repository
+        self.pipeline = pipeline
+        self.sink = sink
+        self.budget = ApiBudget(requests_per_minute)
+        self.max_staleness = max_staleness
+
+        self.channels: Dict[Id, ChannelSchedule] = {}
+        self._refreshed_at: Optional[datetime] = None
+
+    def record_message(self, message: discord.Message) -> None:
+        # threads are backed up with the structure of their guild
+        if not isinstance(message.channel, discord.TextChannel):
+            return
+        schedule = self.channels.setdefault(message.channel.id, ChannelSchedule(message.channel.id))
+        schedule.record_message(message.created_at)
+
+    async def refresh(self, bot: commands.Bot) -> None:
+        """reload the coverage of channels, the last message of a channel is taken from the cache"""
+        for progress in await self.logger_repository.find_channel_progress():
+            channel = bot.get_channel(progress.channel_id)
+            if not isinstance(channel, discord.TextChannel):
+                self.channels.pop(progress.channel_id, None)
+                continue
+
+            schedule = self.channels.setdefault(progress.channel_id, ChannelSchedule(progress.channel_id))
+            schedule.covered_until = progress.to_date
+            schedule.has_gap = progress.has_gap
+            if channel.last_message_id is not None:
+                last_message_at = snowflake_time(channel.last_message_id)
+                if schedule.last_message_at is None or last_message_at > schedule.last_message_at:
+                    schedule.last_message_at = last_message_at
+        self._refreshed_at = datetime.now(tz=UTC)
+
+    def queue(self, now: Optional[datetime] = None) -> List[QueuedChannel]:
+        """due channels by priority with the time until their backup starts"""
+        now = now or datetime.now(tz=UTC)
+        due = sorted((schedule for schedule in self.channels.values() if schedule.is_due(now, self.max_staleness)),
+                     key=lambda schedule: schedule.priority(now), reverse=True)
+
+        queued, requests = [], 0
+        for schedule in due:
+            queued.append(QueuedChannel(schedule, schedule.priority(now), schedule.requests(now),
+                                        self.budget.time_for(requests)))
+            requests += schedule.requests(now)
+        return queued
+
+    def eta(self, now: Optional[datetime] = None) -> timedelta:
+        """time until all due channels are backed up"""
+        now = now or datetime.now(tz=UTC)
+        return self.budget.time_for(sum(queued.requests for queued in self.queue(now)))
+
+    async def run(self, bot: commands.Bot) -> int:
+        """backup the most urgent channels the budget allows, returns the number of processed channels"""
+        now = datetime.now(tz=UTC)
+        if self._refreshed_at is None or now - self._refreshed_at >= REFRESH_EVERY:
+            await self.refresh(bot)
+
+        picked, requests = [], 0
+        for queued in self.queue(now):
+            if requests + queued.requests > self.budget.available and picked:
+                break
+            picked.append(queued)
+            requests += queued.requests
+        if not picked or self.budget.available < 1:
+            return 0
+
+        await self.lease_repository.enqueue([queued.schedule.channel_id for queued in picked],
+                                            [queued.priority for queued in picked])
+        return await self._backup_queued(bot)
+
+    async def work(self, bot: commands.Bot) -> int:
+        """
+        backup channels enqueued by the schedulers of all processes,
+        spends the same budget as `run`, returns the number of processed channels
+        """
+        if self.budget.available < 1:
+            return 0
+        return await self._backup_queued(bot)
+
+    async def _backup_queued(self, bot: commands.Bot) -> int:
+        processed = 0
+        history = HistoryIterator(bot, enqueue_updatable=False)
+        try:
+            async for window in history:
+                window.max_messages = int(self.budget.available) * PAGE_SIZE
+                window.min_backlog = timedelta()
+                await self.pipeline.run(await window.history())
+
+                self.budget.spend(window.processed // PAGE_SIZE + 1)
+                self._mark_processed(window.channel.id, window.processed < window.max_messages)
+                processed += 1
+                if self.budget.available < 1:
+                    break
+        finally:
+            await history.aclose()
+
+        await self.sink.flush()
+        log.info("backup processed %d channels, %.0f requests left", processed, self.budget.available)
+        return processed
+
+    def _mark_processed(self, channel_id: Id, caught_up: bool) -> None:
+        if (schedule := self.channels.get(channel_id)) is None:
+            return
+        # the exact coverage is reloaded by the next refresh
+        schedule.has_gap = False
+        if caught_up:
+            schedule.covered_until = datetime.now(tz=UTC)
@@ -0,0 +1,211 @@
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+import aiohttp
+import discord
+import inject
+from discord.ext import commands
+from pytz import UTC
+
+from bot.db.utils import Id
+from .processors import BackupSink, MessagePipeline
+from .scheduler import BackupScheduler
+
+log = logging.getLogger(__name__)
+
+RATE_LIMITED = 'We are being rate limited.'
+
+
+@dataclass
+class _Responses:
+    """responses discord sent to one call of `HTTPClient.request` and the time it took to send them"""
+    count: int = 0
+    time: float = 0.0
+
+
+_responses: ContextVar[Optional[_Responses]] = ContextVar('responses', default=None)
+
+
+async def _on_request_start(_session: aiohttp.ClientSession, context: SimpleNamespace, _params: Any) -> None:
+    context.started_at = time.perf_counter()
+
+
+async def _on_request_end(_session: aiohttp.ClientSession, context: SimpleNamespace, _params: Any) -> None:
+    if (responses := _responses.get()) is not None:
+        responses.count += 1
+        responses.time += time.perf_counter() - context.started_at
+
+
+# passed to the bot as `http_trace`, so `BackupStats` can tell the time
+# spent waiting for rate limits apart from the time discord took to respond
+HTTP_TRACE = aiohttp.TraceConfig()
+HTTP_TRACE.on_request_start.append(_on_request_start)
+HTTP_TRACE.on_request_end.append(_on_request_end)
+
+
+class Totals(NamedTuple):
+    """counters of the backup at one point in time"""
+    at: float
+    messages: int
+    requests: int
+    rows: int
+    rate_limited: int
+    rate_limit_wait: float
+
+
+@dataclass
+class GuildProgress:
+    """channels of a guild waiting for the scheduled backup"""
+    name: str
+    channels: int = 0
+    backlog: float = 0.0
+    eta: timedelta = field(default_factory=timedelta)
+
+
+@dataclass
+class StatsReport:
+    """throughput of the backup between two `Totals`"""
+    elapsed: float
+    messages: int
+    requests: int
+    rows: int
+    rate_limited: int
+    rate_limit_wait: float
+    guilds: List[GuildProgress] = field(default_factory=list)
+
+    @classmethod
+    def between(cls, start: Totals, end: Totals, guilds: List[GuildProgress]) -> "StatsReport":
+        return cls(end.at - start.at, end.messages - start.messages, end.requests - start.requests,
+                   end.rows - start.rows, end.rate_limited - start.rate_limited,
+                   end.rate_limit_wait - start.rate_limit_wait, guilds)
+
+    def per_second(self, count: float) -> float:
+        return count / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def channels(self) -> int:
+        return sum(guild.channels for guild in self.guilds)
+
+    @property
+    def eta(self) -> timedelta:
+        return max((guild.eta for guild in self.guilds), default=timedelta())
+
+    def __str__(self) -> str:
+        return (f"{self.per_second(self.messages):.1f} messages/s, {self.per_second(self.requests):.2f} requests/s, "
+                f"{self.per_second(self.rows):.1f} rows/s, {self.rate_limited} rate limits "
+                f"({self.rate_limit_wait:.1f}s waiting), {self.channels} channels remaining, done in "
+                f"{timedelta(seconds=int(self.eta.total_seconds()))}")
+
+
+class RateLimitHandler(logging.Handler):
+    """
+    counts the 429 responses of discord
+
+    discord.py retries them itself and only logs them,
+    the handler is added to the `discord.http` logger by `BackupStats.attach`
+    """
+
+    def __init__(self, stats: "BackupStats") -> None:
+        super().__init__(logging.WARNING)
+        self.stats = stats
+
+    def emit(self, record: logging.LogRecord) -> None:
+        # the global rate limit is logged a second time, it is counted by the first record
+        if isinstance(record.msg, str) and record.msg.startswith(RATE_LIMITED):
+            self.stats.rate_limited += 1
+
+
+class BackupStats:
+    """
+    throughput of the backup, read by the `backup status` command and logged periodically
+
+    messages are counted by the fetch stage of the `MessagePipeline`, rows by
+    the `BackupSink` and requests by the http client of the bot, so requests
+    include every request of the bot, not only those of the backup.
+    Channels remaining and their ETA come from the queue of the `BackupScheduler`
+
+    the rate limit wait is the time of a request minus the time discord took
+    to respond, as measured by `HTTP_TRACE`. It includes the waits for empty
+    buckets, which discord.py sleeps through before sending, and the retries
+    of 429 responses, summed over concurrent requests
+    """
+
+    @inject.autoparams('pipeline', 'sink', 'scheduler')
+    def __init__(self, pipeline: MessagePipeline, sink: BackupSink, scheduler: BackupScheduler) -> None:
+        self.pipeline = pipeline
+        self.sink = sink
+        self.scheduler = scheduler
+
+        self.requests = 0
+        self.rate_limited = 0
+        self.rate_limit_wait = 0.0
+        self.started = self.snapshot()
+        self.logged = self.started
+
+        self._handler = RateLimitHandler(self)
+        self._request: Optional[Callable[..., Awaitable[Any]]] = None
+
+    def attach(self, bot: commands.Bot) -> None:
+        if self._request is not None:
+            return
+        logging.getLogger('discord.http').addHandler(self._handler)
+
+        request = self._request = bot.http.request
+
+        async def counted_request(*args: Any, **kwargs: Any) -> Any:
+            self.requests += 1
+            started_at = time.perf_counter()
+            responses = _Responses()
+            token = _responses.set(responses)
+            try:
+                return await request(*args, **kwargs)
+            finally:
+                _responses.reset(token)
+                # without the trace the response time is unknown
+                if responses.count:
+                    self.rate_limit_wait += max(0.0, time.perf_counter() - started_at - responses.time)
+
+        bot.http.request = counted_request  # type: ignore[method-assign]
+
+    def detach(self, bot: commands.Bot) -> None:
+        logging.getLogger('discord.http').removeHandler(self._handler)
+        if self._request is not None:
+            bot.http.request = self._request  # type: ignore[method-assign]
+            self._request = None
+
+    def snapshot(self) -> Totals:
+        return Totals(time.monotonic(), self.pipeline.fetch_metrics.processed, self.requests,
+                      self.sink.metrics.processed, self.rate_limited, self.rate_limit_wait)
+
+    def guild_progress(self, bot: commands.Bot) -> List[GuildProgress]:
+        """channels due per guild, a guild is done once its last channel in the queue is"""
+        now = datetime.now(tz=UTC)
+        guilds: Dict[Optional[Id], GuildProgress] = {}
+        requests = 0
+        for queued in self.scheduler.queue(now):
+            requests += queued.requests
+            channel = bot.get_channel(queued.schedule.channel_id)
+            guild: Optional[discord.Guild] = getattr(channel, 'guild', None)
+
+            progress = guilds.setdefault(guild.id if guild else None,
+                                         GuildProgress(guild.name if guild else 'unknown'))
+            progress.channels += 1
+            progress.backlog += queued.schedule.backlog(now)
+            progress.eta = self.scheduler.budget.time_for(requests)
+        return list(guilds.values())
+
+    def report(self, bot: commands.Bot, since: Optional[Totals] = None) -> StatsReport:
+        return StatsReport.between(since or self.started, self.snapshot(), self.guild_progress(bot))
+
+    def log_report(self, bot: commands.Bot) -> None:
+        """log the throughput since the last report, if anything was backed up"""
+        now = self.snapshot()
+        if now[1:] == self.logged[1:]:
+            return
+        log.info("backup %s", StatsReport.between(self.logged, now, self.guild_progress(bot)))
+        self.logged = now
@@ -0,0 +1,217 @@
+import logging
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import discord
+import inject
+from discord.ext import commands
+
+from bot.cogs.logger.processors._base import Backup
+from bot.cogs.logger.processors._sink import BackupSink
+from bot.db import CategoryRepository, ChannelRepository, EmojiRepository, RoleRepository, ThreadRepository
+from bot.db.utils import Crud, Id
+from bot.utils import AnyEmote
+
+log = logging.getLogger(__name__)
+
+
+class Structure(Enum):
+    GUILDS = 'guilds'
+    ROLES = 'roles'
+    USERS = 'users'
+    EMOJIS = 'emojis'
+    CATEGORIES = 'categories'
+    CHANNELS = 'channels'
+    THREADS = 'threads'
+
+
+@dataclass
+class TableSnapshot:
+    """fingerprints of the rows of a table stored for one guild"""
+    rows: Dict[Hashable, Hashable] = field(default_factory=dict)
+    digest: Optional[int] = None
+
+
+@dataclass
+class SyncStats:
+    unchanged_tables: int = 0
+    synced: int = 0
+    deleted: int = 0
+
+    def __str__(self) -> str:
+        return f"{self.unchanged_tables} tables unchanged, {self.synced} rows synced, {self.deleted} deleted"
+
+
+class StructureSync:
+    """
+    keeps guilds, roles, users, emojis, categories, channels and threads in sync
+
+    changes are written as the gateway reports them, `reconcile` catches up
+    with events missed while the bot was disconnected. It compares a digest
+    of the fingerprints of every table of a guild with an in-memory snapshot
+    of the last sync and writes only the rows that changed, rows missing
+    from the guild are soft deleted. The first reconciliation of a process
+    writes everything, as there is no snapshot yet. Snapshots are replaced
+    only after the sink wrote their rows.
+
+    users are shared by guilds and threads disappear from the cache once
+    archived, so neither is deleted by `reconcile`, only by events
+    """
+
+    @inject.autoparams()
+    def __init__(
+        self,
+        guild_backup: Backup[discord.Guild],
+        role_backup: Backup[discord.Role],
+        user_backup: Backup[discord.User | discord.Member],
+        emoji_backup: Backup[AnyEmote],
+        category_backup: Backup[discord.CategoryChannel],
+        channel_backup: Backup[discord.abc.GuildChannel],
+        thread_backup: Backup[discord.Thread],
+        role_repository: RoleRepository,
+        emoji_repository: EmojiRepository,
+        category_repository: CategoryRepository,
+        channel_repository: ChannelRepository,
+        thread_repository: ThreadRepository,
+        sink: BackupSink
+    ) -> None:
+        self.sink = sink
+        self._backups: Dict[Structure, Backup[Any]] = {
+            Structure.GUILDS: guild_backup,
+            Structure.ROLES: role_backup,
+            Structure.USERS: user_backup,
+            Structure.EMOJIS: emoji_backup,
+            Structure.CATEGORIES: category_backup,
+            Structure.CHANNELS: channel_backup,
+            Structure.THREADS: thread_backup,
+        }
+        self._repositories: Dict[Structure, Crud[Any]] = {
+            Structure.ROLES: role_repository,
+            Structure.EMOJIS: emoji_repository,
+            Structure.CATEGORIES: category_repository,
+            Structure.CHANNELS: channel_repository,
+            Structure.THREADS: thread_repository,
+        }
+        self._snapshots: Dict[Tuple[Id, Structure], TableSnapshot] = {}
+        self.stats = SyncStats()
+
+    async def reconcile(self, bot: commands.Bot) -> None:
+        staged: Dict[Tuple[Id, Structure], TableSnapshot] = {}
+        for guild in bot.guilds:
+            await self._reconcile_guild(guild, staged)
+        await self._commit(staged)
+        log.info("structure reconciled, %s", self.stats)
+
+    async def reconcile_guild(self, guild: discord.Guild) -> None:
+        staged: Dict[Tuple[Id, Structure], TableSnapshot] = {}
+        await self._reconcile_guild(guild, staged)
+        await self._commit(staged)
+
+    async def _reconcile_guild(self, guild: discord.Guild, staged: Dict[Tuple[Id, Structure], TableSnapshot]) -> None:
+        # parents first, so the processors find them stored
+        for structure, objects in self._objects(guild):
+            await self._reconcile_table(guild.id, structure, objects, staged)
+
+    async def _commit(self, staged: Dict[Tuple[Id, Structure], TableSnapshot]) -> None:
+        # snapshots are kept only once their rows are written, a failed write is raised
+        # by the flush and the tables are compared with the previous snapshots again
+        await self.sink.flush()
+        self._snapshots.update(staged)
+
+    async def on_guild_update(self, guild: discord.Guild) -> None:
+        await self.sync(guild.id, Structure.GUILDS, guild)
+
+    async def on_member_update(self, member: discord.Member) -> None:
+        await self.sync(member.guild.id, Structure.USERS, member)
+
+    async def on_user_update(self, user: discord.User) -> None:
+        await self._backups[Structure.USERS].traverse_up(user)
+
+    async def on_role_update(self, role: discord.Role) -> None:
+        await self.sync(role.guild.id, Structure.ROLES, role)
+
+    async def on_role_delete(self, role: discord.Role) -> None:
+        await self.delete(role.guild.id, Structure.ROLES, role.id)
+
+    async def on_channel_update(self, channel: discord.abc.GuildChannel) -> None:
+        structure = Structure.CATEGORIES if isinstance(channel, discord.CategoryChannel) else Structure.CHANNELS
+        await self.sync(channel.guild.id, structure, channel)
+
+    async def on_channel_delete(self, channel: discord.abc.GuildChannel) -> None:
+        structure = Structure.CATEGORIES if isinstance(channel, discord.CategoryChannel) else Structure.CHANNELS
+        await self.delete(channel.guild.id, structure, channel.id)
+
+    async def on_emojis_update(
+        self,
+        guild: discord.Guild,
+        before: Sequence[discord.Emoji],
+        after: Sequence[discord.Emoji]
+    ) -> None:
+        for emoji in after:
+            await self.sync(guild.id, Structure.EMOJIS, emoji)
+        for emoji_id in {emoji.id for emoji in before} - {emoji.id for emoji in after}:
+            await self.delete(guild.id, Structure.EMOJIS, emoji_id)
+
+    async def on_thread_update(self, thread: discord.Thread) -> None:
+        await self.sync(thread.guild.id, Structure.THREADS, thread)
+
+    async def on_thread_delete(self, thread_id: Id, guild_id: Id) -> None:
+        await self.delete(guild_id, Structure.THREADS, thread_id)
+
+    async def sync(self, guild_id: Id, structure: Structure, obj: Any) -> None:
+        backup = self._backups[structure]
+        await backup.traverse_up(obj)
+        if (snapshot := self._snapshots.get((guild_id, structure))) is not None:
+            snapshot.rows[backup.key(obj)] = backup.fingerprint(obj)
+            snapshot.digest = None
+
+    async def delete(self, guild_id: Id, structure: Structure, id: Id) -> None:
+        await self.sink.add(self._repositories[structure], id, 'soft_delete_many')
+        self.stats.deleted += 1
+        if (snapshot := self._snapshots.get((guild_id, structure))) is not None:
+            snapshot.rows.pop(id, None)
+            snapshot.digest = None
+
+    async def _reconcile_table(
+        self,
+        guild_id: Id,
+        structure: Structure,
+        objects: Iterable[Any],
+        staged: Dict[Tuple[Id, Structure], TableSnapshot]
+    ) -> None:
+        backup = self._backups[structure]
+        current = {backup.key(obj): (obj, backup.fingerprint(obj)) for obj in objects}
+        rows = {key: fingerprint for (key, (_obj, fingerprint)) in current.items()}
+        digest = hash(frozenset(rows.items()))
+
+        snapshot = self._snapshots.get((guild_id, structure))
+        if snapshot is not None and snapshot.digest == digest:
+            self.stats.unchanged_tables += 1
+            return
+
+        previous = snapshot.rows if snapshot is not None else {}
+        for (key, (obj, fingerprint)) in current.items():
+            if key not in previous or previous[key] != fingerprint:
+                await backup.traverse_up(obj)
+                self.stats.synced += 1
+
+        if snapshot is not None and structure in self._repositories and structure is not Structure.THREADS:
+            for key in previous.keys() - current.keys():
+                await self.sink.add(self._repositories[structure], key, 'soft_delete_many')
+                self.stats.deleted += 1
+
+        staged[(guild_id, structure)] = TableSnapshot(rows, digest)
+
+    @staticmethod
+    def _objects(guild: discord.Guild) -> List[Tuple[Structure, Iterable[Any]]]:
+        return [
+            (Structure.GUILDS, [guild]),
+            (Structure.ROLES, guild.roles),
+            (Structure.USERS, guild.members),
+            (Structure.EMOJIS, guild.emojis),
+            (Structure.CATEGORIES, guild.categories),
+            (Structure.CHANNELS, [channel for channel in guild.channels
+                                  if not isinstance(channel, discord.CategoryChannel)]),
+            (Structure.THREADS, guild.threads),
+        ]
@@ -1,12 +1,14 @@
 import logging
 from collections import deque
+from itertools import islice
 from typing import Optional, cast
 
 import discord
 from discord.ext import commands, tasks
 
 from bot.cogs.markov.generation_service import MarkovGenerationService
-from bot.cogs.markov.training_service import MarkovTrainingService
+from bot.cogs.markov.training_service import MarkovTrainingService, TRAIN_BATCH
+from bot.db import DatabaseUnavailable
 from bot.utils import Context, requires_database
 from bot.utils.extra_types import GuildContext, GuildMessage
 
@@ -60,8 +62,13 @@ class MarkovCog(commands.Cog):
     @tasks.loop(minutes=1)
     async def train_message_task(self) -> None:
         while self.training_queue:
-            message = self.training_queue.popleft()
-            await self.training_service.train_message(message.guild.id, message.content)
+            batch = [(message.guild.id, message.content) for message in islice(self.training_queue, TRAIN_BATCH)]
+            try:
+                await self.training_service.train_messages(batch)
+            except DatabaseUnavailable:
+                return
+            for _ in batch:
+                self.training_queue.popleft()
 
     async def markov_from_message(self, message: discord.Message) -> bool:
         assert self.bot.user, "bot must be signed in"
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import random
+import sys
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+import inject
+
+from bot.constants import CONFIG
+from bot.db.cogs import MarkovEntity, MarkovRepository
+
+log = logging.getLogger(__name__)
+
+DEFAULT_CONTEXT_SIZE = 8
+
+_CONTEXT_SIZES: Dict[int, int] = {
+    guild.id: guild.cogs.markov.context_size for guild in CONFIG.guilds if guild.cogs.markov
+}
+
+# follows of a context and their cumulative frequencies
+Chain = Tuple[str, array]
+
+
+def get_context_size(guild_id: int) -> int:
+    return _CONTEXT_SIZES.get(guild_id, DEFAULT_CONTEXT_SIZE)
+
+
+class MarkovModel:
+    """
+    markov chain of a guild held in memory
+
+    every context maps to the characters following it and an array of
+    their cumulative frequencies, so the next character is picked by
+    a binary search over the array. Contexts are interned,
+    `size` is an estimate of the memory used by the chains in bytes
+    """
+
+    def __init__(self, context_size: int = DEFAULT_CONTEXT_SIZE) -> None:
+        self.context_size = context_size
+        self.size = 0
+        self._chains: Dict[str, Chain] = {}
+
+    @classmethod
+    def from_entities(cls, entities: Iterable[MarkovEntity], context_size: int = DEFAULT_CONTEXT_SIZE) -> "MarkovModel":
+        model = cls(context_size)
+        follows: Dict[str, List[str]] = {}
+        frequencies: Dict[str, List[int]] = {}
+        for entity in entities:
+            follows.setdefault(entity.context, []).append(entity.follows)
+            frequencies.setdefault(entity.context, []).append(entity.frequency)
+
+        for (context, chars) in follows.items():
+            cumulative, total = array('L'), 0
+            for frequency in frequencies[context]:
+                total += frequency
+                cumulative.append(total)
+            model._add(context, (''.join(chars), cumulative))
+        return model
+
+    def __len__(self) -> int:
+        return len(self._chains)
+
+    def train(self, context: str, follows: str, frequency: int = 1) -> None:
+        if (previous := self._chains.get(context)) is not None:
+            self.size -= self._chain_size(context, previous)
+            chars, cumulative = previous
+        else:
+            context, chars, cumulative = sys.intern(context), '', array('L')
+
+        if (i := chars.find(follows)) == -1:
+            chars += follows
+            cumulative.append((cumulative[-1] if cumulative else 0) + frequency)
+        else:
+            for j in range(i, len(cumulative)):
+                cumulative[j] += frequency
+
+        self._chains[context] = (chars, cumulative)
+        self.size += self._chain_size(context, (chars, cumulative))
+
+    def train_message(self, message: str) -> None:
+        for i in range(len(message)):
+            self.train(message[max(0, i - self.context_size):i], message[i])
+
+    def train_counts(self, counts: Mapping[Tuple[str, str], int]) -> None:
+        for ((context, follows), frequency) in counts.items():
+            self.train(context, follows, frequency)
+
+    def next(self, context: str, rng: random.Random | None = None) -> Optional[str]:
+        if (chain := self._chains.get(context[-self.context_size:])) is None:
+            return None
+        chars, cumulative = chain
+        return chars[bisect_right(cumulative, (rng or random).randrange(cumulative[-1]))]
+
+    def generate(self, start: str = '', limit: int = 4_000, rng: random.Random | None = None) -> str:
+        follows = self.next(start, rng)
+        if not follows:
+            start, follows = '', self.next('', rng)
+
+        parts, length, context = [start], len(start), start[-self.context_size:]
+        while follows is not None and length < limit:
+            parts.append(follows)
+            length += 1
+            context = (context + follows)[-self.context_size:]
+            follows = self.next(context, rng)
+        return ''.join(parts)
+
+    def _add(self, context: str, chain: Chain) -> None:
+        context = sys.intern(context)
+        self._chains[context] = chain
+        self.size += self._chain_size(context, chain)
+
+    @staticmethod
+    def _chain_size(context: str, chain: Chain) -> int:
+        # the dict slot and the tuple are roughly 100 bytes
+        chars, cumulative = chain
+        return sys.getsizeof(context) + sys.getsizeof(chars) + sys.getsizeof(cumulative) + 100
+
+
+class MarkovModels:
+    """
+    models of guilds loaded lazily from `cogs.markov`
+
+    least recently used models are evicted once their size is over
+    `memory_budget` bytes, the last used model is always kept.
+    Trained messages update loaded models and models being loaded,
+    the others see them in the database once they are loaded
+    """
+
+    @inject.autoparams('markov_repository')
+    def __init__(
+        self,
+        markov_repository: MarkovRepository,
+        memory_budget: int = CONFIG.markov_models.memory_mb * 1024 * 1024
+    ) -> None:
+        self.markov_repository = markov_repository
+        self.memory_budget = memory_budget
+        self._models: OrderedDict[int, MarkovModel] = OrderedDict()
+        self._loading: Dict[int, asyncio.Lock] = {}
+        self._pending: Dict[int, List[Mapping[Tuple[str, str], int]]] = {}
+
+    @property
+    def size(self) -> int:
+        return sum(model.size for model in self._models.values())
+
+    async def get(self, guild_id: int) -> MarkovModel:
+        if (model := self._models.get(guild_id)) is not None:
+            self._models.move_to_end(guild_id)
+            return model
+
+        async with self._loading.setdefault(guild_id, asyncio.Lock()):
+            try:
+                if (model := self._models.get(guild_id)) is None:
+                    model = await self._load(guild_id)
+            finally:
+                self._loading.pop(guild_id, None)
+        return model
+
+    async def _load(self, guild_id: int) -> MarkovModel:
+        # counts committed while the chains are read may be in the result already,
+        # counting them twice is better than losing them
+        pending = self._pending[guild_id] = []
+        try:
+            model = MarkovModel.from_entities(await self.markov_repository.find_chains(guild_id),
+                                              get_context_size(guild_id))
+        finally:
+            del self._pending[guild_id]
+        for counts in pending:
+            model.train_counts(counts)
+
+        log.info("loaded markov model of guild %d, %d contexts, %d kB", guild_id, len(model), model.size // 1024)
+        self._models[guild_id] = model
+        self._evict()
+        return model
+
+    def train_counts(self, guild_id: int, counts: Mapping[Tuple[str, str], int]) -> None:
+        if (pending := self._pending.get(guild_id)) is not None:
+            pending.append(counts)
+            return
+        if (model := self._models.get(guild_id)) is None:
+            return
+        model.train_counts(counts)
+        self._evict()
+
+    def evict(self, guild_id: Optional[int] = None) -> None:
+        """forget the model of a guild or all models, they are loaded again when used"""
+        if guild_id is None:
+            self._models.clear()
+        else:
+            self._models.pop(guild_id, None)
+
+    def _evict(self) -> None:
+        while len(self._models) > 1 and self.size > self.memory_budget:
+            guild_id, _model = self._models.popitem(last=False)
+            log.info("evicted markov model of guild %d", guild_id)
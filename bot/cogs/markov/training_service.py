@@ -1,26 +1,46 @@
+import asyncio
 import logging
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
 
 import discord
 import inject
-from discord.utils import get
 
+from bot.cogs.markov.model import MarkovModels, get_context_size
 from bot.constants import CONFIG
-from bot.db import MessageRepository, UnitOfWork
+from bot.db import MessageRepository, UnitOfWork, PoolPartition, use_partition
 from bot.db.cogs import MarkovEntity, MarkovRepository
 from bot.utils.progress import ProgressReporter
 
 log = logging.getLogger(__name__)
 
-DEFAULT_CONTEXT_SIZE = 8
+TRAIN_BATCH = 1_000
+SHARD_SIZE = 10_000
+
+NGrams = Counter[Tuple[str, str]]
 
 
 class MarkovTrainingService:
-    @inject.autoparams('message_repository', 'markov_repository', 'uow')
+    """
+    counts the (context, follows) pairs of batches of messages in memory
+    and merges the counts into `cogs.markov` with a single statement,
+    loaded models are updated once the counts are committed
+
+    a full `train` streams the messages of the guild in shards to a pool
+    of `workers` spawned processes counting them, so the event loop only
+    reads messages and merges counts
+    """
+
+    @inject.autoparams('message_repository', 'markov_repository', 'uow', 'models')
     def __init__(self, message_repository: MessageRepository, markov_repository: MarkovRepository,
-                 uow: UnitOfWork) -> None:
+                 uow: UnitOfWork, models: MarkovModels, workers: int = CONFIG.markov_models.training_workers) -> None:
         self.message_repository = message_repository
         self.markov_repository = markov_repository
         self.uow = uow
+        self.models = models
+        self.workers = workers
 
     @staticmethod
     def should_learn_message(message: discord.Message) -> bool:
@@ -31,7 +51,13 @@ class MarkovTrainingService:
         )
 
     async def train(self, guild_id: int) -> None:
+        with use_partition(PoolPartition.BULK):
+            await self._train(guild_id)
+
+    async def _train(self, guild_id: int) -> None:
         await self.markov_repository.truncate()
+        # the table is truncated for every guild
+        self.models.evict()
 
         progress = ProgressReporter(
             max_count=await self.message_repository.count(),
@@ -39,29 +65,121 @@ class MarkovTrainingService:
             message="markov training progress %d%%"
         )
 
-        log.info("training in guild %d started", guild_id)
-        async with self.uow.transaction(readonly=True) as transaction:
-            paginator = await self.markov_repository.find_training_messages(guild_id, conn=transaction.conn)
-            async for messages in paginator:
-                for message in messages:
-                    await self.train_message(guild_id, message.content)
-                    progress.increment()
+        log.info("training in guild %d started with %d workers", guild_id, self.workers)
+        # forked workers would inherit the sockets and threads of the bot
+        pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+        trainer = _ShardTrainer(self, pool, guild_id, progress)
+        try:
+            async with self.uow.transaction(readonly=True):
+                paginator = await self.markov_repository.find_training_messages(guild_id)
+                shard: List[str] = []
+                try:
+                    async for messages in paginator:
+                        shard.extend(message.content for message in messages)
+                        if len(shard) >= SHARD_SIZE:
+                            await trainer.submit(shard)
+                            shard = []
+                finally:
+                    await paginator.aclose()
+                await trainer.submit(shard)
+            await trainer.join()
+        except BaseException:
+            trainer.cancel()
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        # joining the workers blocks, so it does not run on the event loop
+        await asyncio.to_thread(pool.shutdown)
+        # the model of the guild was not updated by the shards
+        self.models.evict(guild_id)
         log.info("training in guild %d finished", guild_id)
 
     async def train_message(self, guild_id: int, message: str) -> None:
-        context_size = self._get_context_size(guild_id)
-        async with self.uow.transaction() as transaction:
-            for i in range(len(message)):
-                context = message[max(0, i - context_size):i]
-                follows = message[i]
+        await self.train_messages([(guild_id, message)])
+
+    async def merge(self, entities: Iterable[MarkovEntity]) -> None:
+        async with self.uow.transaction():
+            await self.markov_repository.insert_many(entities)
 
-                entity = MarkovEntity(guild_id, context, follows)
-                await self.markov_repository.insert(entity, conn=transaction.conn)
+    async def train_messages(self, messages: Iterable[Tuple[int, str]]) -> None:
+        """train (guild_id, content) pairs of messages"""
+        counts = self.count_ngrams(messages)
+        if not any(counts.values()):
+            return
+
+        await self.merge(
+            MarkovEntity(guild_id, context, follows, frequency)
+            for (guild_id, ngrams) in counts.items()
+            for ((context, follows), frequency) in ngrams.items()
+        )
+        for (guild_id, ngrams) in counts.items():
+            self.models.train_counts(guild_id, ngrams)
 
     @staticmethod
-    def _get_context_size(guild_id: int) -> int:
-        if not (guild_config := get(CONFIG.guilds, id=guild_id)):
-            return DEFAULT_CONTEXT_SIZE
-        if not (markov_config := guild_config.cogs.markov):
-            return DEFAULT_CONTEXT_SIZE
-        return markov_config.context_size
+    def count_ngrams(messages: Iterable[Tuple[int, str]]) -> Dict[int, NGrams]:
+        counts: Dict[int, NGrams] = {}
+        for (guild_id, message) in messages:
+            context_size = get_context_size(guild_id)
+            counts.setdefault(guild_id, Counter()).update(_ngrams(message, context_size))
+        return counts
+
+
+def _ngrams(message: str, context_size: int) -> Iterator[Tuple[str, str]]:
+    return ((message[max(0, i - context_size):i], message[i]) for i in range(len(message)))
+
+
+def _count_shard(guild_id: int, context_size: int, messages: List[str]) -> List[MarkovEntity]:
+    """counts of the n-grams of a shard of messages, runs in a worker process"""
+    ngrams: NGrams = Counter()
+    for message in messages:
+        ngrams.update(_ngrams(message, context_size))
+    return [MarkovEntity(guild_id, context, follows, frequency)
+            for ((context, follows), frequency) in ngrams.items()]
+
+
+class _ShardTrainer:
+    """
+    counts shards of messages in worker processes and merges their counts
+    into the database as they finish, at most two shards per worker are
+    in flight, so reading messages waits for slow workers
+    """
+
+    def __init__(
+        self,
+        service: MarkovTrainingService,
+        pool: ProcessPoolExecutor,
+        guild_id: int,
+        progress: ProgressReporter
+    ) -> None:
+        self.service = service
+        self.pool = pool
+        self.guild_id = guild_id
+        self.context_size = get_context_size(guild_id)
+        self.progress = progress
+        self._pending: Set["asyncio.Future[Tuple[int, List[MarkovEntity]]]"] = set()
+
+    async def submit(self, shard: List[str]) -> None:
+        if not shard:
+            return
+        if len(self._pending) >= 2 * self.service.workers:
+            await self._merge(asyncio.FIRST_COMPLETED)
+        self._pending.add(asyncio.ensure_future(self._count(shard)))
+
+    async def join(self) -> None:
+        while self._pending:
+            await self._merge(asyncio.ALL_COMPLETED)
+
+    def cancel(self) -> None:
+        for future in self._pending:
+            future.cancel()
+        self._pending.clear()
+
+    async def _count(self, shard: List[str]) -> Tuple[int, List[MarkovEntity]]:
+        loop = asyncio.get_running_loop()
+        return len(shard), await loop.run_in_executor(self.pool, _count_shard, self.guild_id, self.context_size, shard)
+
+    async def _merge(self, return_when: str) -> None:
+        done, self._pending = await asyncio.wait(self._pending, return_when=return_when)
+        for future in done:
+            messages, entities = future.result()
+            await self.service.merge(entities)
+            self.progress.increment(messages)
@@ -137,6 +137,52 @@ class ColorConfig(yaml.YAMLObject):
     MUNI_YELLOW: Optional[int] = None
 
 
+@enforce_types
+@dataclass(frozen=True)
+class PoolConfig(yaml.YAMLObject):
+    yaml_tag = u'!pool'
+
+    min_size: int = 2
+    max_size: int = 10
+    command_timeout: int = 1280
+    statement_timeout_ms: int = 0
+
+
+@enforce_types
+@dataclass(frozen=True)
+class DatabaseConfig(yaml.YAMLObject):
+    yaml_tag = u'!database'
+
+    slow_query_ms: int = 500
+    health_check_interval: int = 15
+    interactive: PoolConfig = field(default_factory=PoolConfig)
+    bulk: Optional[PoolConfig] = None
+
+
+@enforce_types
+@dataclass(frozen=True)
+class BackupConfig(yaml.YAMLObject):
+    yaml_tag = u'!backup'
+
+    worker: bool = False
+    lease_seconds: int = 300
+    idle_seconds: int = 60
+    workers: int = 4
+    queue_size: int = 256
+    requests_per_minute: int = 30
+    schedule_seconds: int = 60
+    max_staleness_days: int = 7
+
+
+@enforce_types
+@dataclass(frozen=True)
+class MarkovModelsConfig(yaml.YAMLObject):
+    yaml_tag = u'!markov_models'
+
+    memory_mb: int = 256
+    training_workers: int = 4
+
+
 @enforce_types
 @dataclass(frozen=True)
 class Config(yaml.YAMLObject):
@@ -146,6 +192,9 @@ class Config(yaml.YAMLObject):
     emoji: EmojiConfig
     colors: ColorConfig
     guilds: List[GuildConfig]
+    database: DatabaseConfig = field(default_factory=DatabaseConfig)
+    backup: BackupConfig = field(default_factory=BackupConfig)
+    markov_models: MarkovModelsConfig = field(default_factory=MarkovModelsConfig)
 
 
 T = TypeVar('T', bound=yaml.YAMLObject)
@@ -177,6 +226,10 @@ def get_loader() -> Type[yaml.Loader]:
     loader.add_constructor("!markov", class_loader(MarkovConfig))
     loader.add_constructor("!emojis", class_loader(EmojiConfig))
     loader.add_constructor("!colors", class_loader(ColorConfig))
+    loader.add_constructor("!pool", class_loader(PoolConfig))
+    loader.add_constructor("!database", class_loader(DatabaseConfig))
+    loader.add_constructor("!backup", class_loader(BackupConfig))
+    loader.add_constructor("!markov_models", class_loader(MarkovModelsConfig))
     loader.add_constructor("!Config", class_loader(Config))
     return loader
 
@@ -1,13 +1,10 @@
-import asyncio
 import logging
-import socket
-from typing import Optional
 
-import asyncpg
 import inject
 
 __all__ = [
-    "UnitOfWork", "Url", "Page", "Pool", "Record", "DBConnection",
+    "UnitOfWork", "Url", "Page", "Pool", "Record", "DBConnection", "PoolMetrics", "PoolStats",
+    "QueryMetrics", "QueryStats", "PoolPartition", "PoolPartitions", "use_partition",
 
     "AttachmentMapper", "CategoryMapper", "ChannelMapper", "ThreadMapper", "EmojiMapper",
     "GuildMapper", "MessageMapper", "MessageEmojiMapper", "ReactionMapper",
@@ -18,18 +15,21 @@ __all__ = [
     "RoleRepository", "UserRepository",
 
     "AttachmentEntity", "CategoryEntity", "ChannelEntity", "ThreadEntity", "EmojiEntity",
-    "GuildEntity", "MessageEntity", "MessageEmojiEntity", "ReactionEntity",
+    "GuildEntity", "MessageEntity", "MessageEdit", "MessageEmojiEntity", "ReactionEntity", "ReactionDelta",
     "RoleEntity", "UserEntity",
 
     "CourseRepository", "StudentRepository", "CourseEntity", "StudentEntity", "FacultyRepository", "FacultyEntity",
 
     "LeaderboardRepository", "LoggerRepository", "LeaderboardEntity", "LoggerEntity", "MarkovRepository", "MarkovEntity",
+    "LoggerLeaseRepository", "LoggerLeaseEntity", "ChannelProgress",
+    "LoggerThreadCursorRepository", "LoggerThreadCursorEntity",
     "setup_injections",
-    "connect_db"
+    "connect_db", "create_pool", "DatabaseManager", "DatabaseUnavailable"
 ]
 
 # ---- utils ----
-from bot.db.utils import UnitOfWork, Url, Page, Pool, Record, DBConnection
+from bot.db.utils import UnitOfWork, Url, Page, Pool, Record, DBConnection, PoolMetrics, PoolStats
+from bot.db.utils import QueryMetrics, QueryStats, PoolPartition, PoolPartitions, use_partition, DatabaseUnavailable
 
 # ---- discord ----
 from bot.db.discord import (AttachmentMapper, CategoryMapper, ChannelMapper, EmojiMapper,
@@ -39,7 +39,7 @@ from bot.db.discord import (AttachmentRepository, CategoryRepository, ChannelRep
                             GuildRepository, MessageRepository, MessageEmojiRepository, ReactionRepository,
                             ThreadRepository, RoleRepository, UserRepository)
 from bot.db.discord import (AttachmentEntity, CategoryEntity, ChannelEntity, EmojiEntity,
-                            GuildEntity, MessageEntity, MessageEmojiEntity, ReactionEntity,
+                            GuildEntity, MessageEntity, MessageEdit, MessageEmojiEntity, ReactionEntity, ReactionDelta,
                             ThreadEntity, RoleEntity, UserEntity)
 from bot.db.discord import setup_injections as setup_discord_injections
 
@@ -49,10 +49,14 @@ from bot.db.muni import (CourseEntity, StudentEntity, FacultyEntity)
 from bot.db.muni import setup_injections as setup_muni_injections
 
 # ---- cogs ----
-from bot.db.cogs import (LeaderboardRepository, LoggerRepository, MarkovRepository)
-from bot.db.cogs import (LeaderboardEntity, LoggerEntity, MarkovEntity)
+from bot.db.cogs import (LeaderboardRepository, LoggerRepository, LoggerLeaseRepository, LoggerThreadCursorRepository,
+                         MarkovRepository)
+from bot.db.cogs import (LeaderboardEntity, LoggerEntity, LoggerLeaseEntity, LoggerThreadCursorEntity, MarkovEntity,
+                         ChannelProgress)
 from bot.db.cogs import setup_injections as setup_cogs_injections
 
+from bot.db.manager import DatabaseManager, connect_db, create_pool
+
 log = logging.getLogger(__name__)
 
 
@@ -62,21 +66,3 @@ def setup_injections(binder: inject.Binder) -> None:
     binder.install(setup_cogs_injections)
 
     binder.bind_to_constructor(UnitOfWork, UnitOfWork)
-
-
-async def connect_db(url: Url) -> Optional[Pool]:
-    pool: Pool | None = None
-    attempts = 0
-    while pool is None:
-        try:
-            pool = await asyncpg.create_pool(url, command_timeout=1280)
-        except (socket.gaierror, OSError) as ex:
-            log.error("Failed to connect to database: %s", ex)
-            return None
-
-        await asyncio.sleep(1)
-
-        attempts += 1
-        if attempts > 1_000:
-            raise TimeoutError("tried to connect over 1000 times")
-    return pool
@@ -2,17 +2,20 @@ import inject
 
 __all__ = [
     'LeaderboardRepository', 'LeaderboardEntity',
-    'LoggerRepository', 'LoggerEntity',
+    'LoggerRepository', 'LoggerEntity', 'LoggerLeaseRepository', 'LoggerLeaseEntity', 'ChannelProgress',
+    'LoggerThreadCursorRepository', 'LoggerThreadCursorEntity',
     'MarkovRepository', 'MarkovEntity',
     'setup_injections'
 ]
 
 from .leaderboard import LeaderboardRepository, LeaderboardEntity
-from .logger import LoggerRepository, LoggerEntity
+from .logger import LoggerRepository, LoggerEntity, LoggerLeaseRepository, LoggerLeaseEntity, ChannelProgress
+from .logger import LoggerThreadCursorRepository, LoggerThreadCursorEntity
 from .markov import MarkovRepository, MarkovEntity
 
-REPOSITORIES = (LeaderboardRepository, LoggerRepository, MarkovRepository)
-ENTITIES = (LeaderboardEntity, LoggerEntity, MarkovEntity)
+REPOSITORIES = (LeaderboardRepository, LoggerRepository, LoggerLeaseRepository, LoggerThreadCursorRepository,
+                MarkovRepository)
+ENTITIES = (LeaderboardEntity, LoggerEntity, LoggerLeaseEntity, LoggerThreadCursorEntity, MarkovEntity)
 
 
 
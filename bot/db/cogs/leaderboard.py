@@ -16,7 +16,7 @@ class LeaderboardFilter:
     exclude_channel_ids: List[Id]
 
 
-@dataclass
+@dataclass(slots=True)
 class LeaderboardEntity(Entity):
     __table_name__ = "cogs.leaderboard"
 
@@ -77,7 +77,7 @@ class LeaderboardRepository(Table[LeaderboardEntity]):
     @inject_conn
     async def get_top10(self, conn: DBConnection) -> List[LeaderboardEntity]:
         rows = await conn.fetch(f"SELECT * FROM ldb_lookup LIMIT 10")
-        return [LeaderboardEntity.convert(row) for row in rows]
+        return LeaderboardEntity.convert_many(rows)
 
     @inject_conn
     async def get_around(self, conn: DBConnection, id: Id) -> List[LeaderboardEntity]:
@@ -105,4 +105,4 @@ class LeaderboardRepository(Table[LeaderboardEntity]):
                       author_id <> $1 LIMIT 2
             ) ORDER BY sent_total DESC
         """, id)
-        return [LeaderboardEntity.convert(row) for row in rows]
+        return LeaderboardEntity.convert_many(rows)
@@ -1,15 +1,18 @@
 from dataclasses import dataclass
-from datetime import datetime
-from typing import Optional, Tuple, NamedTuple, List
+from datetime import datetime, timedelta
+from typing import Iterable, Optional, Tuple, NamedTuple, List
 
 from bot.db.utils import Id, Entity, Table, DBConnection, inject_conn
 
 __all__ = [
-    'LoggerEntity', 'LoggerRepository'
+    'LoggerEntity', 'LoggerRepository', 'LoggerLeaseEntity', 'LoggerLeaseRepository', 'ChannelProgress',
+    'LoggerThreadCursorEntity', 'LoggerThreadCursorRepository'
 ]
 
+MAX_LEASE_ATTEMPTS = 5
 
-@dataclass
+
+@dataclass(slots=True)
 class LoggerEntity(Entity):
     __table_name__ = "cogs.logger"
 
@@ -19,6 +22,12 @@ class LoggerEntity(Entity):
     finished_at: Optional[datetime] = None
 
 
+class ChannelProgress(NamedTuple):
+    channel_id: Id
+    to_date: Optional[datetime]
+    has_gap: bool
+
+
 class LoggerRepository(Table[LoggerEntity]):
     def __init__(self) -> None:
         super().__init__(entity=LoggerEntity)
@@ -40,6 +49,15 @@ class LoggerRepository(Table[LoggerEntity]):
             WHERE channel_id=$1 AND from_date=$2
         """, channel_id, from_date, to_date)
 
+    @inject_conn
+    async def checkpoint_process(self, conn: DBConnection, data: Tuple[Id, datetime, datetime]) -> None:
+        channel_id, from_date, to_date = data
+        await conn.execute(f"""
+            UPDATE cogs.logger
+            SET to_date=$3
+            WHERE channel_id=$1 AND from_date=$2 AND finished_at IS NULL
+        """, channel_id, from_date, to_date)
+
     @inject_conn
     async def insert_process(self, conn: DBConnection, data: Tuple[Id, datetime, datetime]) -> None:
         channel_id, from_date, to_date = data
@@ -48,16 +66,73 @@ class LoggerRepository(Table[LoggerEntity]):
                ON CONFLICT (channel_id, from_date) DO NOTHING
            """, channel_id, from_date, to_date)
 
+    @inject_conn
+    async def cover_many(self, conn: DBConnection, data: Iterable[Tuple[Id, datetime, datetime]]) -> None:
+        """
+        store windows of messages seen live by the bot as finished processes,
+        a window started earlier is extended up to the new `to_date`
+        """
+        rows = list(data)
+        if not rows:
+            return
+
+        channel_ids, from_dates, to_dates = zip(*rows)
+        await conn.execute(f"""
+            INSERT INTO cogs.logger AS l (channel_id, from_date, to_date, finished_at)
+            SELECT channel_id, from_date, to_date, NOW()
+            FROM unnest($1::bigint[], $2::timestamptz[], $3::timestamptz[]) AS t(channel_id, from_date, to_date)
+            ON CONFLICT (channel_id, from_date) DO UPDATE
+                SET to_date=excluded.to_date,
+                    finished_at=NOW()
+                WHERE l.to_date < excluded.to_date
+        """, list(channel_ids), list(from_dates), list(to_dates))
+
     @inject_conn
     async def find_last_process(self, conn: DBConnection, channel_id: Id) -> Optional[LoggerEntity]:
+        """
+        unfinished process of the channel or the finished process
+        its first gap in the coverage starts after
+        """
+        row = await conn.fetchrow(f"""
+            SELECT *
+            FROM cogs.logger AS l
+            WHERE l.channel_id=$1 AND (
+                l.finished_at IS NULL OR
+                NOT EXISTS (
+                    SELECT 1
+                    FROM cogs.logger AS n
+                    WHERE n.channel_id=l.channel_id AND
+                          n.from_date <= l.to_date AND
+                          n.to_date > l.to_date
+                )
+            )
+            ORDER BY l.finished_at IS NULL DESC, l.to_date ASC
+            LIMIT 1
+        """, channel_id)
+        return LoggerEntity.convert(row) if row else None
+
+    @inject_conn
+    async def find_first_process(self, conn: DBConnection, channel_id: Id) -> Optional[LoggerEntity]:
         row = await conn.fetchrow(f"""
-            SELECT * 
+            SELECT *
             FROM cogs.logger
             WHERE channel_id=$1
-            ORDER BY to_date DESC
+            ORDER BY from_date ASC
+            LIMIT 1
         """, channel_id)
         return LoggerEntity.convert(row) if row else None
 
+    @inject_conn
+    async def find_next_process(self, conn: DBConnection, channel_id: Id, after: datetime) -> Optional[LoggerEntity]:
+        row = await conn.fetchrow(f"""
+            SELECT *
+            FROM cogs.logger
+            WHERE channel_id=$1 AND from_date > $2
+            ORDER BY from_date ASC
+            LIMIT 1
+        """, channel_id, after)
+        return LoggerEntity.convert(row) if row else None
+
     UpdatableProcesses = NamedTuple('UpdatableProcesses', [('channel_id', Id), ('to_date', datetime)])
 
     @inject_conn
@@ -65,13 +140,215 @@ class LoggerRepository(Table[LoggerEntity]):
         rows = await conn.fetch(f"""
             SELECT channel_id, to_date
             FROM (
-                SELECT channel_id, MAX(to_date) as to_date
-                FROM cogs.logger
-                GROUP BY channel_id
+                SELECT DISTINCT ON (l.channel_id)
+                    l.channel_id,
+                    l.to_date,
+                    EXISTS (
+                        SELECT 1
+                        FROM cogs.logger AS n
+                        WHERE n.channel_id=l.channel_id AND n.from_date > l.to_date
+                    ) AS has_gap
+                FROM cogs.logger AS l
+                WHERE l.to_date IS NOT NULL AND NOT EXISTS (
+                    SELECT 1
+                    FROM cogs.logger AS n
+                    WHERE n.channel_id=l.channel_id AND
+                          n.from_date <= l.to_date AND
+                          n.to_date > l.to_date
+                )
+                ORDER BY l.channel_id, l.to_date ASC
             ) t
             INNER JOIN server.channels as c 
                 ON c.id = t.channel_id
-            WHERE t.to_date + interval '7 days' < now() AND
+            WHERE (t.to_date + interval '7 days' < now() OR t.has_gap) AND
                   c.deleted_at IS NULL
         """)
-        return [self.UpdatableProcesses(*row.values()) for row in rows]
+        return [self.UpdatableProcesses(row['channel_id'], row['to_date']) for row in rows]
+
+    @inject_conn
+    async def find_channel_progress(self, conn: DBConnection) -> List[ChannelProgress]:
+        """
+        end of the first gap in the coverage of every stored channel,
+        `to_date` is None for channels which were never backed up
+        """
+        rows = await conn.fetch(f"""
+            SELECT c.id AS channel_id, t.to_date, coalesce(t.has_gap, FALSE) AS has_gap
+            FROM server.channels AS c
+            LEFT JOIN (
+                SELECT DISTINCT ON (l.channel_id)
+                    l.channel_id,
+                    l.to_date,
+                    EXISTS (
+                        SELECT 1
+                        FROM cogs.logger AS n
+                        WHERE n.channel_id=l.channel_id AND n.from_date > l.to_date
+                    ) AS has_gap
+                FROM cogs.logger AS l
+                WHERE l.to_date IS NOT NULL AND NOT EXISTS (
+                    SELECT 1
+                    FROM cogs.logger AS n
+                    WHERE n.channel_id=l.channel_id AND
+                          n.from_date <= l.to_date AND
+                          n.to_date > l.to_date
+                )
+                ORDER BY l.channel_id, l.to_date ASC
+            ) t
+                ON t.channel_id = c.id
+            WHERE c.deleted_at IS NULL
+        """)
+        return [ChannelProgress(row['channel_id'], row['to_date'], row['has_gap']) for row in rows]
+
+
+@dataclass(slots=True)
+class LoggerLeaseEntity(Entity):
+    __table_name__ = "cogs.logger_leases"
+
+    channel_id: Id
+    worker_id: Optional[str] = None
+    leased_until: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None
+    attempts: int = 0
+    created_at: Optional[datetime] = None
+    priority: float = 0.0
+
+
+class LoggerLeaseRepository(Table[LoggerLeaseEntity]):
+    """
+    channel backup jobs shared by backup workers
+
+    a job is leased by one worker at a time, the lease has to be renewed by
+    `heartbeat` before it expires, otherwise another worker claims the job.
+    The progress itself is stored in `cogs.logger`, the lease only says who works on it
+
+    finished jobs are released, unfinished ones are returned to the queue
+    by `unlease` or when their lease expires, so `attempts` counts the claims
+    which never finished. Jobs claimed `MAX_LEASE_ATTEMPTS` times are claimed only after
+    all other jobs, a channel failing every time cannot block the queue
+    """
+
+    def __init__(self) -> None:
+        super().__init__(entity=LoggerLeaseEntity)
+
+    @inject_conn
+    async def enqueue(
+        self,
+        conn: DBConnection,
+        channel_ids: Iterable[Id],
+        priorities: Optional[Iterable[float]] = None
+    ) -> None:
+        """add jobs, jobs with a higher priority are claimed first"""
+        channel_ids = list(channel_ids)
+        priorities = list(priorities) if priorities is not None else [0.0] * len(channel_ids)
+        await conn.execute("""
+            INSERT INTO cogs.logger_leases AS l (channel_id, priority)
+            SELECT * FROM unnest($1::bigint[], $2::float8[])
+            ON CONFLICT (channel_id) DO UPDATE
+                SET priority=GREATEST(l.priority, excluded.priority)
+        """, channel_ids, priorities)
+
+    @inject_conn
+    async def claim(
+        self,
+        conn: DBConnection,
+        worker_id: str,
+        lease: timedelta,
+        limit: int = 1,
+        max_attempts: int = MAX_LEASE_ATTEMPTS
+    ) -> List[Id]:
+        rows = await conn.fetch("""
+            WITH claimable AS (
+                SELECT channel_id
+                FROM cogs.logger_leases
+                WHERE leased_until IS NULL OR leased_until < NOW()
+                ORDER BY attempts >= $4, priority DESC, leased_until ASC NULLS FIRST, created_at ASC
+                LIMIT $3
+                FOR UPDATE SKIP LOCKED
+            )
+            UPDATE cogs.logger_leases AS l
+            SET worker_id=$1,
+                leased_until=NOW() + $2::interval,
+                heartbeat_at=NOW(),
+                attempts=l.attempts + 1
+            FROM claimable AS c
+            WHERE l.channel_id=c.channel_id
+            RETURNING l.channel_id
+        """, worker_id, lease, limit, max_attempts)
+        return [row['channel_id'] for row in rows]
+
+    @inject_conn
+    async def heartbeat(self, conn: DBConnection, worker_id: str, channel_ids: Iterable[Id], lease: timedelta) -> List[Id]:
+        """renew the leases, returns the channels that are still leased by the worker"""
+        rows = await conn.fetch("""
+            UPDATE cogs.logger_leases
+            SET leased_until=NOW() + $3::interval,
+                heartbeat_at=NOW()
+            WHERE worker_id=$1 AND channel_id = ANY($2::bigint[]) AND leased_until >= NOW()
+            RETURNING channel_id
+        """, worker_id, list(channel_ids), lease)
+        return [row['channel_id'] for row in rows]
+
+    @inject_conn
+    async def release(self, conn: DBConnection, worker_id: str, channel_id: Id) -> None:
+        """remove the finished job"""
+        await conn.execute("""
+            DELETE FROM cogs.logger_leases
+            WHERE channel_id=$2 AND worker_id=$1
+        """, worker_id, channel_id)
+
+    @inject_conn
+    async def unlease(
+        self,
+        conn: DBConnection,
+        worker_id: str,
+        channel_ids: Iterable[Id],
+        attempted: bool = True
+    ) -> None:
+        """
+        return unfinished jobs to the queue, they keep their priority and attempts,
+        jobs which were not `attempted` do not count the claim as an attempt
+        """
+        await conn.execute("""
+            UPDATE cogs.logger_leases
+            SET worker_id=NULL,
+                leased_until=NULL,
+                attempts=CASE WHEN $3 THEN attempts ELSE attempts - 1 END
+            WHERE worker_id=$1 AND channel_id = ANY($2::bigint[])
+        """, worker_id, list(channel_ids), attempted)
+
+
+@dataclass(slots=True)
+class LoggerThreadCursorEntity(Entity):
+    __table_name__ = "cogs.logger_thread_cursors"
+
+    channel_id: Id
+    archived_until: datetime
+    updated_at: Optional[datetime] = None
+
+
+class LoggerThreadCursorRepository(Table[LoggerThreadCursorEntity]):
+    """
+    newest archive timestamp of the archived threads of a channel already backed up,
+    archived threads are listed newest first, so the listing stops at the cursor
+    """
+
+    def __init__(self) -> None:
+        super().__init__(entity=LoggerThreadCursorEntity)
+
+    @inject_conn
+    async def find_cursor(self, conn: DBConnection, channel_id: Id) -> Optional[datetime]:
+        row = await conn.fetchrow("""
+            SELECT archived_until
+            FROM cogs.logger_thread_cursors
+            WHERE channel_id=$1
+        """, channel_id)
+        return row['archived_until'] if row else None
+
+    @inject_conn
+    async def advance(self, conn: DBConnection, channel_id: Id, archived_until: datetime) -> None:
+        await conn.execute("""
+            INSERT INTO cogs.logger_thread_cursors AS c (channel_id, archived_until)
+            VALUES ($1, $2)
+            ON CONFLICT (channel_id) DO UPDATE
+                SET archived_until=GREATEST(c.archived_until, excluded.archived_until),
+                    updated_at=NOW()
+        """, channel_id, archived_until)
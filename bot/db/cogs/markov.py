@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import NamedTuple, List
+from typing import Iterable, NamedTuple, List
 
 from bot.db.discord.messages import MessageEntity
 from bot.db.utils import Id, Entity, Table, DBConnection, inject_conn, Page
@@ -9,7 +9,7 @@ __all__ = [
 ]
 
 
-@dataclass
+@dataclass(slots=True)
 class MarkovEntity(Entity):
     __table_name__ = "cogs.markov"
 
@@ -32,6 +32,22 @@ class MarkovRepository(Table[MarkovEntity]):
                 SET frequency = m.frequency + 1
         """, data.guild_id, data.context, data.follows, data.frequency)
 
+    @inject_conn
+    async def insert_many(self, conn: DBConnection, data: Iterable[MarkovEntity]) -> None:
+        """add frequencies of the entities, every (guild_id, context, follows) may be given only once"""
+        await self._copy_merge(
+            conn, "cogs.markov",
+            ('guild_id', 'context', 'follows', 'frequency'),
+            [(m.guild_id, m.context, m.follows, m.frequency) for m in data],
+            """
+            INSERT INTO cogs.markov AS m (guild_id, context, follows, frequency)
+            SELECT guild_id, context, follows, frequency
+            FROM staging
+            ON CONFLICT (guild_id, context, follows) DO UPDATE
+                SET frequency = m.frequency + excluded.frequency
+            """
+        )
+
     Next = NamedTuple('Next', [('follows', str), ('frequency', int)])
 
     @inject_conn
@@ -44,6 +60,17 @@ class MarkovRepository(Table[MarkovEntity]):
         """, guild_id, context)
         return [self.Next(*row.values()) for row in rows]
 
+    @inject_conn
+    async def find_chains(self, conn: DBConnection, guild_id: Id) -> List[MarkovEntity]:
+        """every context of the guild with its follows, sorted by context"""
+        rows = await conn.fetch("""
+            SELECT guild_id, context, follows, frequency
+            FROM cogs.markov
+            WHERE guild_id = $1
+            ORDER BY context
+        """, guild_id)
+        return [MarkovEntity(*row.values()) for row in rows]
+
     @inject_conn
     async def truncate(self, conn: DBConnection) -> None:
         await conn.execute("""
@@ -61,4 +88,4 @@ class MarkovRepository(Table[MarkovEntity]):
                   NOT m.is_command AND
                   NOT u.is_bot
         """, guild_id)
-        return Page[MessageEntity](cursor, MessageEntity)
+        return Page[MessageEntity](cursor, MessageEntity, prefetch=True)
@@ -8,8 +8,8 @@ __all__ = [
     "EmojiRepository", "EmojiMapper", "EmojiEntity",
     "GuildRepository", "GuildMapper", "GuildEntity",
     "MessageEmojiRepository", "MessageEmojiMapper", "MessageEmojiEntity",
-    "MessageRepository", "MessageMapper", "MessageEntity",
-    "ReactionRepository", "ReactionMapper", "ReactionEntity",
+    "MessageRepository", "MessageMapper", "MessageEntity", "MessageEdit",
+    "ReactionRepository", "ReactionMapper", "ReactionEntity", "ReactionDelta",
     "RoleRepository", "RoleMapper", "RoleEntity",
     "UserRepository", "UserMapper", "UserEntity",
     "setup_injections"
@@ -22,8 +22,8 @@ from bot.db.discord.threads import ThreadRepository, ThreadMapper, ThreadEntity
 from bot.db.discord.emojis import EmojiRepository, EmojiMapper, EmojiEntity
 from bot.db.discord.guilds import GuildRepository, GuildMapper, GuildEntity
 from bot.db.discord.message_emojis import MessageEmojiRepository, MessageEmojiMapper, MessageEmojiEntity
-from bot.db.discord.messages import MessageRepository, MessageMapper, MessageEntity
-from bot.db.discord.reactions import ReactionRepository, ReactionMapper, ReactionEntity
+from bot.db.discord.messages import MessageRepository, MessageMapper, MessageEntity, MessageEdit
+from bot.db.discord.reactions import ReactionRepository, ReactionMapper, ReactionEntity, ReactionDelta
 from bot.db.discord.roles import RoleRepository, RoleMapper, RoleEntity
 from bot.db.discord.users import UserRepository, UserMapper, UserEntity
 
@@ -1,11 +1,11 @@
 from dataclasses import dataclass
-from typing import Optional
+from typing import Iterable, Optional
 
 from bot.db.utils import Entity, Mapper, Id, Crud, inject_conn, DBConnection
 from bot.utils import MessageAttachment
 
 
-@dataclass
+@dataclass(slots=True)
 class AttachmentEntity(Entity):
     __table_name__ = "server.attachment"
 
@@ -37,6 +37,25 @@ class AttachmentRepository(Crud[AttachmentEntity]):
                         a.url<>excluded.url
         """, data.message_id, data.id, data.filename, data.url)
 
+    @inject_conn
+    async def insert_many(self, conn: DBConnection, data: Iterable[AttachmentEntity]) -> None:
+        attachments = {attachment.id: attachment for attachment in data}
+        await self._copy_merge(
+            conn, "server.attachments",
+            ('message_id', 'id', 'filename', 'url'),
+            [(a.message_id, a.id, a.filename, a.url) for a in attachments.values()],
+            """
+            INSERT INTO server.attachments AS a (message_id, id, filename, url)
+            SELECT message_id, id, filename, url
+            FROM staging
+            ON CONFLICT (id) DO UPDATE
+                SET filename=excluded.filename,
+                    url=excluded.url
+                WHERE a.filename<>excluded.filename OR
+                        a.url<>excluded.url
+            """
+        )
+
     @inject_conn
     async def soft_delete(self, conn: DBConnection, id: Id) -> None:
         # TODO: soft_delete not implemented
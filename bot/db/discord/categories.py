@@ -7,7 +7,7 @@ from discord import CategoryChannel
 from bot.db.utils import Crud, DBConnection, Id, Mapper, inject_conn, Entity
 
 
-@dataclass
+@dataclass(slots=True)
 class CategoryEntity(Entity):
     __table_name__ = "server.category"
 
@@ -1,7 +1,7 @@
 import enum
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Iterable, Optional
 
 import discord
 from discord.abc import GuildChannel
@@ -14,7 +14,7 @@ class ChannelType(enum.Enum):
     FORUM = "forum"
 
 
-@dataclass
+@dataclass(slots=True)
 class ChannelEntity(Entity):
     __table_name__ = "server.channels"
 
@@ -66,3 +66,13 @@ class ChannelRepository(Crud[ChannelEntity]):
                 WHERE ch.name<>excluded.name OR
                       ch.created_at<>excluded.created_at
         """, data.guild_id, data.category_id, data.id, data.name, data.type.value, data.created_at)
+
+    @inject_conn
+    async def find_guild_ids(self, conn: DBConnection, ids: Iterable[Id]) -> Dict[Id, Id]:
+        """guild of each stored channel"""
+        rows = await conn.fetch("""
+            SELECT id, guild_id
+            FROM server.channels
+            WHERE id = ANY($1::bigint[])
+        """, list(ids))
+        return {row['id']: row['guild_id'] for row in rows}
@@ -9,7 +9,7 @@ from bot.db.utils import Crud, DBConnection, Id, Mapper, Url, inject_conn, Entit
 from bot.utils import AnyEmote, get_emoji_id
 
 
-@dataclass
+@dataclass(slots=True)
 class EmojiEntity(Entity):
     __table_name__ = "server.emojis"
 
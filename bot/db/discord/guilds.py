@@ -7,7 +7,7 @@ from discord import Guild
 from bot.db.utils import Crud, DBConnection, Id, Mapper, Url, inject_conn, Entity
 
 
-@dataclass
+@dataclass(slots=True)
 class GuildEntity(Entity):
     __table_name__ = "server.guilds"
 
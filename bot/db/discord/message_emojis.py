@@ -1,19 +1,15 @@
-from collections import Counter
 from dataclasses import dataclass
-import re
-from typing import Tuple
+from typing import Dict, Iterable, Tuple
 
 from discord import Message
-from discord.ext import commands
 
 import inject
-from emoji import emoji_list
 
 from bot.db.utils import Entity, Mapper, Id, Crud, inject_conn, DBConnection
-from bot.utils import Context, get_emoji_id, convert_emoji, AnyEmote, MessageEmote
+from bot.utils import get_emoji_id, EmojiExtractor, MessageEmote
 
 
-@dataclass
+@dataclass(slots=True)
 class MessageEmojiEntity(Entity):
     __table_name__ = "server.message_emoji"
 
@@ -23,20 +19,18 @@ class MessageEmojiEntity(Entity):
 
 
 class MessageEmojiMapper(Mapper[MessageEmote, Tuple[MessageEmojiEntity, ...]]):
-    @inject.autoparams('bot')
-    async def map(self, obj: MessageEmote, bot: commands.Bot) -> MessageEmojiEntity:
+    @inject.autoparams('extractor')
+    def __init__(self, extractor: EmojiExtractor) -> None:
+        self.extractor = extractor
+
+    async def map(self, obj: MessageEmote) -> MessageEmojiEntity:
         message, emoji = obj.message, obj.emoji
-        return MessageEmojiEntity(message.id, get_emoji_id(emoji), 1)
+        return MessageEmojiEntity(message.id, get_emoji_id(emoji), obj.count)
 
-    @staticmethod
-    async def map_emojis(bot: commands.Bot, obj: Message) -> Tuple[MessageEmote, ...]:
+    def map_emojis(self, obj: Message) -> Tuple[MessageEmote, ...]:
         message = obj
-        ctx = await bot.get_context(message, cls=Context)
-
-        unicode_emojis = [item['emoji'] for item in emoji_list(message.content)]
-        discord_emojis = [await convert_emoji(ctx, emoji) for emoji in re.findall(r"<a?:\w+:\d+>", message.content)]
-
-        return tuple(MessageEmote(message, emoji) for emoji in unicode_emojis + discord_emojis)
+        return tuple(MessageEmote(message, emoji, count)
+                     for (emoji, count) in self.extractor.extract(message.content).items())
 
 
 class MessageEmojiRepository(Crud[MessageEmojiEntity]):
@@ -49,9 +43,29 @@ class MessageEmojiRepository(Crud[MessageEmojiEntity]):
             INSERT INTO server.message_emoji AS em (message_id, emoji_id, count)
             VALUES ($1, $2, $3)
             ON CONFLICT (message_id, emoji_id) DO UPDATE
-                SET count = em.count + $3
+                SET count = $3
         """, data.message_id, data.emoji_id, data.count)
 
+    @inject_conn
+    async def insert_many(self, conn: DBConnection, data: Iterable[MessageEmojiEntity]) -> None:
+        # counts are complete per message, the last one of a message wins
+        counts: Dict[Tuple[Id, Id], int] = {}
+        for entity in data:
+            counts[(entity.message_id, entity.emoji_id)] = entity.count
+
+        await self._copy_merge(
+            conn, "server.message_emoji",
+            ('message_id', 'emoji_id', 'count'),
+            [(message_id, emoji_id, count) for ((message_id, emoji_id), count) in counts.items()],
+            """
+            INSERT INTO server.message_emoji AS em (message_id, emoji_id, count)
+            SELECT message_id, emoji_id, count
+            FROM staging
+            ON CONFLICT (message_id, emoji_id) DO UPDATE
+                SET count = excluded.count
+            """
+        )
+
     @inject_conn
     async def soft_delete(self, conn: DBConnection, id: Id) -> None:
         # TODO: soft_delete not implemented
@@ -1,7 +1,7 @@
 import logging
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional, cast, Tuple
+from typing import Iterable, Optional, cast, Tuple
 
 import discord
 from discord import Message
@@ -12,7 +12,7 @@ log = logging.getLogger(__name__)
 BOT_PREFIXES = ('!', 'pls', '.')
 
 
-@dataclass
+@dataclass(slots=True)
 class MessageEntity(Entity):
     __table_name__ = "server.messages"
 
@@ -27,6 +27,13 @@ class MessageEntity(Entity):
     deleted_at: Optional[datetime] = None
 
 
+@dataclass(frozen=True, slots=True)
+class MessageEdit:
+    """new content of a message that is not in the cache of the bot"""
+    id: Id
+    content: str
+
+
 class MessageMapper(Mapper[Message, MessageEntity]):
     async def map(self, obj: Message) -> MessageEntity:
         message = obj
@@ -68,6 +75,43 @@ class MessageRepository(Crud[MessageEntity]):
                       m.edited_at<>excluded.edited_at
         """, data.channel_id, data.thread_id, data.author_id, data.id, data.content, data.is_command, data.created_at)
 
+    @inject_conn
+    async def insert_many(self, conn: DBConnection, data: Iterable[MessageEntity]) -> None:
+        messages = {message.id: message for message in data}
+        await self._copy_merge(
+            conn, "server.messages",
+            ('channel_id', 'thread_id', 'author_id', 'id', 'content', 'is_command', 'created_at'),
+            [(m.channel_id, m.thread_id, m.author_id, m.id, m.content, m.is_command, m.created_at)
+             for m in messages.values()],
+            """
+            INSERT INTO server.messages AS m (channel_id, thread_id, author_id, id, content, is_command, created_at)
+            SELECT channel_id, thread_id, author_id, id, content, is_command, created_at
+            FROM staging
+            ON CONFLICT (id) DO UPDATE
+                SET content=excluded.content,
+                    is_command=excluded.is_command,
+                    created_at=excluded.created_at,
+                    edited_at=NOW()
+                WHERE m.content<>excluded.content OR
+                      m.is_command<>excluded.is_command OR
+                      m.created_at<>excluded.created_at OR
+                      m.edited_at<>excluded.edited_at
+            """
+        )
+
+    @inject_conn
+    async def edit_many(self, conn: DBConnection, data: Iterable[MessageEdit]) -> None:
+        """update content of stored messages, unknown messages are skipped"""
+        edits = {edit.id: edit.content.replace('\x00', '') for edit in data}
+        await conn.execute("""
+            UPDATE server.messages AS m
+            SET content=e.content,
+                is_command=e.is_command,
+                edited_at=NOW()
+            FROM unnest($1::bigint[], $2::text[], $3::bool[]) AS e(id, content, is_command)
+            WHERE m.id=e.id AND m.content<>e.content
+        """, list(edits.keys()), list(edits.values()), [content.startswith(BOT_PREFIXES) for content in edits.values()])
+
     @inject_conn
     async def count(self, conn: DBConnection) -> int:
         row = await conn.fetchrow("""
@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from discord import Reaction
 
@@ -8,7 +8,7 @@ from bot.db.utils import Crud, DBConnection, Id, Mapper, inject_conn, Entity
 from bot.utils import get_emoji_id
 
 
-@dataclass
+@dataclass(slots=True)
 class ReactionEntity(Entity):
     __table_name__ = "server.reactions"
 
@@ -20,14 +20,28 @@ class ReactionEntity(Entity):
     deleted_at: Optional[datetime] = None
 
 
+@dataclass(frozen=True, slots=True)
+class ReactionDelta:
+    """a user added (or removed) their reaction to a message"""
+    message_id: Id
+    emoji_id: Id
+    user_id: Id
+    added: bool
+
+
 class ReactionMapper(Mapper[Reaction, ReactionEntity]):
     async def map(self, obj: Reaction) -> ReactionEntity:
         reaction = obj
-        user_ids = [user.id async for user in reaction.users()]
+        user_ids = await self.map_user_ids(reaction)
         emoji_id = get_emoji_id(reaction.emoji)
         created_at = reaction.message.created_at.replace(tzinfo=None)
         return ReactionEntity(reaction.message.id, emoji_id, user_ids, created_at)
 
+    @staticmethod
+    async def map_user_ids(reaction: Reaction) -> List[Id]:
+        """pages through the users of the reaction, one API call per 100 users"""
+        return [user.id async for user in reaction.users()]
+
 
 class ReactionRepository(Crud[ReactionEntity]):
     def __init__(self) -> None:
@@ -46,6 +60,99 @@ class ReactionRepository(Crud[ReactionEntity]):
                       r.created_at<>excluded.created_at
         """, data.message_id, data.emoji_id, data.user_ids, data.created_at)
 
+    @inject_conn
+    async def insert_many(self, conn: DBConnection, data: Iterable[ReactionEntity]) -> None:
+        reactions = {(reaction.message_id, reaction.emoji_id): reaction for reaction in data}
+        await self._copy_merge(
+            conn, "server.reactions",
+            ('message_id', 'emoji_id', 'member_ids', 'created_at'),
+            [(r.message_id, r.emoji_id, r.user_ids, r.created_at) for r in reactions.values()],
+            """
+            INSERT INTO server.reactions AS r (message_id, emoji_id, member_ids, created_at)
+            SELECT message_id, emoji_id, member_ids, created_at
+            FROM staging
+            ON CONFLICT (message_id, emoji_id) DO UPDATE
+                SET member_ids=excluded.member_ids,
+                    created_at=excluded.created_at,
+                    edited_at=NOW()
+                WHERE r.member_ids<>excluded.member_ids OR
+                      r.created_at<>excluded.created_at
+            """
+        )
+
+    @inject_conn
+    async def find_members_from(
+        self,
+        conn: DBConnection,
+        channel_id: Id,
+        message_id: Id,
+        limit: int
+    ) -> List[Tuple[Id, Id, List[Id]]]:
+        """
+        members of stored reactions to messages of the channel (or thread)
+        starting at `message_id`, ordered by the message
+        """
+        rows = await conn.fetch("""
+            SELECT r.message_id, r.emoji_id, r.member_ids
+            FROM server.messages AS m
+            INNER JOIN server.reactions AS r ON r.message_id = m.id
+            WHERE (m.channel_id=$1 OR m.thread_id=$1) AND
+                  m.id >= $2 AND
+                  r.deleted_at IS NULL
+            ORDER BY m.id
+            LIMIT $3
+        """, channel_id, message_id, limit)
+        return [(row['message_id'], row['emoji_id'], row['member_ids']) for row in rows]
+
+    @inject_conn
+    async def apply_deltas(self, conn: DBConnection, data: Iterable[ReactionDelta]) -> None:
+        """
+        apply reactions added and removed by users, in the given order
+
+        reactions to messages or emojis that are not stored yet are skipped,
+        the history backup picks them up later
+        """
+        last: Dict[Tuple[Id, Id, Id], bool] = {}
+        for delta in data:
+            last[(delta.message_id, delta.emoji_id, delta.user_id)] = delta.added
+
+        added: Dict[Tuple[Id, Id], List[Id]] = {}
+        removed: Dict[Tuple[Id, Id], List[Id]] = {}
+        for (message_id, emoji_id, user_id), is_added in last.items():
+            (added if is_added else removed).setdefault((message_id, emoji_id), []).append(user_id)
+
+        await self._copy_merge(
+            conn, "server.reactions",
+            ('message_id', 'emoji_id', 'member_ids'),
+            [(message_id, emoji_id, user_ids) for ((message_id, emoji_id), user_ids) in removed.items()],
+            """
+            UPDATE server.reactions AS r
+            SET member_ids=ARRAY(SELECT u FROM unnest(r.member_ids) AS u WHERE u <> ALL(s.member_ids)),
+                edited_at=NOW()
+            FROM staging AS s
+            WHERE r.message_id=s.message_id AND
+                  r.emoji_id=s.emoji_id AND
+                  r.member_ids && s.member_ids
+            """
+        )
+        await self._copy_merge(
+            conn, "server.reactions",
+            ('message_id', 'emoji_id', 'member_ids'),
+            [(message_id, emoji_id, user_ids) for ((message_id, emoji_id), user_ids) in added.items()],
+            """
+            INSERT INTO server.reactions AS r (message_id, emoji_id, member_ids, created_at)
+            SELECT s.message_id, s.emoji_id, s.member_ids, m.created_at
+            FROM staging AS s, server.messages AS m
+            WHERE m.id=s.message_id AND
+                  EXISTS (SELECT 1 FROM server.emojis AS e WHERE e.id=s.emoji_id)
+            ON CONFLICT (message_id, emoji_id) DO UPDATE
+                SET member_ids=ARRAY(SELECT DISTINCT u FROM unnest(r.member_ids || excluded.member_ids) AS u),
+                    deleted_at=NULL,
+                    edited_at=NOW()
+                WHERE NOT r.member_ids @> excluded.member_ids
+            """
+        )
+
     @inject_conn
     async def soft_delete(self, conn: DBConnection, id: Id) -> None:
         await conn.execute(f"""
@@ -7,7 +7,7 @@ from discord import Role
 from bot.db.utils import (Crud, DBConnection, Id, Mapper, inject_conn, Entity)
 
 
-@dataclass
+@dataclass(slots=True)
 class RoleEntity(Entity):
     __table_name__ = "server.role"
 
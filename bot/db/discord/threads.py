@@ -7,7 +7,7 @@ from discord import Thread
 from bot.db.utils import Entity, Id, Mapper, Crud, inject_conn, DBConnection
 
 
-@dataclass
+@dataclass(slots=True)
 class ThreadEntity(Entity):
     __table_name__ = "server.messages"
 
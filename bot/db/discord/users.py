@@ -1,13 +1,13 @@
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional, Union
+from typing import Iterable, Optional, Union
 
 from discord import Member, User
 
 from bot.db.utils import (Crud, DBConnection, Id, Mapper, Url, inject_conn, Entity)
 
 
-@dataclass
+@dataclass(slots=True)
 class UserEntity(Entity):
     __table_name__ = "server.user"
 
@@ -48,3 +48,27 @@ class UserRepository(Crud[UserEntity]):
                       u.is_bot<>excluded.is_bot OR
                       u.created_at<>excluded.created_at
         """, data.id, data.name, data.avatar_url, data.is_bot, data.created_at)
+
+    @inject_conn
+    async def insert_many(self, conn: DBConnection, data: Iterable[UserEntity]) -> None:
+        users = {user.id: user for user in data}
+        await self._copy_merge(
+            conn, "server.users",
+            ('id', 'name', 'avatar_url', 'is_bot', 'created_at'),
+            [(u.id, u.name, u.avatar_url, u.is_bot, u.created_at) for u in users.values()],
+            """
+            INSERT INTO server.users AS u (id, name, avatar_url, is_bot, created_at)
+            SELECT id, name, avatar_url, is_bot, created_at
+            FROM staging
+            ON CONFLICT (id) DO UPDATE
+                SET name=excluded.name,
+                    avatar_url=excluded.avatar_url,
+                    is_bot=excluded.is_bot,
+                    created_at=excluded.created_at,
+                    edited_at=NOW()
+                WHERE u.name<>excluded.name OR
+                      u.avatar_url<>excluded.avatar_url OR
+                      u.is_bot<>excluded.is_bot OR
+                      u.created_at<>excluded.created_at
+            """
+        )
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import random
+from typing import Callable, Optional
+
+import asyncpg
+
+from bot.constants import DatabaseConfig, PoolConfig
+from bot.db.utils import Pool, PoolMetrics, PoolPartitions, Url
+
+log = logging.getLogger(__name__)
+
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30.0
+PING_TIMEOUT = 5.0
+
+# errors of an unreachable or overloaded server, everything else is not fixed by retrying
+CONNECTION_ERRORS = (OSError, asyncio.TimeoutError, asyncpg.CannotConnectNowError, asyncpg.TooManyConnectionsError)
+# errors of open connections while the server restarts or fails over
+CONNECTION_LOST_ERRORS = (*CONNECTION_ERRORS, asyncpg.PostgresConnectionError, asyncpg.InterfaceError,
+                          asyncpg.exceptions.OperatorInterventionError)
+
+
+async def create_pool(url: Url, config: PoolConfig, metrics: Optional[PoolMetrics] = None) -> Pool:
+    server_settings = {}
+    if config.statement_timeout_ms:
+        server_settings['statement_timeout'] = str(config.statement_timeout_ms)
+
+    pool: Pool = await asyncpg.create_pool(
+        url,
+        min_size=config.min_size,
+        max_size=config.max_size,
+        command_timeout=config.command_timeout,
+        server_settings=server_settings,
+        init=metrics.on_connect if metrics else None
+    )
+    return pool
+
+
+async def connect_db(url: Url, config: DatabaseConfig, metrics: Optional[PoolMetrics] = None) -> PoolPartitions:
+    """create all pool partitions at once, raises if the database is not reachable"""
+    interactive = await create_pool(url, config.interactive, metrics)
+    try:
+        bulk = await create_pool(url, config.bulk, metrics) if config.bulk else None
+    except BaseException:
+        await interactive.close()
+        raise
+    return PoolPartitions(interactive, bulk)
+
+
+def backoff(attempt: int) -> float:
+    """exponential backoff with full jitter"""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+class DatabaseManager:
+    """
+    keeps the database connected in the background
+
+    `start` connects with exponential backoff, so the bot can log into
+    the gateway meanwhile. Afterwards the pools are pinged every
+    `health_check_interval` seconds, when a ping fails the partitions
+    are marked unavailable (repository calls raise `DatabaseUnavailable`),
+    stale connections are expired and the pools are pinged with backoff
+    until the database is back.
+
+    unexpected errors are logged and the manager starts over after
+    `BACKOFF_CAP` seconds, so the database is never left unwatched.
+
+    `on_status_change` is called with the new availability,
+    the bot uses it to dispatch `database_available` and `database_unavailable` events
+    """
+
+    def __init__(
+        self,
+        url: Url,
+        config: DatabaseConfig,
+        metrics: Optional[PoolMetrics] = None,
+        on_status_change: Optional[Callable[[bool], None]] = None
+    ) -> None:
+        self.url = url
+        self.config = config
+        self.metrics = metrics
+        self.on_status_change = on_status_change
+        self.partitions = PoolPartitions(pool=None)
+
+        self._connected = False
+        self._available = asyncio.Event()
+        self._task: Optional[asyncio.Task[None]] = None
+
+    @property
+    def available(self) -> bool:
+        return self.partitions.available
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def wait_available(self) -> None:
+        await self._available.wait()
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.partitions.close()
+        self._connected = False
+        self._available.clear()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._watch()
+            except Exception:
+                log.exception("database manager failed, restarting in %.1fs", BACKOFF_CAP)
+                await asyncio.sleep(BACKOFF_CAP)
+
+    async def _watch(self) -> None:
+        if not self._connected:
+            await self._connect()
+        while True:
+            await asyncio.sleep(self.config.health_check_interval)
+            if not await self._ping():
+                await self._recover()
+
+    async def _connect(self) -> None:
+        attempt = 0
+        while True:
+            try:
+                partitions = await connect_db(self.url, self.config, self.metrics)
+                break
+            except CONNECTION_ERRORS as ex:
+                delay = backoff(attempt)
+                log.warning("failed to connect to database (%s), retrying in %.1fs", ex, delay)
+                await asyncio.sleep(delay)
+                attempt += 1
+
+        pools = dict(partitions.items())
+        self.partitions.replace(*pools.values())
+        self._connected = True
+        log.info("connected to database")
+        self._set_available(True)
+
+    async def _recover(self) -> None:
+        log.error("database health check failed, marking database unavailable")
+        self._set_available(False)
+
+        for _, pool in self.partitions.items():
+            await pool.expire_connections()
+
+        attempt = 0
+        while not await self._ping():
+            await asyncio.sleep(backoff(attempt))
+            attempt += 1
+
+        log.info("database is available again")
+        self._set_available(True)
+
+    async def _ping(self) -> bool:
+        try:
+            for _, pool in self.partitions.items():
+                async with pool.acquire(timeout=PING_TIMEOUT) as conn:
+                    await conn.fetchval("SELECT 1", timeout=PING_TIMEOUT)
+            return True
+        except CONNECTION_LOST_ERRORS as ex:
+            log.debug("database ping failed: %s", ex)
+            return False
+
+    def _set_available(self, available: bool) -> None:
+        self.partitions.available = available
+        if available:
+            self._available.set()
+        else:
+            self._available.clear()
+
+        if self.on_status_change is not None:
+            self.on_status_change(available)
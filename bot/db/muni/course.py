@@ -2,10 +2,10 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import List, Optional, Iterable, cast
 
-from bot.db.utils import inject_conn, DBConnection, Url, Entity, Crud
+from bot.db.utils import inject_conn, DBConnection, Url, Entity, Crud, cached, invalidates_cache
 
 
-@dataclass
+@dataclass(slots=True)
 class CourseEntity(Entity):
     __table_name__ = "muni.courses"
 
@@ -23,6 +23,7 @@ class CourseRepository(Crud[CourseEntity]):
     def __init__(self) -> None:
         super().__init__(entity=CourseEntity)
 
+    @invalidates_cache
     @inject_conn
     async def insert(self, conn: DBConnection, data: CourseEntity) -> None:
         await conn.execute("""
@@ -35,15 +36,37 @@ class CourseRepository(Crud[CourseEntity]):
                     edited_at=NOW()
         """, data.faculty, data.code, data.name, data.url, data.terms)
 
+    @invalidates_cache
+    @inject_conn
+    async def insert_many(self, conn: DBConnection, data: Iterable[CourseEntity]) -> None:
+        courses = {(course.faculty, course.code): course for course in data}
+        await self._copy_merge(
+            conn, "muni.courses",
+            ('faculty', 'code', 'name', 'url', 'terms'),
+            [(c.faculty, c.code, c.name, c.url, [c.terms]) for c in courses.values()],
+            """
+            INSERT INTO muni.courses (faculty, code, name, url, terms)
+            SELECT faculty, code, name, url, terms
+            FROM staging
+            ON CONFLICT (faculty, code) DO UPDATE
+                SET name=excluded.name,
+                    url=excluded.url,
+                    terms=excluded.terms,
+                    edited_at=NOW()
+            """
+        )
+
+    @invalidates_cache
     @inject_conn
     async def soft_delete(self, conn: DBConnection, data: CourseEntity) -> None:
         await conn.execute("""
-            UPDATE muni.faculties
+            UPDATE muni.courses
             SET deleted_at=NOW()
             WHERE faculty=$1 AND code=$2
         """, data.faculty, data.code)
 
 
+    @cached(ttl=600)
     @inject_conn
     async def autocomplete(self, conn: DBConnection, pattern: str) -> List[CourseEntity]:
         rows = await conn.fetch(f"""
@@ -54,6 +77,7 @@ class CourseRepository(Crud[CourseEntity]):
         """, pattern)
         return CourseEntity.convert_many(rows)
 
+    @cached(ttl=600)
     @inject_conn
     async def find_by_code(self, conn: DBConnection, faculty: str, code: str) -> Optional[CourseEntity]:
         row = await conn.fetchrow(f"""
@@ -1,10 +1,10 @@
 from dataclasses import dataclass
 from typing import Tuple, Iterable, cast
 
-from bot.db.utils import inject_conn, DBConnection, Id, Crud, Entity
+from bot.db.utils import inject_conn, DBConnection, Id, Crud, Entity, cached, invalidates_cache
 
 
-@dataclass
+@dataclass(slots=True)
 class StudentEntity(Entity):
     __table_name__ = "muni.students"
 
@@ -18,6 +18,7 @@ class StudentRepository(Crud[StudentEntity]):
     def __init__(self) -> None:
         super().__init__(entity=StudentEntity)
 
+    @invalidates_cache
     @inject_conn
     async def insert(self, conn: DBConnection, data: StudentEntity) -> None:
         await conn.execute("""
@@ -27,6 +28,24 @@ class StudentRepository(Crud[StudentEntity]):
                 SET left_at=NULL
         """, data.faculty, data.code, data.guild_id, data.member_id)
 
+    @invalidates_cache
+    @inject_conn
+    async def insert_many(self, conn: DBConnection, data: Iterable[StudentEntity]) -> None:
+        students = {(s.faculty, s.code, s.guild_id, s.member_id) for s in data}
+        await self._copy_merge(
+            conn, "muni.students",
+            ('faculty', 'code', 'guild_id', 'member_id'),
+            list(students),
+            """
+            INSERT INTO muni.students (faculty, code, guild_id, member_id)
+            SELECT faculty, code, guild_id, member_id
+            FROM staging
+            ON CONFLICT (faculty, code, guild_id, member_id) DO UPDATE
+                SET left_at=NULL
+            """
+        )
+
+    @cached(ttl=60)
     @inject_conn
     async def count_course_students(self, conn: DBConnection, data: Tuple[str, str, Id]) -> int:
         faculty, code, guild_id = data
@@ -38,6 +57,7 @@ class StudentRepository(Crud[StudentEntity]):
         assert row
         return cast(int, row['count'])
 
+    @cached(ttl=60)
     @inject_conn
     async def find_all_students_courses(self, conn: DBConnection, data: Tuple[Id, Id]) -> Iterable[str]:
         guild_id, member_id = data
@@ -46,8 +66,9 @@ class StudentRepository(Crud[StudentEntity]):
                 FROM muni.students
                 WHERE guild_id=$1 AND member_id=$2 AND left_at IS NULL
             """, guild_id, member_id)
-        return map(lambda row: cast(str, row['result']), rows)
+        return [cast(str, row['result']) for row in rows]
 
+    @invalidates_cache
     @inject_conn
     async def soft_delete(self, conn: DBConnection, data: StudentEntity) -> None:
         await conn.execute("""
@@ -2,7 +2,10 @@ __all__ = [
     'Crud', 'Entity', 'Mapper', 'Table',
     'Id', 'Url', "Record", 'DBConnection',
     'Cursor', 'Pool', 'DBTransaction',
-    'UnitOfWork', 'inject_conn', 'Page'
+    'UnitOfWork', 'inject_conn', 'Page',
+    'PoolMetrics', 'PoolStats', 'QueryMetrics', 'QueryStats',
+    'LruCache', 'CacheStats', 'cached', 'invalidates_cache',
+    'PoolPartition', 'PoolPartitions', 'use_partition', 'DatabaseUnavailable'
 ]
 
 from .crud import Crud
@@ -13,3 +16,6 @@ from .dbtypes import Id, Url, Record, DBConnection, Cursor, Pool, DBTransaction
 from .transaction import UnitOfWork
 from .inject_conn import inject_conn
 from .page import Page
+from .metrics import PoolMetrics, PoolStats, QueryMetrics, QueryStats
+from .cache import LruCache, CacheStats, cached, invalidates_cache
+from .partitions import PoolPartition, PoolPartitions, use_partition, DatabaseUnavailable
@@ -0,0 +1,139 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import partial, wraps
+from typing import Any, Callable, Coroutine, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+from .transaction import current_connection, current_transaction
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+R = TypeVar('R')
+Awaitable = Coroutine[None, None, R]
+
+DEFAULT_MAX_SIZE = 1_024
+DEFAULT_TTL = 300.0
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    name: str
+    size: int
+    hits: int
+    misses: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __str__(self) -> str:
+        return f"{self.name}: {self.size} entries, {self.hits} hits, {self.misses} misses ({self.hit_rate:.0%})"
+
+
+class LruCache(Generic[K, V]):
+    """bounded least recently used cache, entries expire `ttl` seconds after they were stored"""
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE, ttl: float = DEFAULT_TTL) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[K, Tuple[float, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: K) -> Tuple[bool, Optional[V]]:
+        if (entry := self._entries.get(key)) is None or entry[0] < time.monotonic():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return False, None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, entry[1]
+
+    def set(self, key: K, value: V) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def cached(
+    max_size: int = DEFAULT_MAX_SIZE,
+    ttl: float = DEFAULT_TTL
+) -> Callable[[Callable[..., Awaitable[R]]], Callable[..., Awaitable[R]]]:
+    """
+    cache results of a repository method by its arguments
+
+    the cache belongs to the repository instance and is cleared by every
+    `@invalidates_cache` method of the same repository.
+    Calls made with an explicit connection or inside of a transaction bypass
+    the cache, as they could see uncommitted data
+
+    ```py
+    @cached(max_size=256, ttl=60)
+    @inject_conn
+    async def find_by_code(self, conn: DBConnection, faculty: str, code: str) -> Optional[CourseEntity]:
+        ...
+
+    # opt in for an inherited method
+    find_by_id = cached()(Crud.find_by_id)
+    ```
+
+    cached values are shared between callers and must not be mutated
+    """
+
+    def decorator(fn: Callable[..., Awaitable[R]]) -> Callable[..., Awaitable[R]]:
+        @wraps(fn)
+        async def wrapper(self: Any, *args: Any, **kwargs: Any) -> R:
+            if kwargs.get('conn') is not None or current_connection() is not None:
+                return await fn(self, *args, **kwargs)
+
+            caches: Dict[str, LruCache[Hashable, R]] = self._caches
+            if (cache := caches.get(fn.__name__)) is None:
+                cache = caches[fn.__name__] = LruCache(max_size, ttl)
+
+            key = (args, tuple(sorted(kwargs.items())))
+            hit, value = cache.get(key)
+            if hit:
+                return value  # type: ignore[return-value]
+
+            result = await fn(self, *args, **kwargs)
+            cache.set(key, result)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def invalidates_cache(fn: Callable[..., Awaitable[R]]) -> Callable[..., Awaitable[R]]:
+    """
+    clear all `@cached` methods of the repository after the call
+
+    inside of a transaction, the caches are cleared again once it commits,
+    other tasks could have cached the rows before the write was visible to them
+    """
+
+    @wraps(fn)
+    async def wrapper(self: Any, *args: Any, **kwargs: Any) -> R:
+        transaction = current_transaction()
+        try:
+            return await fn(self, *args, **kwargs)
+        finally:
+            _clear_caches(self)
+            if transaction is not None:
+                transaction.after_commit(partial(_clear_caches, self))
+
+    return wrapper
+
+
+def _clear_caches(repository: Any) -> None:
+    for cache in repository._caches.values():
+        cache.clear()
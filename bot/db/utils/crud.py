@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import TypeVar
+from typing import Iterable, TypeVar
 
 from .entity import Entity
 from .inject_conn import inject_conn
@@ -27,13 +27,22 @@ class Crud(ABC, Table[TEntity]):
             SELECT * 
             FROM {self.__table_name__} 
             WHERE id=$1
-        """, (id,))
+        """, id)
         return self.entity.convert(row) if row else None
 
     @abstractmethod
     async def insert(self, data: TEntity) -> None:
         raise NotImplementedError
 
+    @inject_conn
+    async def insert_many(self, conn: DBConnection, data: Iterable[TEntity]) -> None:
+        """
+        insert or update many entities at once,
+        repositories with a lot of rows override this with a bulk statement
+        """
+        for entity in data:
+            await self.insert(entity, conn=conn)
+
     async def update(self, data: TEntity) -> None:
         return await self.insert(data)
 
@@ -43,4 +52,12 @@ class Crud(ABC, Table[TEntity]):
             UPDATE {self.__table_name__}
             SET deleted_at=NOW()
             WHERE id = $1;
-        """, (id,))
+        """, id)
+
+    @inject_conn
+    async def soft_delete_many(self, conn: DBConnection, ids: Iterable[Id]) -> None:
+        await conn.execute(f"""
+            UPDATE {self.__table_name__}
+            SET deleted_at=NOW()
+            WHERE id = ANY($1::bigint[]) AND deleted_at IS NULL;
+        """, list(set(ids)))
@@ -1,18 +1,81 @@
-from typing import List, TypeVar, Type
+from dataclasses import fields, is_dataclass
+from operator import itemgetter
+from typing import Any, Callable, Dict, List, Tuple, TypeVar, Type
 
 from asyncpg import Record
 
 TEntity = TypeVar('TEntity', bound='Entity')
 
+Converter = Callable[[Record], Any]
+
+_converters: Dict[Tuple[type, Tuple[str, ...]], Converter] = {}
+
 
 class Entity:
+    __slots__ = ()
     __table_name__: str
 
     @classmethod
     def convert(cls: Type[TEntity], record: Record) -> TEntity:
-        # noinspection PyArgumentList
-        return cls(**{k: v for (k, v) in record.items()})
+        return cls._converter(record)(record)  # type: ignore[no-any-return]
 
     @classmethod
     def convert_many(cls: Type[TEntity], records: List[Record]) -> List[TEntity]:
-        return [cls.convert(record) for record in records]
+        if not records:
+            return []
+        converter = cls._converter(records[0])
+        return [converter(record) for record in records]
+
+    @classmethod
+    def _converter(cls, record: Record) -> Converter:
+        """
+        converter of records with the same columns as `record`
+
+        all records of one query share the columns, so the converter
+        is built once per entity and column order and then reused
+        """
+        key = (cls, tuple(record.keys()))
+        if (converter := _converters.get(key)) is None:
+            converter = _converters[key] = _compile_converter(cls, key[1])
+        return converter
+
+
+def _compile_converter(cls: type, columns: Tuple[str, ...]) -> Converter:
+    """
+    build `lambda record: cls(record[i], ..., name=record[j])`
+
+    columns are read by position, fields are passed positionally as long
+    as the record has them in order and by keyword afterwards. Columns
+    without a matching field are passed by keyword as well, so they fail
+    the same way `cls(**record)` would
+    """
+    if not is_dataclass(cls):
+        return lambda record: cls(**{k: v for (k, v) in record.items()})
+
+    index = {column: i for (i, column) in enumerate(columns)}
+    field_names = [field.name for field in fields(cls) if field.init]
+
+    positional: List[str] = []
+    for name in field_names:
+        if name not in index:
+            break
+        positional.append(name)
+
+    get_args = _tuple_getter([index[name] for name in positional])
+    keywords = [(name, i) for (name, i) in index.items() if name not in positional]
+    if not keywords:
+        return lambda record: cls(*get_args(record))
+
+    names = tuple(name for (name, _i) in keywords)
+    get_kwargs = _tuple_getter([i for (_name, i) in keywords])
+    return lambda record: cls(*get_args(record), **dict(zip(names, get_kwargs(record))))
+
+
+def _tuple_getter(positions: List[int]) -> Callable[[Record], Tuple[Any, ...]]:
+    # itemgetter returns a single value instead of a tuple for one position
+    if len(positions) > 1:
+        return itemgetter(*positions)
+    if positions:
+        position = positions[0]
+        return lambda record: (record[position],)
+    return lambda record: ()
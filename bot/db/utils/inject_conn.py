@@ -1,9 +1,12 @@
+import time
+from collections.abc import Sized
 from functools import wraps
 from inspect import iscoroutinefunction
 from typing import Callable, Concatenate, TypeVar, ParamSpec, Coroutine, Optional
 
 from bot.db.utils.dbtypes import DBConnection
 from bot.db.utils.table import Table
+from bot.db.utils.transaction import current_connection
 
 S = TypeVar('S', bound=Table)  # type: ignore
 P = ParamSpec('P')
@@ -15,6 +18,12 @@ def inject_conn(fn: Callable[Concatenate[S, DBConnection, P], Awaitable[R]]) ->
     """
     acquire database connection from connection pool if no connection is provided
 
+    when called inside of `UnitOfWork.transaction()`, the connection of the
+    transaction is used, so the call becomes part of the transaction
+
+    every call is timed and recorded in `QueryMetrics` under the name
+    `Repository.method`
+
     ```py
     @inject_conn
     async def find_by_id(self, conn: DBConnection, id: int) -> Optional[Record]:
@@ -33,11 +42,20 @@ def inject_conn(fn: Callable[Concatenate[S, DBConnection, P], Awaitable[R]]) ->
     """
     assert iscoroutinefunction(fn), f"{fn} is not async"
 
+    async def timed(self: S, conn: DBConnection, *args: P.args, **kwargs: P.kwargs) -> R:
+        start = time.perf_counter()
+        result = await fn(self, conn, *args, **kwargs)
+        rows = len(result) if isinstance(result, Sized) and not isinstance(result, str) else None
+        self.query_metrics.record(f"{type(self).__name__}.{fn.__name__}", time.perf_counter() - start, rows)
+        return result
+
     @wraps(fn)
     async def wrapper(self: S, *args: P.args, conn: Optional[DBConnection] = None, **kwargs: P.kwargs) -> R:
+        if conn is None:
+            conn = current_connection()
         if conn is not None:
-            return await fn(self, conn, *args, **kwargs)
-        async with self.pool.acquire() as connection:
-            return await fn(self, connection, *args, **kwargs)
+            return await timed(self, conn, *args, **kwargs)
+        async with self.metrics.acquire(self.pool) as connection:
+            return await timed(self, connection, *args, **kwargs)
 
     return wrapper
@@ -0,0 +1,185 @@
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from statistics import quantiles
+from typing import AsyncIterator, Deque, Dict, List, Optional
+
+from .dbtypes import Pool, DBConnection
+
+log = logging.getLogger(__name__)
+
+DEFAULT_SAMPLES = 1_000
+DEFAULT_SLOW_QUERY_THRESHOLD = 0.5
+CREATED_WINDOW = 60.0
+
+
+@dataclass(frozen=True)
+class PoolStats:
+    size: int
+    in_use: int
+    idle: int
+    max_size: int
+    acquire_wait_avg: float
+    acquire_wait_p95: float
+    acquire_wait_max: float
+    created_per_minute: int
+    created_total: int
+
+    def __str__(self) -> str:
+        return (
+            f"connections: {self.in_use} in use, {self.idle} idle ({self.size}/{self.max_size})\n"
+            f"acquire wait: avg {self.acquire_wait_avg * 1000:.1f}ms, "
+            f"p95 {self.acquire_wait_p95 * 1000:.1f}ms, "
+            f"max {self.acquire_wait_max * 1000:.1f}ms\n"
+            f"connections created: {self.created_per_minute} in the last minute, {self.created_total} total"
+        )
+
+
+class PoolMetrics:
+    """
+    connection pool instrumentation
+
+    acquire wait times are sampled from the last `samples` acquires of every pool,
+    created connections are counted through the `init` callback of the pool
+
+    ```py
+    metrics = PoolMetrics()
+    pool = await asyncpg.create_pool(url, init=metrics.on_connect)
+
+    async with metrics.acquire(pool) as conn:
+        ...
+
+    print(metrics.snapshot(pool))
+    ```
+    """
+
+    def __init__(self, samples: int = DEFAULT_SAMPLES) -> None:
+        self._samples = samples
+        self._acquire_waits: Dict[Pool, Deque[float]] = {}
+        self._created: Deque[float] = deque()
+        self._created_total = 0
+
+    async def on_connect(self, _conn: DBConnection) -> None:
+        self._created.append(time.monotonic())
+        self._created_total += 1
+
+    def record_acquire(self, pool: Pool, wait: float) -> None:
+        if (waits := self._acquire_waits.get(pool)) is None:
+            waits = self._acquire_waits[pool] = deque(maxlen=self._samples)
+        waits.append(wait)
+
+    @asynccontextmanager
+    async def acquire(self, pool: Pool) -> AsyncIterator[DBConnection]:
+        start = time.perf_counter()
+        async with pool.acquire() as conn:
+            self.record_acquire(pool, time.perf_counter() - start)
+            yield conn
+
+    async def acquire_connection(self, pool: Pool) -> DBConnection:
+        """acquire connection, which has to be released with `pool.release` afterwards"""
+        start = time.perf_counter()
+        conn = await pool.acquire()
+        self.record_acquire(pool, time.perf_counter() - start)
+        return conn
+
+    def created_per_minute(self) -> int:
+        horizon = time.monotonic() - CREATED_WINDOW
+        while self._created and self._created[0] < horizon:
+            self._created.popleft()
+        return len(self._created)
+
+    def snapshot(self, pool: Pool) -> PoolStats:
+        waits = list(self._acquire_waits.get(pool, ()))
+        size = pool.get_size()
+        idle = pool.get_idle_size()
+        return PoolStats(
+            size=size,
+            in_use=size - idle,
+            idle=idle,
+            max_size=pool.get_max_size(),
+            acquire_wait_avg=sum(waits) / len(waits) if waits else 0.0,
+            acquire_wait_p95=_percentile(waits, 95),
+            acquire_wait_max=max(waits, default=0.0),
+            created_per_minute=self.created_per_minute(),
+            created_total=self._created_total
+        )
+
+
+@dataclass(frozen=True)
+class QueryStats:
+    name: str
+    calls: int
+    p50: float
+    p95: float
+    p99: float
+    rows_avg: float
+
+    def __str__(self) -> str:
+        return (
+            f"{self.name}: {self.calls} calls, "
+            f"p50 {self.p50 * 1000:.1f}ms, p95 {self.p95 * 1000:.1f}ms, p99 {self.p99 * 1000:.1f}ms, "
+            f"{self.rows_avg:.1f} rows"
+        )
+
+
+class _QuerySamples:
+    def __init__(self, samples: int) -> None:
+        self.calls = 0
+        self.durations: Deque[float] = deque(maxlen=samples)
+        self.rows: Deque[int] = deque(maxlen=samples)
+
+
+class QueryMetrics:
+    """
+    latency histograms of repository queries
+
+    queries are named after the repository method running them
+    (e.g. `MarkovRepository.find_random_next`), latencies and returned rows
+    are sampled from the last `samples` calls of every query.
+    Queries slower than `slow_query_threshold` seconds are logged
+    """
+
+    def __init__(
+        self,
+        slow_query_threshold: float = DEFAULT_SLOW_QUERY_THRESHOLD,
+        samples: int = DEFAULT_SAMPLES
+    ) -> None:
+        self.slow_query_threshold = slow_query_threshold
+        self._samples = samples
+        self._queries: Dict[str, _QuerySamples] = {}
+
+    def record(self, name: str, duration: float, rows: Optional[int] = None) -> None:
+        if (query := self._queries.get(name)) is None:
+            query = self._queries[name] = _QuerySamples(self._samples)
+
+        query.calls += 1
+        query.durations.append(duration)
+        if rows is not None:
+            query.rows.append(rows)
+
+        if duration >= self.slow_query_threshold:
+            log.warning("slow query %s took %.1fms", name, duration * 1000)
+
+    def snapshot(self) -> List[QueryStats]:
+        """stats of all recorded queries, slowest (by p95) first"""
+        result = []
+        for name, query in self._queries.items():
+            durations = list(query.durations)
+            rows = list(query.rows)
+            result.append(QueryStats(
+                name=name,
+                calls=query.calls,
+                p50=_percentile(durations, 50),
+                p95=_percentile(durations, 95),
+                p99=_percentile(durations, 99),
+                rows_avg=sum(rows) / len(rows) if rows else 0.0
+            ))
+        return sorted(result, key=lambda stats: stats.p95, reverse=True)
+
+
+def _percentile(values: List[float], percentile: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return quantiles(values, n=100, method='inclusive')[percentile - 1]
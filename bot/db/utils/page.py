@@ -1,25 +1,110 @@
+import asyncio
+import time
 from collections.abc import AsyncIterator
-from typing import Type, TypeVar, List
+from typing import Optional, Tuple, Type, TypeVar, List
 
 from .entity import Entity
-from .dbtypes import Cursor
+from .dbtypes import Cursor, Record
 
 
 TEntity = TypeVar('TEntity', bound=Entity)
 
+DEFAULT_PER_PAGE = 50
+DEFAULT_MIN_PER_PAGE = 10
+DEFAULT_MAX_PER_PAGE = 5_000
+
+Batch = Tuple[List[Record], float]
+
 
 class Page(AsyncIterator[List[TEntity]]):
-    def __init__(self, cursor: Cursor, entity: Type[TEntity], per_page: int = 50) -> None:
+    """
+    stream of entities read from a cursor in batches
+
+    the batch size starts at `per_page` and adapts within `min_per_page`
+    and `max_per_page`, it doubles when the consumer had to wait for the
+    database and halves when batches are fetched much faster than they
+    are consumed.
+
+    with `prefetch`, the next batch is fetched in the background while the
+    current one is being processed. The cursor connection is busy meanwhile,
+    the consumer must not run queries on it (or the transaction it belongs to)
+    between batches and has to `aclose` the page when it stops early
+    """
+
+    def __init__(
+        self,
+        cursor: Cursor,
+        entity: Type[TEntity],
+        per_page: int = DEFAULT_PER_PAGE,
+        min_per_page: int = DEFAULT_MIN_PER_PAGE,
+        max_per_page: int = DEFAULT_MAX_PER_PAGE,
+        prefetch: bool = False
+    ) -> None:
+        assert min_per_page <= per_page <= max_per_page, "per_page has to be within bounds"
         self.cursor = cursor
         self.entity = entity
         self.per_page = per_page
+        self.min_per_page = min_per_page
+        self.max_per_page = max_per_page
+        self.prefetch = prefetch
+
+        self._next: Optional[asyncio.Task[Batch]] = None
+        self._exhausted = False
+        self._returned_at: Optional[float] = None
 
     def __aiter__(self) -> "Page[TEntity]":
         return self
 
     async def __anext__(self) -> List[TEntity]:
-        if not (rows := await self.cursor.fetch(self.per_page)):
+        if self._exhausted and self._next is None:
             raise StopAsyncIteration
-        return [self.entity.convert(row) for row in rows]
 
-    
\ No newline at end of file
+        requested_at = time.perf_counter()
+        consume_time = None if self._returned_at is None else requested_at - self._returned_at
+
+        per_page = self.per_page
+        if self._next is None:
+            self._next = asyncio.create_task(self._fetch(per_page))
+        rows, fetch_time = await self._next
+        self._next = None
+        wait_time = time.perf_counter() - requested_at
+
+        if len(rows) < per_page:
+            self._exhausted = True
+        if not rows:
+            raise StopAsyncIteration
+
+        if consume_time is not None:
+            self._adapt(wait_time, fetch_time, consume_time)
+        if self.prefetch and not self._exhausted:
+            self._next = asyncio.create_task(self._fetch(self.per_page))
+
+        self._returned_at = time.perf_counter()
+        return self.entity.convert_many(rows)
+
+    async def entities(self) -> AsyncIterator[TEntity]:
+        """iterate over single entities instead of batches"""
+        try:
+            async for entities in self:
+                for entity in entities:
+                    yield entity
+        finally:
+            await self.aclose()
+
+    async def aclose(self) -> None:
+        """wait for the prefetched batch, so the connection can be used again"""
+        self._exhausted = True
+        if self._next is not None:
+            await asyncio.wait([self._next])
+            self._next = None
+
+    async def _fetch(self, per_page: int) -> Batch:
+        start = time.perf_counter()
+        rows = await self.cursor.fetch(per_page)
+        return rows, time.perf_counter() - start
+
+    def _adapt(self, wait_time: float, fetch_time: float, consume_time: float) -> None:
+        if wait_time > consume_time:
+            self.per_page = min(self.max_per_page, self.per_page * 2)
+        elif fetch_time * 4 < consume_time:
+            self.per_page = max(self.min_per_page, self.per_page // 2)
@@ -0,0 +1,84 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import Enum
+from typing import Dict, Iterator, Optional, Tuple
+
+from .dbtypes import Pool
+
+
+class PoolPartition(Enum):
+    INTERACTIVE = 'interactive'
+    BULK = 'bulk'
+
+
+_current_partition: ContextVar[Optional[PoolPartition]] = ContextVar('current_partition', default=None)
+
+
+@contextmanager
+def use_partition(partition: PoolPartition) -> Iterator[None]:
+    """
+    run all database calls of the block on the given partition
+
+    ```py
+    with use_partition(PoolPartition.BULK):
+        await backup()
+    ```
+
+    tasks created inside of the block inherit the partition
+    """
+    token = _current_partition.set(partition)
+    try:
+        yield
+    finally:
+        _current_partition.reset(token)
+
+
+class DatabaseUnavailable(RuntimeError):
+    pass
+
+
+class PoolPartitions:
+    """
+    named connection pools, so bulk jobs (backup, markov training)
+    never make interactive commands queue for a connection
+
+    the partition is picked by `use_partition` of the caller first,
+    then by the partition preferred by the repository and falls back
+    to the interactive pool. Without a bulk pool, both partitions
+    share the interactive one
+
+    pools can be swapped with `replace` and marked unavailable
+    while the database is down, `get` raises `DatabaseUnavailable` then
+    """
+
+    def __init__(self, pool: Optional[Pool] = None, bulk: Optional[Pool] = None) -> None:
+        self._pools: Dict[PoolPartition, Pool] = {}
+        self.available = False
+        if pool is not None:
+            self.replace(pool, bulk)
+
+    def replace(self, pool: Pool, bulk: Optional[Pool] = None) -> None:
+        self._pools = {
+            PoolPartition.INTERACTIVE: pool,
+            PoolPartition.BULK: bulk or pool
+        }
+        self.available = True
+
+    def get(self, preferred: Optional[PoolPartition] = None) -> Pool:
+        if not self.available or not self._pools:
+            raise DatabaseUnavailable("database is not available")
+        partition = _current_partition.get() or preferred or PoolPartition.INTERACTIVE
+        return self._pools[partition]
+
+    def items(self) -> Iterator[Tuple[PoolPartition, Pool]]:
+        if not self._pools:
+            return
+        yield PoolPartition.INTERACTIVE, self._pools[PoolPartition.INTERACTIVE]
+        if self._pools[PoolPartition.BULK] is not self._pools[PoolPartition.INTERACTIVE]:
+            yield PoolPartition.BULK, self._pools[PoolPartition.BULK]
+
+    async def close(self) -> None:
+        for _, pool in list(self.items()):
+            await pool.close()
+        self._pools = {}
+        self.available = False
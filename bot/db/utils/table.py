@@ -1,20 +1,73 @@
-from typing import Type, TypeVar, Generic
+from typing import Any, ClassVar, Dict, List, Optional, Sequence, Tuple, Type, TypeVar, Generic
 
 import inject
 
 from .entity import Entity
-from .dbtypes import Pool
+from .dbtypes import Pool, DBConnection
+from .metrics import PoolMetrics, QueryMetrics
+from .cache import CacheStats, LruCache
+from .partitions import PoolPartition, PoolPartitions
 
 TEntity = TypeVar('TEntity', bound=Entity)
 
 
 class Table(Generic[TEntity]):
-    @inject.autoparams('pool')
-    def __init__(self, entity: Type[TEntity], pool: Pool) -> None:
+    partition: ClassVar[Optional[PoolPartition]] = None
+
+    @inject.autoparams('partitions', 'metrics', 'query_metrics')
+    def __init__(
+        self,
+        entity: Type[TEntity],
+        partitions: PoolPartitions,
+        metrics: PoolMetrics,
+        query_metrics: QueryMetrics
+    ) -> None:
         assert hasattr(entity, '__table_name__')
         self.entity = entity
-        self.pool = pool
+        self.partitions = partitions
+        self.metrics = metrics
+        self.query_metrics = query_metrics
+        self._caches: Dict[str, LruCache[Any, Any]] = {}
+
+    @property
+    def pool(self) -> Pool:
+        return self.partitions.get(self.partition)
 
     @property
     def __table_name__(self) -> str:
         return self.entity.__table_name__
+
+    def cache_stats(self) -> List[CacheStats]:
+        return [
+            CacheStats(f"{type(self).__name__}.{name}", len(cache), cache.hits, cache.misses)
+            for (name, cache) in self._caches.items()
+        ]
+
+    @staticmethod
+    async def _copy_merge(
+        conn: DBConnection,
+        target: str,
+        columns: Sequence[str],
+        records: Sequence[Tuple[Any, ...]],
+        merge: str
+    ) -> None:
+        """
+        copy records into a temporary staging table shaped like `target`
+        and merge them into `target` with a single statement
+
+        `merge` is the statement doing the merge, the staging table
+        is available in it under the name `staging`. The staging table is
+        dropped afterwards, so the helper can be called repeatedly within
+        one transaction
+        """
+        if not records:
+            return
+
+        async with conn.transaction():
+            await conn.execute(f"""
+                CREATE TEMPORARY TABLE staging (LIKE {target} INCLUDING DEFAULTS)
+                ON COMMIT DROP
+            """)
+            await conn.copy_records_to_table('staging', records=records, columns=columns)
+            await conn.execute(merge)
+            await conn.execute("DROP TABLE staging")
@@ -1,21 +1,44 @@
+import asyncio
 import logging
+from contextvars import ContextVar, Token
 from types import TracebackType
-from typing import Optional, Type
+from typing import Callable, List, Optional, Type
 
 import inject
 
-from bot.db.utils import Pool, DBConnection, DBTransaction
+from .dbtypes import Pool, DBConnection, DBTransaction
+from .metrics import PoolMetrics
+from .partitions import PoolPartition, PoolPartitions
 
 log = logging.getLogger(__name__)
 
 
 class TransactionContext:
-    def __init__(self, pool: Pool, readonly: bool = False) -> None:
+    """
+    database transaction bound to the current task
+
+    while the context is open, its connection is published as the ambient
+    connection, `inject_conn` decorated methods called from the same task
+    use it instead of acquiring their own connection from the pool.
+
+    transactions opened inside another transaction reuse its connection
+    and become savepoints. The only exception is a write transaction inside
+    a readonly one, which gets its own connection, as the readonly
+    transaction can not be written to
+    """
+
+    def __init__(self, pool: Pool, metrics: PoolMetrics, readonly: bool = False) -> None:
         self.pool = pool
+        self.metrics = metrics
         self.readonly = readonly
 
-        self.conn: Optional[DBConnection]
-        self._transaction: Optional[DBTransaction]
+        self.conn: Optional[DBConnection] = None
+        self._transaction: Optional[DBTransaction] = None
+        self._owns_connection = False
+        self._parent: Optional[TransactionContext] = None
+        self._callbacks: List[Callable[[], None]] = []
+        self._task: Optional[asyncio.Task[object]] = None
+        self._token: Optional[Token[Optional[TransactionContext]]] = None
 
     async def __aenter__(self) -> "TransactionContext":
         await self._start()
@@ -27,43 +50,119 @@ class TransactionContext:
         exc_val: Optional[BaseException],
         exc_tb: Optional[TracebackType]
     ) -> None:
-        if exc_val is not None:
-            await self._rollback()
-            raise exc_val
-        else:
-            await self._commit()
+        try:
+            if exc_val is not None:
+                await self._rollback()
+                raise exc_val
+            else:
+                await self._commit()
+        finally:
+            self._unpublish()
+
+    def after_commit(self, callback: Callable[[], None]) -> None:
+        self._callbacks.append(callback)
+
+    @property
+    def nested(self) -> bool:
+        return self.conn is not None and not self._owns_connection
 
     async def _start(self) -> None:
-        self.conn = await self.pool.acquire()
-        self._transaction = self.conn.transaction(readonly=self.readonly)
-        await self._transaction.start()
+        parent = current_transaction()
+        if parent is not None and (self.readonly or not parent.readonly):
+            self.conn = parent.conn
+            self._owns_connection = False
+            self._parent = parent
+        else:
+            self.conn = await self.metrics.acquire_connection(self.pool)
+            self._owns_connection = True
+
+        assert self.conn, "no connection"
+        try:
+            self._transaction = self.conn.transaction(readonly=self.readonly)
+            await self._transaction.start()
+        except BaseException:
+            await self._release()
+            raise
+
+        self._task = asyncio.current_task()
+        self._token = _current_transaction.set(self)
 
     async def _commit(self) -> None:
         assert self._transaction, "no transaction"
         assert self.conn, "no connection"
 
-        await self._transaction.commit()
-        await self.conn.close()
+        parent, callbacks = self._parent, self._callbacks
+        try:
+            await self._transaction.commit()
+        finally:
+            # the pool resets a connection released inside of a failed transaction
+            await self._release()
 
-        self._transaction = None
-        self.conn = None
+        if parent is not None:
+            parent._callbacks.extend(callbacks)
+            return
+        for callback in callbacks:
+            callback()
 
     async def _rollback(self) -> None:
         assert self._transaction, "no transaction"
         assert self.conn, "no connection"
 
-        await self._transaction.rollback()
-        log.error("Transaction failed, statement rolled back")
-        await self.conn.close()
+        try:
+            await self._transaction.rollback()
+            if self._owns_connection:
+                log.error("Transaction failed, statement rolled back")
+            else:
+                log.error("Transaction failed, rolled back to savepoint")
+        finally:
+            await self._release()
+
+    async def _release(self) -> None:
+        if self._owns_connection and self.conn is not None:
+            await self.pool.release(self.conn)
 
         self._transaction = None
         self.conn = None
+        self._owns_connection = False
+        self._parent = None
+        self._callbacks = []
+
+    def _unpublish(self) -> None:
+        if self._token is not None:
+            _current_transaction.reset(self._token)
+            self._token = None
+        self._task = None
+
+
+_current_transaction: ContextVar[Optional[TransactionContext]] = ContextVar('current_transaction', default=None)
+
+
+def current_transaction() -> Optional[TransactionContext]:
+    """
+    transaction opened by the running task, if there is any
+
+    tasks spawned from inside of a transaction inherit the context variable,
+    but must not share its connection, so they do not see the transaction
+    """
+    transaction = _current_transaction.get()
+    if transaction is None or transaction.conn is None:
+        return None
+    if transaction._task is not asyncio.current_task():
+        return None
+    return transaction
+
+
+def current_connection() -> Optional[DBConnection]:
+    if (transaction := current_transaction()) is None:
+        return None
+    return transaction.conn
 
 
 class UnitOfWork:
-    @inject.autoparams('pool')
-    def __init__(self, pool: Pool) -> None:
-        self.pool = pool
+    @inject.autoparams('partitions', 'metrics')
+    def __init__(self, partitions: PoolPartitions, metrics: PoolMetrics) -> None:
+        self.partitions = partitions
+        self.metrics = metrics
 
-    def transaction(self, readonly: bool = False) -> TransactionContext:
-        return TransactionContext(self.pool, readonly)
+    def transaction(self, readonly: bool = False, partition: Optional[PoolPartition] = None) -> TransactionContext:
+        return TransactionContext(self.partitions.get(partition), self.metrics, readonly)
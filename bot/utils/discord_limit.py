@@ -4,3 +4,4 @@ from enum import IntEnum
 class DiscordLimit(IntEnum):
     CATEGORY_MAX_CHANNELS = 50
     MAX_CHANNEL_OVERWRITES = 500
+    MESSAGE_LENGTH = 2000
@@ -1,7 +1,11 @@
+import re
+from collections import Counter
 from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
 import discord
 from discord.ext import commands
+from emoji import EMOJI_DATA
 
 from bot.utils.context import Context
 
@@ -12,6 +16,7 @@ AnyEmote = discord.Emoji | discord.PartialEmoji | str
 class MessageEmote:
     message: discord.Message
     emoji: AnyEmote
+    count: int = 1
 
 
 def get_emoji_id(emoji: AnyEmote) -> int:
@@ -39,3 +44,105 @@ async def convert_emoji(ctx: Context, emoji: str) -> AnyEmote:
         pass
 
     return emoji
+
+
+_EmojiTrie = Dict[str, Any]
+
+# first characters outside the BMP closer than this are scanned as one range, the trie rejects the rest
+_RANGE_GAP = 1024
+_BMP_END = 0xFFFF
+
+
+def _build_trie(words: Iterable[str]) -> _EmojiTrie:
+    trie: _EmojiTrie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = word
+    return trie
+
+
+def _first_char_ranges(trie: _EmojiTrie) -> str:
+    # the regex engine checks characters outside the BMP range by range, so those are merged into few wide ones
+    ranges: List[List[int]] = []
+    for code in sorted(map(ord, trie)):
+        gap = _RANGE_GAP if code > _BMP_END else 1
+        if ranges and code - ranges[-1][1] <= gap:
+            ranges[-1][1] = code
+        else:
+            ranges.append([code, code])
+    return ''.join(re.escape(chr(low)) if low == high else f"{re.escape(chr(low))}-{re.escape(chr(high))}"
+                   for (low, high) in ranges)
+
+
+class EmojiExtractor:
+    """
+    finds unicode and custom emojis of a message in a single pass
+
+    one precompiled pattern skips plain text and stops at custom emojis and
+    at characters an unicode emoji can start with, where the longest emoji
+    is looked up in a prefix tree of `emoji.EMOJI_DATA`.
+    Custom emojis are resolved with an id index of the emojis of the bot
+    instead of the `EmojiConverter`, unknown ones become a `discord.PartialEmoji`.
+    The index is rebuilt on ready and kept up to date by `update_guild`
+    """
+
+    _trie: _EmojiTrie | None = None
+    _pattern: re.Pattern[str] | None = None
+
+    def __init__(self) -> None:
+        self._emojis: Dict[int, discord.Emoji] = {}
+        self._guild_emojis: Dict[int, Set[int]] = {}
+
+    @classmethod
+    def compile(cls) -> Tuple[_EmojiTrie, re.Pattern[str]]:
+        if cls._trie is None or cls._pattern is None:
+            cls._trie = _build_trie(EMOJI_DATA.keys())
+            cls._pattern = re.compile(rf"<(a?):(\w+):(\d+)>|[{_first_char_ranges(cls._trie)}]")
+        return cls._trie, cls._pattern
+
+    def rebuild(self, emojis: Iterable[discord.Emoji]) -> None:
+        self._emojis.clear()
+        self._guild_emojis.clear()
+        for emoji in emojis:
+            self._emojis[emoji.id] = emoji
+            self._guild_emojis.setdefault(emoji.guild_id, set()).add(emoji.id)
+
+    def update_guild(self, guild: discord.Guild, emojis: Iterable[discord.Emoji]) -> None:
+        for emoji_id in self._guild_emojis.pop(guild.id, set()):
+            self._emojis.pop(emoji_id, None)
+        for emoji in emojis:
+            self._emojis[emoji.id] = emoji
+            self._guild_emojis.setdefault(guild.id, set()).add(emoji.id)
+
+    def extract(self, content: str) -> Counter[AnyEmote]:
+        trie, pattern = self.compile()
+        found: Counter[AnyEmote] = Counter()
+        position = 0
+        while (match := pattern.search(content, position)) is not None:
+            animated, name, emoji_id = match.groups()
+            if emoji_id is not None:
+                found[self._resolve(bool(animated), name, int(emoji_id))] += 1
+                position = match.end()
+            elif (unicode_emoji := self._longest_emoji(trie, content, match.start())) is not None:
+                found[unicode_emoji] += 1
+                position = match.start() + len(unicode_emoji)
+            else:
+                position = match.start() + 1
+        return found
+
+    @staticmethod
+    def _longest_emoji(trie: _EmojiTrie, content: str, start: int) -> Optional[str]:
+        # greedy, so skin tones and zwj sequences win over their first emoji
+        longest, node = None, trie
+        for index in range(start, len(content)):
+            if (node := node.get(content[index])) is None:
+                break
+            longest = node.get('', longest)
+        return longest
+
+    def _resolve(self, animated: bool, name: str, emoji_id: int) -> AnyEmote:
+        if (emoji := self._emojis.get(emoji_id)) is not None:
+            return emoji
+        return discord.PartialEmoji(name=name, animated=animated, id=emoji_id)
@@ -0,0 +1,28 @@
+-- Table: cogs.logger_leases
+
+-- DROP TABLE cogs.logger_leases;
+
+CREATE TABLE cogs.logger_leases
+(
+    channel_id bigint NOT NULL,
+    worker_id text COLLATE pg_catalog."default",
+    leased_until timestamp with time zone,
+    heartbeat_at timestamp with time zone,
+    attempts integer NOT NULL DEFAULT 0,
+    created_at timestamp with time zone NOT NULL DEFAULT now(),
+    priority double precision NOT NULL DEFAULT 0,
+    CONSTRAINT logger_leases_pkey PRIMARY KEY (channel_id)
+)
+
+TABLESPACE pg_default;
+
+ALTER TABLE cogs.logger_leases
+    OWNER to masaryk;
+-- Index: logger_leases_idx_leased_until
+
+-- DROP INDEX cogs.logger_leases_idx_leased_until;
+
+CREATE INDEX logger_leases_idx_leased_until
+    ON cogs.logger_leases USING btree
+    (leased_until ASC NULLS FIRST, priority DESC)
+    TABLESPACE pg_default;
@@ -0,0 +1,16 @@
+-- Table: cogs.logger_thread_cursors
+
+-- DROP TABLE cogs.logger_thread_cursors;
+
+CREATE TABLE cogs.logger_thread_cursors
+(
+    channel_id bigint NOT NULL,
+    archived_until timestamp with time zone NOT NULL,
+    updated_at timestamp with time zone NOT NULL DEFAULT now(),
+    CONSTRAINT logger_thread_cursors_pkey PRIMARY KEY (channel_id)
+)
+
+TABLESPACE pg_default;
+
+ALTER TABLE cogs.logger_thread_cursors
+    OWNER to masaryk;
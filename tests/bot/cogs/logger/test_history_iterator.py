@@ -0,0 +1,113 @@
+import unittest
+import unittest.mock
+from datetime import datetime, timedelta
+
+import discord
+import inject
+from pytz import UTC
+
+import tests.helpers as helpers
+from bot.cogs.logger.history_iterator import HistoryIterator
+from bot.cogs.logger.processors import BackupSink
+from bot.db import LoggerRepository
+
+
+class HistoryIteratorTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.channel = helpers.MockTextChannel(id=10)
+        self.bot = helpers.MockBot()
+        self.bot.get_channel.return_value = None
+        self.bot.get_guild.return_value = None
+        self.bot.fetch_channel = unittest.mock.AsyncMock(return_value=self.channel)
+        self.logger_repository = unittest.mock.AsyncMock()
+        self.logger_repository.find_updatable_processes.return_value = [
+            LoggerRepository.UpdatableProcesses(10, datetime(2022, 1, 1, tzinfo=UTC))
+        ]
+        self.channel_repository = unittest.mock.AsyncMock()
+        self.channel_repository.find_guild_ids.return_value = {}
+        self.lease_repository = unittest.mock.AsyncMock()
+        self.lease_repository.claim.side_effect = [[10], []]
+
+        def setup_injections(binder: inject.Binder) -> None:
+            binder.bind(LoggerRepository, self.logger_repository)
+            binder.bind(BackupSink, unittest.mock.AsyncMock())
+
+        inject.clear_and_configure(setup_injections)
+
+    def _history_iterator(self) -> HistoryIterator:
+        return HistoryIterator(
+            self.bot,
+            logger_repository=self.logger_repository,
+            channel_repository=self.channel_repository,
+            lease_repository=self.lease_repository,
+            worker_id="worker",
+            lease=timedelta(minutes=5)
+        )
+
+    async def test_iterate_claims_and_releases_channels(self) -> None:
+        weeks = []
+        async for week in self._history_iterator():
+            week.done = True
+            weeks.append(week)
+
+        self.assertEqual([self.channel], [week.channel for week in weeks])
+        self.lease_repository.enqueue.assert_called_once_with([10])
+        self.lease_repository.release.assert_called_once_with("worker", 10)
+        self.lease_repository.unlease.assert_not_called()
+
+    async def test_iterate_given_failed_backup_returns_channel_to_queue(self) -> None:
+        self.lease_repository.claim.side_effect = [[10, 11]]
+        self.bot.fetch_channel.side_effect = [self.channel, helpers.MockTextChannel(id=11)]
+        history = self._history_iterator()
+
+        with self.assertRaises(RuntimeError):
+            try:
+                async for _week in history:
+                    raise RuntimeError("backup failed")
+            finally:
+                await history.aclose()
+
+        self.lease_repository.release.assert_not_called()
+        self.assertEqual([unittest.mock.call("worker", [10]), unittest.mock.call("worker", [11], attempted=False)],
+                         self.lease_repository.unlease.call_args_list)
+
+    async def test_iterate_given_deleted_channel_marks_it_deleted_and_releases_it(self) -> None:
+        self.bot.fetch_channel.side_effect = discord.NotFound(unittest.mock.MagicMock(), "unknown channel")
+
+        weeks = [week async for week in self._history_iterator()]
+
+        self.assertEqual([], weeks)
+        self.channel_repository.soft_delete_many.assert_called_once_with([10])
+        self.lease_repository.release.assert_called_once_with("worker", 10)
+
+    async def test_iterate_given_cached_channel_does_not_fetch_it(self) -> None:
+        self.bot.get_channel.side_effect = {10: self.channel}.get
+
+        weeks = [week async for week in self._history_iterator()]
+
+        self.assertEqual([self.channel], [week.channel for week in weeks])
+        self.bot.fetch_channel.assert_not_called()
+
+    async def test_resolve_channels_given_channels_missing_from_cached_guild_deletes_them_at_once(self) -> None:
+        self.bot.get_channel.side_effect = {10: self.channel}.get
+        self.bot.get_guild.return_value = helpers.MockGuild(unavailable=False)
+        self.channel_repository.find_guild_ids.return_value = {11: 1, 12: 1}
+
+        channels = await self._history_iterator().resolve_channels([11, 10, 12])
+
+        self.assertEqual([self.channel], channels)
+        self.bot.fetch_channel.assert_not_called()
+        self.channel_repository.soft_delete_many.assert_called_once_with([11, 12])
+        self.assertEqual([unittest.mock.call("worker", 11), unittest.mock.call("worker", 12)],
+                         self.lease_repository.release.call_args_list)
+
+    async def test_keep_lease_given_failed_heartbeat_keeps_renewing(self) -> None:
+        self.lease_repository.heartbeat.side_effect = [RuntimeError("unexpected"), []]
+        message_iterator = unittest.mock.Mock()
+        history = self._history_iterator()
+        history.lease = timedelta(seconds=0.03)
+
+        await history._keep_lease(10, message_iterator)
+
+        self.assertEqual(2, self.lease_repository.heartbeat.call_count)
+        message_iterator.stop.assert_called_once()
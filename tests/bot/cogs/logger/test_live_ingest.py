@@ -0,0 +1,69 @@
+import unittest
+import unittest.mock
+from datetime import datetime
+
+import discord
+from freezegun import freeze_time
+from pytz import UTC
+
+from bot.cogs.logger.live_ingest import LiveIngest
+from bot.db import DatabaseUnavailable, ReactionDelta
+from bot.utils import get_emoji_id
+
+
+class LiveIngestTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.sink = unittest.mock.AsyncMock()
+        self.emoji_backup = unittest.mock.AsyncMock()
+        self.reaction_repository = unittest.mock.AsyncMock()
+        self.logger_repository = unittest.mock.AsyncMock()
+        self.live_ingest = LiveIngest(
+            message_backup=unittest.mock.AsyncMock(),
+            emoji_backup=self.emoji_backup,
+            message_repository=unittest.mock.AsyncMock(),
+            reaction_repository=self.reaction_repository,
+            logger_repository=self.logger_repository,
+            sink=self.sink
+        )
+
+    async def test_on_reaction_given_unicode_emoji_adds_delta(self) -> None:
+        payload = unittest.mock.MagicMock(
+            guild_id=1, message_id=2, user_id=3, event_type='REACTION_ADD', emoji=discord.PartialEmoji(name="👍")
+        )
+
+        await self.live_ingest.on_reaction(payload)
+
+        self.emoji_backup.traverse_up.assert_called_once_with("👍")
+        self.sink.add.assert_called_once_with(
+            self.reaction_repository, ReactionDelta(2, get_emoji_id("👍"), 3, added=True), 'apply_deltas'
+        )
+
+    async def test_flush_covers_channels_with_live_messages(self) -> None:
+        with freeze_time(datetime(2022, 10, 1, 12, 0, tzinfo=UTC)):
+            await self.live_ingest.restart()
+        await self.live_ingest.on_message(unittest.mock.MagicMock(channel=unittest.mock.MagicMock(id=10)))
+
+        with freeze_time(datetime(2022, 10, 1, 12, 5, tzinfo=UTC)):
+            await self.live_ingest.flush()
+            await self.live_ingest.flush()
+
+        self.logger_repository.cover_many.assert_called_once_with([
+            (10, datetime(2022, 10, 1, 12, 0, tzinfo=UTC), datetime(2022, 10, 1, 12, 5, tzinfo=UTC))
+        ])
+
+    async def test_flush_given_failed_write_does_not_cover_channels(self) -> None:
+        with freeze_time(datetime(2022, 10, 1, 12, 0, tzinfo=UTC)):
+            await self.live_ingest.restart()
+        await self.live_ingest.on_message(unittest.mock.MagicMock(channel=unittest.mock.MagicMock(id=10)))
+        self.sink.flush.side_effect = [DatabaseUnavailable("database is down"), None]
+
+        with freeze_time(datetime(2022, 10, 1, 12, 5, tzinfo=UTC)):
+            with self.assertRaises(DatabaseUnavailable):
+                await self.live_ingest.flush()
+            self.logger_repository.cover_many.assert_not_called()
+
+            await self.live_ingest.flush()
+
+        self.logger_repository.cover_many.assert_called_once_with([
+            (10, datetime(2022, 10, 1, 12, 0, tzinfo=UTC), datetime(2022, 10, 1, 12, 5, tzinfo=UTC))
+        ])
@@ -10,7 +10,7 @@ from discord.ext import commands
 import bot.db
 import tests.helpers as helpers
 from bot.cogs import logger
-from bot.cogs.logger.processors import setup_injections
+from bot.cogs.logger.processors import setup_injections as setup_processor_injections
 from tests.bot.utils import mock_database
 
 
@@ -18,7 +18,6 @@ from tests.bot.utils import mock_database
 class LoggerTests(unittest.IsolatedAsyncioTestCase):
     def setUp(self) -> None:
         self.bot = helpers.MockBot(guilds=[guild])
-        self.cog = logger.LoggerCog(self.bot)
         self.logger_repository = unittest.mock.AsyncMock()
         self.message_emoji_repository = unittest.mock.AsyncMock()
 
@@ -28,30 +27,35 @@ class LoggerTests(unittest.IsolatedAsyncioTestCase):
         message_iterator_history.return_value = helpers.AsyncIterator([message1, message2])
         self.logger_repository.find_updatable_processes = unittest.mock.AsyncMock(return_value=[])
         self._mock_injections()
+        self.cog = logger.LoggerCog(self.bot)
 
         await self.cog._backup()
 
         self.assertEqual(1, self._get_insert_call_count(bot.db.GuildRepository))
         self.assertEqual(2, self._get_insert_call_count(bot.db.UserRepository))
         self.assertEqual(1, self._get_insert_call_count(bot.db.RoleRepository))
-        self.assertEqual(1, self._get_insert_call_count(bot.db.EmojiRepository))
+        self.assertEqual(4, self._get_insert_call_count(bot.db.EmojiRepository))
         self.assertEqual(1, self._get_insert_call_count(bot.db.CategoryRepository))
         self.assertEqual(2, self._get_insert_call_count(bot.db.ChannelRepository))
         self.assertEqual(2, self._get_insert_call_count(bot.db.MessageRepository))
         self.assertEqual(3, self._get_insert_call_count(bot.db.MessageEmojiRepository))
-        self.assertEqual(1, self._get_insert_call_count(bot.db.ReactionRepository))
+        self.assertEqual(2, self._get_insert_call_count(bot.db.ReactionRepository, 'apply_deltas'))
         self.assertEqual(1, self._get_insert_call_count(bot.db.AttachmentRepository))
 
 
     @staticmethod
-    def _get_insert_call_count(repo: Any) -> int:
-        return cast(unittest.mock.AsyncMock, inject.instance(repo).insert).call_count
+    def _get_insert_call_count(repo: Any, bulk_method: str = 'insert_many') -> int:
+        repository = inject.instance(repo)
+        inserted = cast(unittest.mock.AsyncMock, repository.insert).call_count
+        for call in cast(unittest.mock.AsyncMock, getattr(repository, bulk_method)).call_args_list:
+            inserted += len(call.args[0])
+        return inserted
 
 
     def _mock_injections(self) -> None:
         def setup_injections(binder: inject.Binder) -> None:
             binder.install(mock_database)
-            binder.install(setup_injections)
+            binder.install(setup_processor_injections)
             binder.bind(commands.Bot, self.bot)
             binder.bind(bot.db.LoggerRepository, self.logger_repository)
         inject.clear_and_configure(setup_injections)
@@ -110,6 +114,7 @@ guild.emojis = [emoji1]
 uncategorized_channel = helpers.MockTextChannel(
     id=5123,
     name='uncategories',
+    type=discord.ChannelType.text,
     created_at=datetime(2010, 11, 10, 15, 33, 00),
     category=None,
     guild=guild
@@ -123,12 +128,15 @@ category = helpers.MockCategoryChannel(
 categorised_channel = helpers.MockTextChannel(
     id=5456,
     name='categorised',
+    type=discord.ChannelType.text,
     created_at=datetime(2010, 11, 10, 15, 33, 00),
     category=category,
     guild=guild
 )
 category.text_channels = [categorised_channel]
+category.channels = [categorised_channel]
 guild.text_channels = [uncategorized_channel, categorised_channel]
+guild.channels = [uncategorized_channel, category, categorised_channel]
 guild.categories = [category]
 
 # messages
@@ -154,7 +162,8 @@ categorised_channel.history = unittest.mock.MagicMock(return_value=helpers.Async
 reaction1 = helpers.MockReaction(
     emoji=emoji1,
     message=message1,
-    count=4
+    count=2,
+    users=[member1, member2]
 )
 message1.reactions = [reaction1]
 
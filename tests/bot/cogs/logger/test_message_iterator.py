@@ -1,6 +1,7 @@
 import unittest
 import unittest.mock
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Callable, List
 
 import inject
 from discord.utils import time_snowflake
@@ -8,7 +9,8 @@ from freezegun import freeze_time
 from pytz import UTC
 
 import bot.db
-from bot.cogs.logger.message_iterator import MessageIterator
+from bot.cogs.logger.processors import BackupSink
+from bot.cogs.logger.message_iterator import CHECKPOINT_EVERY, MessageIterator
 import tests.helpers as helpers
 from bot.db import LoggerEntity
 
@@ -18,6 +20,8 @@ class MessageIteratorTests(unittest.IsolatedAsyncioTestCase):
         self.channel = helpers.MockTextChannel(id=10, created_at=datetime(2020, 10, 1, 12, 22, tzinfo=UTC))
         self.channel.last_message_id = time_snowflake(datetime(2022, 10, 1, 12, 22, tzinfo=UTC))
         self.logger_repository = unittest.mock.AsyncMock()
+        self.logger_repository.find_first_process.return_value = None
+        self.logger_repository.find_next_process.return_value = None
 
     async def test_get_next_from_date_given_new_channel_returns_created_at_date(self) -> None:
         self.logger_repository.find_last_process.return_value = None
@@ -56,7 +60,7 @@ class MessageIteratorTests(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(datetime(2020, 10, 1, 12, 22, tzinfo=UTC), date)
 
     @freeze_time(datetime(2022, 10, 12, 11, 30, tzinfo=UTC))
-    async def test_history_given_finished_process_loads_next_1000(self) -> None:
+    async def test_history_given_finished_process_loads_window_growing_with_backlog(self) -> None:
         self.logger_repository.find_last_process.return_value = LoggerEntity(
             1,
             datetime(2020, 9, 1, 9, 22, tzinfo=UTC),
@@ -69,9 +73,82 @@ class MessageIteratorTests(unittest.IsolatedAsyncioTestCase):
         await iterator.history()
 
         self.channel.history.assert_has_calls([
-            unittest.mock.call(after=datetime(2020, 9, 25, 9, 22, tzinfo=UTC), limit=1_000)
+            unittest.mock.call(after=datetime(2020, 9, 25, 9, 22, tzinfo=UTC), before=None, limit=37_350)
         ])
 
+    @freeze_time(datetime(2022, 10, 12, 11, 30, tzinfo=UTC))
+    async def test_history_given_checkpointed_process_resumes_after_checkpoint(self) -> None:
+        self.logger_repository.find_last_process.return_value = LoggerEntity(
+            1,
+            datetime(2022, 9, 1, 9, 22, tzinfo=UTC),
+            datetime(2022, 9, 25, 9, 22, tzinfo=UTC),
+            None
+        )
+        self._mock_injections()
+
+        iterator = MessageIterator(self.channel)
+        await iterator.history()
+
+        self.logger_repository.begin_process.assert_called_once_with((10, datetime(2022, 9, 1, 9, 22, tzinfo=UTC)))
+        self.channel.history.assert_has_calls([
+            unittest.mock.call(after=datetime(2022, 9, 25, 9, 22, tzinfo=UTC), before=None, limit=1_000)
+        ])
+
+    @freeze_time(datetime(2022, 10, 12, 11, 30, tzinfo=UTC))
+    async def test_history_given_gap_before_live_window_fills_only_gap(self) -> None:
+        self.logger_repository.find_last_process.return_value = LoggerEntity(
+            1,
+            datetime(2020, 10, 1, 12, 22, tzinfo=UTC),
+            datetime(2022, 10, 1, 8, 0, tzinfo=UTC),
+            datetime(2022, 10, 1, 8, 0, tzinfo=UTC)
+        )
+        self.logger_repository.find_first_process.return_value = LoggerEntity(
+            1,
+            datetime(2020, 10, 1, 12, 22, tzinfo=UTC),
+            datetime(2022, 10, 1, 8, 0, tzinfo=UTC),
+            datetime(2022, 10, 1, 8, 0, tzinfo=UTC)
+        )
+        self.logger_repository.find_next_process.return_value = LoggerEntity(
+            1,
+            datetime(2022, 10, 11, 9, 0, tzinfo=UTC),
+            datetime(2022, 10, 12, 11, 0, tzinfo=UTC),
+            datetime(2022, 10, 12, 11, 0, tzinfo=UTC)
+        )
+        self.channel.history = unittest.mock.MagicMock(side_effect=self._history([]))
+        self._mock_injections()
+
+        iterator = MessageIterator(self.channel)
+        actual = [message async for message in await iterator.history()]
+
+        self.assertEqual([], actual)
+        self.channel.history.assert_called_once_with(
+            after=datetime(2022, 10, 1, 8, 0, tzinfo=UTC), before=datetime(2022, 10, 11, 9, 0, tzinfo=UTC), limit=1_000
+        )
+        self.logger_repository.end_process.assert_called_once_with(
+            (10, datetime(2022, 10, 1, 8, 0, tzinfo=UTC), datetime(2022, 10, 11, 9, 0, tzinfo=UTC))
+        )
+
+    @freeze_time(datetime(2022, 10, 12, 11, 30, tzinfo=UTC))
+    async def test_iterate_checkpoints_progress(self) -> None:
+        self.logger_repository.find_last_process.return_value = None
+        messages = [
+            helpers.MockMessage(created_at=datetime(2021, 1, 1, tzinfo=UTC) + timedelta(minutes=i))
+            for i in range(CHECKPOINT_EVERY + 1)
+        ]
+        self.channel.history = unittest.mock.MagicMock(side_effect=self._history(messages))
+        self._mock_injections()
+
+        iterator = MessageIterator(self.channel)
+        actual = [message async for message in await iterator.history()]
+
+        self.assertEqual(messages, actual)
+        self.logger_repository.checkpoint_process.assert_called_once_with(
+            (10, datetime(2020, 10, 1, 12, 22, tzinfo=UTC), messages[CHECKPOINT_EVERY - 1].created_at)
+        )
+        self.logger_repository.end_process.assert_called_once_with(
+            (10, datetime(2020, 10, 1, 12, 22, tzinfo=UTC), messages[-1].created_at)
+        )
+
     @freeze_time(datetime(2020, 10, 2, 12, 22, tzinfo=UTC))
     async def test_history_given_task_finished_today_does_not_backup_future(self) -> None:
         self.logger_repository.find_last_process.return_value = LoggerEntity(
@@ -86,8 +163,17 @@ class MessageIteratorTests(unittest.IsolatedAsyncioTestCase):
 
         self.channel.history.assert_not_called()
 
+    @staticmethod
+    def _history(messages: List[helpers.MockMessage]) -> Callable[..., AsyncIterator[helpers.MockMessage]]:
+        async def history(**_kwargs: object) -> AsyncIterator[helpers.MockMessage]:
+            for message in messages:
+                yield message
+
+        return history
+
     def _mock_injections(self) -> None:
         def setup_injections(binder: inject.Binder) -> None:
             binder.bind(bot.db.LoggerRepository, self.logger_repository)
+            binder.bind(BackupSink, unittest.mock.AsyncMock())
 
         inject.clear_and_configure(setup_injections)
@@ -0,0 +1,41 @@
+import asyncio
+import unittest
+import unittest.mock
+from typing import AsyncIterator, List
+
+from bot.cogs.logger.processors import MessagePipeline
+
+
+async def iterate(items: List[int]) -> AsyncIterator[int]:
+    for item in items:
+        yield item
+
+
+class MessagePipelineTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.backed_up: List[int] = []
+        self.message_backup = unittest.mock.AsyncMock()
+        self.message_backup.traverse_down.side_effect = self._traverse_down
+        self.pipeline = MessagePipeline(
+            message_backup=self.message_backup, sink=unittest.mock.AsyncMock(), workers=3, queue_size=2
+        )
+
+    async def _traverse_down(self, item: int) -> None:
+        await asyncio.sleep(0.001 * (item % 3))
+        if item < 0:
+            raise ValueError("cannot backup")
+        self.backed_up.append(item)
+
+    async def test_run_backs_up_all_messages_concurrently(self) -> None:
+        await self.pipeline.run(iterate(list(range(20))))
+
+        self.assertEqual(list(range(20)), sorted(self.backed_up))
+        self.assertEqual(20, self.pipeline.fetch_metrics.processed)
+        self.assertEqual(20, self.pipeline.backup_metrics.processed)
+        self.assertLessEqual(self.pipeline.backup_metrics.max_queue_depth, 2)
+
+    async def test_run_given_failing_message_raises(self) -> None:
+        with self.assertRaises(ValueError):
+            await self.pipeline.run(iterate([1, 2, -1, 4, 5, 6, 7, 8]))
+
+        self.assertEqual(1, self.pipeline.backup_metrics.errors)
@@ -0,0 +1,53 @@
+import unittest
+import unittest.mock
+
+import tests.helpers as helpers
+from bot.cogs.logger.processors import BackupSink, ReactionBackup
+from bot.db import ReactionDelta, ReactionMapper
+from bot.utils import get_emoji_id
+
+
+class ReactionBackupTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.message = helpers.MockMessage(id=100, channel=helpers.MockTextChannel(id=10))
+        self.emoji = helpers.MockEmoji(id=5)
+        self.reaction_repository = unittest.mock.AsyncMock()
+        self.reaction_repository.find_members_from.return_value = [(100, get_emoji_id(self.emoji), [1, 2])]
+        self.sink = unittest.mock.AsyncMock(spec=BackupSink)
+        self.reaction_backup = ReactionBackup(
+            reaction_repository=self.reaction_repository, mapper=ReactionMapper(), sink=self.sink
+        )
+
+    async def test_backup_given_unchanged_count_does_not_fetch_users(self) -> None:
+        reaction = helpers.MockReaction(message=self.message, emoji=self.emoji, count=2)
+
+        await self.reaction_backup.backup(reaction)
+
+        reaction.users.assert_not_called()
+        self.sink.add.assert_not_called()
+
+    async def test_backup_given_changed_count_stores_deltas(self) -> None:
+        users = [helpers.MockUser(id=2), helpers.MockUser(id=3), helpers.MockUser(id=4)]
+        reaction = helpers.MockReaction(message=self.message, emoji=self.emoji, count=3, users=users)
+
+        await self.reaction_backup.backup(reaction)
+
+        emoji_id = get_emoji_id(self.emoji)
+        self.assertCountEqual([
+            unittest.mock.call(self.reaction_repository, ReactionDelta(100, emoji_id, 3, True), 'apply_deltas'),
+            unittest.mock.call(self.reaction_repository, ReactionDelta(100, emoji_id, 4, True), 'apply_deltas'),
+            unittest.mock.call(self.reaction_repository, ReactionDelta(100, emoji_id, 1, False), 'apply_deltas'),
+        ], self.sink.add.call_args_list)
+        self.reaction_repository.find_members_from.assert_called_once()
+
+    async def test_backup_given_unwritten_deltas_keeps_stored_members(self) -> None:
+        users = [helpers.MockUser(id=1), helpers.MockUser(id=2), helpers.MockUser(id=3)]
+        reaction = helpers.MockReaction(message=self.message, emoji=self.emoji, count=3, users=users)
+
+        await self.reaction_backup.backup(reaction)
+        await self.reaction_backup.backup(reaction)
+        self.assertEqual(2, self.sink.add.call_count)
+
+        self.sink.when_written.call_args.args[0]()
+        await self.reaction_backup.backup(reaction)
+        self.assertEqual(2, self.sink.add.call_count)
@@ -0,0 +1,74 @@
+import unittest
+import unittest.mock
+from datetime import datetime, timedelta
+
+from pytz import UTC
+
+import tests.helpers as helpers
+from bot.cogs.logger.scheduler import ApiBudget, BackupScheduler, ChannelSchedule
+from bot.db import ChannelProgress
+
+NOW = datetime(2022, 11, 10, 12, 0, tzinfo=UTC)
+
+
+class ChannelScheduleTests(unittest.TestCase):
+    def test_is_due_given_no_new_messages_returns_false(self) -> None:
+        schedule = ChannelSchedule(1, covered_until=NOW - timedelta(days=300), last_message_at=NOW - timedelta(days=301))
+
+        self.assertFalse(schedule.is_due(NOW, timedelta(days=7)))
+
+    def test_is_due_given_busy_channel_returns_true_within_hours(self) -> None:
+        schedule = ChannelSchedule(1, covered_until=NOW - timedelta(hours=3))
+        for minute in range(600):
+            schedule.record_message(NOW - timedelta(minutes=minute))
+
+        self.assertTrue(schedule.is_due(NOW, timedelta(days=7)))
+
+    def test_is_due_given_quiet_channel_waits_for_max_staleness(self) -> None:
+        schedule = ChannelSchedule(1, covered_until=NOW - timedelta(days=3), last_message_at=NOW - timedelta(days=1))
+
+        self.assertFalse(schedule.is_due(NOW, timedelta(days=7)))
+        self.assertTrue(schedule.is_due(NOW + timedelta(days=4), timedelta(days=7)))
+
+
+class BackupSchedulerTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.logger_repository = unittest.mock.AsyncMock()
+        self.lease_repository = unittest.mock.AsyncMock()
+        self.scheduler = BackupScheduler(
+            logger_repository=self.logger_repository, lease_repository=self.lease_repository,
+            pipeline=unittest.mock.AsyncMock(), sink=unittest.mock.AsyncMock(), requests_per_minute=10
+        )
+
+    async def test_queue_ranks_active_channels_first(self) -> None:
+        channels = {
+            1: helpers.MockTextChannel(id=1, last_message_id=None),
+            2: helpers.MockTextChannel(id=2, last_message_id=None),
+        }
+        bot = helpers.MockBot()
+        bot.get_channel.side_effect = channels.get
+        self.logger_repository.find_channel_progress.return_value = [
+            ChannelProgress(1, NOW - timedelta(days=30), False),
+            ChannelProgress(2, NOW - timedelta(days=1), False),
+        ]
+        await self.scheduler.refresh(bot)
+        for minute in range(500):
+            self.scheduler.channels[2].record_message(NOW - timedelta(minutes=minute))
+
+        queue = self.scheduler.queue(NOW)
+
+        self.assertEqual([2, 1], [queued.schedule.channel_id for queued in queue])
+        self.assertEqual(timedelta(), queue[0].eta)
+
+    async def test_work_given_spent_budget_claims_nothing(self) -> None:
+        self.scheduler.budget.spend(self.scheduler.budget.available)
+
+        self.assertEqual(0, await self.scheduler.work(helpers.MockBot()))
+        self.lease_repository.claim.assert_not_called()
+
+
+class ApiBudgetTests(unittest.TestCase):
+    def test_time_for_given_more_requests_than_available_waits_for_refill(self) -> None:
+        budget = ApiBudget(per_minute=10, burst=5)
+
+        self.assertAlmostEqual(2.0, budget.time_for(25) / timedelta(minutes=1), places=2)
@@ -0,0 +1,62 @@
+import unittest
+import unittest.mock
+from typing import List
+
+import asyncpg
+
+from bot.cogs.logger.processors import BackupSink
+from bot.db import DatabaseUnavailable
+
+
+class BackupSinkTests(unittest.IsolatedAsyncioTestCase):
+    async def test_flush_given_failed_write_keeps_rows_and_raises(self) -> None:
+        repository = unittest.mock.AsyncMock()
+        repository.insert_many.side_effect = [DatabaseUnavailable("database is down"), None]
+        sink = BackupSink(max_delay=60)
+        await sink.add(repository, 1)
+        await sink.add(repository, 2)
+
+        with self.assertRaises(DatabaseUnavailable):
+            await sink.flush()
+        self.assertEqual(2, sink.pending)
+
+        await sink.add(repository, 3)
+        await sink.close()
+
+        repository.insert_many.assert_called_with([1, 2, 3])
+        self.assertEqual(0, sink.pending)
+
+    async def test_when_written_given_failed_write_waits_for_written_rows(self) -> None:
+        repository = unittest.mock.AsyncMock()
+        repository.insert_many.side_effect = [DatabaseUnavailable("database is down"), None]
+        callback = unittest.mock.Mock()
+        sink = BackupSink(max_delay=60)
+        await sink.add(repository, 1)
+        sink.when_written(callback)
+
+        with self.assertRaises(DatabaseUnavailable):
+            await sink.flush()
+        callback.assert_not_called()
+
+        await sink.close()
+        callback.assert_called_once()
+
+    async def test_flush_given_invalid_row_drops_only_that_row(self) -> None:
+        written = []
+
+        async def insert_many(entities: List[int]) -> None:
+            if 3 in entities:
+                raise asyncpg.ForeignKeyViolationError("row references a missing row")
+            written.extend(entities)
+
+        repository = unittest.mock.AsyncMock()
+        repository.insert_many.side_effect = insert_many
+        sink = BackupSink(max_delay=60)
+        for entity in range(1, 6):
+            await sink.add(repository, entity)
+
+        await sink.flush()
+
+        self.assertEqual([1, 2, 4, 5], written)
+        self.assertEqual(0, sink.pending)
+        self.assertEqual(1, sink.metrics.errors)
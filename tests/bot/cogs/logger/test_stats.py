@@ -0,0 +1,69 @@
+import asyncio
+import logging
+import unittest
+import unittest.mock
+from types import SimpleNamespace
+from typing import Any
+
+from bot.cogs.logger.processors import BackupSink
+from bot.cogs.logger.processors._stage import StageMetrics
+from bot.cogs.logger.stats import HTTP_TRACE, BackupStats, Totals, StatsReport
+
+
+class BackupStatsTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.pipeline = unittest.mock.Mock(fetch_metrics=StageMetrics("fetch"))
+        self.scheduler = unittest.mock.Mock()
+        self.scheduler.queue.return_value = []
+        self.stats = BackupStats(pipeline=self.pipeline, sink=BackupSink(), scheduler=self.scheduler)
+
+    def test_rate_limit_handler_counts_429_responses(self) -> None:
+        fmt = 'We are being rate limited. %s %s responded with 429. Retrying in %.2f seconds.'
+        for (msg, args) in [
+            (fmt, ('GET', '/channels/1/messages', 1.5)),
+            ('Global rate limit has been hit. Retrying in %.2f seconds.', (1.5,)),
+            (fmt, ('GET', '/channels/1/messages', 0.5)),
+        ]:
+            self.stats._handler.handle(logging.LogRecord('discord.http', logging.WARNING, __file__, 0, msg, args, None))
+
+        self.assertEqual(2, self.stats.rate_limited)
+
+    def test_report_between_totals_computes_rates(self) -> None:
+        report = StatsReport.between(Totals(10.0, 0, 0, 0, 0, 0.0), Totals(20.0, 500, 6, 1200, 1, 2.5), [])
+
+        self.assertEqual(50.0, report.per_second(report.messages))
+        self.assertEqual(120.0, report.per_second(report.rows))
+        self.assertEqual(2.5, report.rate_limit_wait)
+
+    def test_log_report_given_no_progress_logs_nothing(self) -> None:
+        with self.assertNoLogs('bot.cogs.logger.stats'):
+            self.stats.log_report(unittest.mock.Mock())
+
+        self.pipeline.fetch_metrics.record(100, 1.0)
+        with self.assertLogs('bot.cogs.logger.stats'):
+            self.stats.log_report(unittest.mock.Mock())
+
+
+class CountedRequestTests(unittest.IsolatedAsyncioTestCase):
+    async def test_counted_request_measures_wait_without_response_time(self) -> None:
+        pipeline = unittest.mock.Mock(fetch_metrics=StageMetrics("fetch"))
+        stats = BackupStats(pipeline=pipeline, sink=BackupSink(), scheduler=unittest.mock.Mock())
+        bot = unittest.mock.Mock()
+
+        async def request(*_args: Any, **_kwargs: Any) -> None:
+            # the bucket is empty, discord.py sleeps before sending
+            await asyncio.sleep(0.2)
+            context = SimpleNamespace()
+            await HTTP_TRACE.on_request_start[0](unittest.mock.Mock(), context, None)
+            await asyncio.sleep(0.1)
+            await HTTP_TRACE.on_request_end[0](unittest.mock.Mock(), context, None)
+
+        bot.http.request = request
+        stats.attach(bot)
+        try:
+            await bot.http.request('GET', '/channels/1/messages')
+        finally:
+            stats.detach(bot)
+
+        self.assertEqual(1, stats.requests)
+        self.assertAlmostEqual(0.2, stats.rate_limit_wait, delta=0.05)
@@ -0,0 +1,76 @@
+import unittest
+import unittest.mock
+from typing import Any
+
+import tests.helpers as helpers
+from bot.cogs.logger.structure_sync import StructureSync
+from bot.db import DatabaseUnavailable
+
+
+def mock_backup() -> unittest.mock.AsyncMock:
+    backup = unittest.mock.AsyncMock()
+    backup.key = unittest.mock.Mock(side_effect=lambda obj: obj.id)
+    backup.fingerprint = unittest.mock.Mock(side_effect=lambda obj: obj.name)
+    return backup
+
+
+class StructureSyncTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.guild = helpers.MockGuild(id=10, name='guild', members=[], emojis=[], categories=[], channels=[],
+                                       threads=[])
+        self.role1 = helpers.MockRole(id=1, name='Admin', guild=self.guild)
+        self.role2 = helpers.MockRole(id=2, name='Member', guild=self.guild)
+        self.guild.roles = [self.role1, self.role2]
+        self.bot = helpers.MockBot(guilds=[self.guild])
+
+        self.backups: dict[str, Any] = {name: mock_backup() for name in (
+            'guild_backup', 'role_backup', 'user_backup', 'emoji_backup',
+            'category_backup', 'channel_backup', 'thread_backup'
+        )}
+        self.role_repository = unittest.mock.AsyncMock()
+        self.sink = unittest.mock.AsyncMock()
+        self.sync = StructureSync(
+            **self.backups, role_repository=self.role_repository, emoji_repository=unittest.mock.AsyncMock(),
+            category_repository=unittest.mock.AsyncMock(), channel_repository=unittest.mock.AsyncMock(),
+            thread_repository=unittest.mock.AsyncMock(), sink=self.sink
+        )
+
+    async def test_reconcile_given_unchanged_guild_writes_nothing(self) -> None:
+        await self.sync.reconcile(self.bot)
+        self.backups['role_backup'].traverse_up.reset_mock()
+
+        await self.sync.reconcile(self.bot)
+
+        self.backups['role_backup'].traverse_up.assert_not_called()
+        self.assertEqual(7, self.sync.stats.unchanged_tables)
+
+    async def test_reconcile_writes_changed_and_deletes_removed_rows(self) -> None:
+        await self.sync.reconcile(self.bot)
+        self.backups['role_backup'].traverse_up.reset_mock()
+
+        self.role1.name = 'Owner'
+        self.guild.roles = [self.role1]
+        await self.sync.reconcile(self.bot)
+
+        self.backups['role_backup'].traverse_up.assert_called_once_with(self.role1)
+        self.sink.add.assert_called_once_with(self.role_repository, 2, 'soft_delete_many')
+
+    async def test_reconcile_after_event_does_not_write_synced_row_again(self) -> None:
+        await self.sync.reconcile(self.bot)
+        self.role2.name = 'Members'
+        await self.sync.on_role_update(self.role2)
+        self.backups['role_backup'].traverse_up.reset_mock()
+
+        await self.sync.reconcile(self.bot)
+
+        self.backups['role_backup'].traverse_up.assert_not_called()
+
+    async def test_reconcile_given_failed_write_writes_rows_again(self) -> None:
+        self.sink.flush.side_effect = [DatabaseUnavailable("database is down"), None]
+        with self.assertRaises(DatabaseUnavailable):
+            await self.sync.reconcile(self.bot)
+        self.backups['role_backup'].traverse_up.reset_mock()
+
+        await self.sync.reconcile(self.bot)
+
+        self.assertEqual(2, self.backups['role_backup'].traverse_up.call_count)
@@ -0,0 +1,108 @@
+import unittest
+import unittest.mock
+from datetime import datetime, timedelta
+from typing import AsyncIterator, List
+
+from discord.utils import time_snowflake
+from pytz import UTC
+
+import tests.helpers as helpers
+from bot.cogs.logger.processors import ChannelBackup, ThreadBackup
+from bot.db import DatabaseUnavailable, LoggerEntity
+
+ARCHIVED_AT = datetime(2022, 11, 10, 12, 0, tzinfo=UTC)
+
+
+async def archived_threads(threads: List[helpers.MockThread]) -> AsyncIterator[helpers.MockThread]:
+    for thread in threads:
+        yield thread
+
+
+class ArchivedThreadsTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.threads = [
+            helpers.MockThread(id=i, archive_timestamp=ARCHIVED_AT - timedelta(days=i), last_message_id=None,
+                               archived=True)
+            for i in range(5)
+        ]
+        self.channel = helpers.MockTextChannel(id=10)
+        self.channel.archived_threads = unittest.mock.Mock(side_effect=lambda **_: archived_threads(self.threads))
+        self.thread_backup = unittest.mock.AsyncMock()
+        self.cursor_repository = unittest.mock.AsyncMock()
+        self.logger_repository = unittest.mock.AsyncMock()
+        self.processes = {
+            i: LoggerEntity(i, ARCHIVED_AT - timedelta(days=30), ARCHIVED_AT, ARCHIVED_AT) for i in range(5)
+        }
+        self.logger_repository.find_last_process.side_effect = self.processes.get
+        self.channel_backup = ChannelBackup(
+            channel_repository=unittest.mock.AsyncMock(), mapper=unittest.mock.Mock(),
+            thread_cursor_repository=self.cursor_repository, logger_repository=self.logger_repository,
+            sink=unittest.mock.AsyncMock()
+        )
+
+    async def test_traverse_archived_threads_stops_at_cursor(self) -> None:
+        self.cursor_repository.find_cursor.return_value = ARCHIVED_AT - timedelta(days=2)
+
+        await self.channel_backup._traverse_archived_threads(self.channel, thread_backup=self.thread_backup)
+
+        self.assertEqual([unittest.mock.call(self.threads[0]), unittest.mock.call(self.threads[1])],
+                         self.thread_backup.traverse_down.call_args_list)
+        self.cursor_repository.advance.assert_called_once_with(10, ARCHIVED_AT)
+
+    async def test_traverse_archived_threads_given_failed_write_keeps_cursor(self) -> None:
+        self.cursor_repository.find_cursor.return_value = ARCHIVED_AT - timedelta(days=2)
+        self.channel_backup.sink.flush.side_effect = DatabaseUnavailable("database is down")
+
+        with self.assertRaises(DatabaseUnavailable):
+            await self.channel_backup._traverse_archived_threads(self.channel, thread_backup=self.thread_backup)
+
+        self.cursor_repository.advance.assert_not_called()
+
+    async def test_traverse_archived_threads_given_no_new_threads_keeps_cursor(self) -> None:
+        self.cursor_repository.find_cursor.return_value = ARCHIVED_AT
+
+        await self.channel_backup._traverse_archived_threads(self.channel, thread_backup=self.thread_backup)
+
+        self.thread_backup.traverse_down.assert_not_called()
+        self.cursor_repository.advance.assert_not_called()
+
+    async def test_traverse_archived_threads_given_empty_window_stops_cursor_before_thread(self) -> None:
+        self.cursor_repository.find_cursor.return_value = ARCHIVED_AT - timedelta(days=3)
+        # the history of the thread was skipped, no window was started
+        del self.processes[1]
+
+        await self.channel_backup._traverse_archived_threads(self.channel, thread_backup=self.thread_backup)
+
+        self.cursor_repository.advance.assert_called_once_with(10, ARCHIVED_AT - timedelta(days=2))
+
+    async def test_traverse_archived_threads_given_window_cut_short_stops_cursor_before_thread(self) -> None:
+        self.cursor_repository.find_cursor.return_value = ARCHIVED_AT - timedelta(days=2)
+        self.threads[0].last_message_id = time_snowflake(ARCHIVED_AT - timedelta(hours=1))
+        self.processes[0] = LoggerEntity(0, ARCHIVED_AT - timedelta(days=30), ARCHIVED_AT - timedelta(days=20),
+                                         ARCHIVED_AT)
+
+        await self.channel_backup._traverse_archived_threads(self.channel, thread_backup=self.thread_backup)
+
+        self.cursor_repository.advance.assert_called_once_with(10, ARCHIVED_AT - timedelta(days=1))
+
+    async def test_traverse_archived_threads_given_oldest_thread_incomplete_keeps_cursor(self) -> None:
+        self.cursor_repository.find_cursor.return_value = ARCHIVED_AT - timedelta(days=2)
+        del self.processes[1]
+
+        await self.channel_backup._traverse_archived_threads(self.channel, thread_backup=self.thread_backup)
+
+        self.cursor_repository.advance.assert_not_called()
+
+
+class ThreadBackupTests(unittest.TestCase):
+    def test_is_complete_given_window_past_last_message_returns_true(self) -> None:
+        thread = helpers.MockThread(last_message_id=time_snowflake(ARCHIVED_AT), archived=True)
+        process = LoggerEntity(1, ARCHIVED_AT - timedelta(days=30), ARCHIVED_AT + timedelta(hours=1), ARCHIVED_AT)
+
+        self.assertTrue(ThreadBackup.is_complete(thread, process))
+
+    def test_is_complete_given_unfinished_window_returns_false(self) -> None:
+        thread = helpers.MockThread(last_message_id=time_snowflake(ARCHIVED_AT), archived=True)
+        process = LoggerEntity(1, ARCHIVED_AT - timedelta(days=30), ARCHIVED_AT + timedelta(hours=1), None)
+
+        self.assertFalse(ThreadBackup.is_complete(thread, process))
@@ -0,0 +1,68 @@
+import asyncio
+import random
+import unittest
+import unittest.mock
+from typing import List
+
+from bot.cogs.markov.model import MarkovModel, MarkovModels
+from bot.db.cogs import MarkovEntity
+
+
+class MarkovModelTests(unittest.TestCase):
+    def test_next_picks_follows_by_frequency(self) -> None:
+        model = MarkovModel.from_entities([MarkovEntity(1, 'ab', 'c', 1), MarkovEntity(1, 'ab', 'd', 3)],
+                                       context_size=2)
+        rng = random.Random(0)
+
+        picked = [model.next('xab', rng) for _ in range(4_000)]
+
+        self.assertAlmostEqual(0.75, picked.count('d') / len(picked), delta=0.05)
+
+    def test_generate_given_unknown_start_starts_from_empty_context(self) -> None:
+        model = MarkovModel(context_size=2)
+        model.train_message('hello')
+
+        self.assertEqual('hello', model.generate('xyz'))
+        self.assertEqual('hello', model.generate('he'))
+
+    def test_train_updates_cumulative_frequencies_and_size(self) -> None:
+        model = MarkovModel.from_entities([MarkovEntity(1, 'a', 'b', 2), MarkovEntity(1, 'a', 'c', 1)])
+        size = model.size
+
+        model.train('a', 'b')
+        model.train('a', 'd')
+
+        self.assertEqual(('bcd', [3, 4, 5]), (model._chains['a'][0], model._chains['a'][1].tolist()))
+        self.assertGreaterEqual(model.size, size)
+
+
+class MarkovModelsTests(unittest.IsolatedAsyncioTestCase):
+    async def test_get_evicts_least_recently_used_model_over_budget(self) -> None:
+        repository = unittest.mock.AsyncMock()
+        repository.find_chains.side_effect = lambda guild_id: [MarkovEntity(guild_id, '', 'a', 1)]
+        models = MarkovModels(markov_repository=repository, memory_budget=1)
+
+        first = await models.get(1)
+        self.assertIs(first, await models.get(1))
+        await models.get(2)
+        await models.get(1)
+
+        self.assertEqual(3, repository.find_chains.call_count)
+        self.assertEqual([1], list(models._models))
+
+    async def test_get_given_counts_trained_while_loading_applies_them(self) -> None:
+        repository = unittest.mock.AsyncMock()
+        models = MarkovModels(markov_repository=repository)
+
+        async def find_chains(guild_id: int) -> List[MarkovEntity]:
+            models.train_counts(guild_id, {('', 'b'): 2})
+            return [MarkovEntity(guild_id, '', 'a', 1)]
+
+        repository.find_chains.side_effect = find_chains
+
+        first, second = await asyncio.gather(models.get(1), models.get(1))
+
+        self.assertIs(first, second)
+        self.assertEqual(1, repository.find_chains.call_count)
+        self.assertEqual({'a', 'b'}, {first.next('', random.Random(seed)) for seed in range(20)})
+        self.assertEqual({}, models._loading)
@@ -0,0 +1,60 @@
+import unittest
+import unittest.mock
+from collections import Counter
+from typing import AsyncIterator, List, Tuple
+
+from bot.cogs.markov.training_service import MarkovTrainingService
+from bot.db import DatabaseUnavailable
+from bot.db.cogs import MarkovEntity
+
+
+async def pages(*pages: List[str]) -> AsyncIterator[List[unittest.mock.Mock]]:
+    for page in pages:
+        yield [unittest.mock.Mock(content=content) for content in page]
+
+
+class MarkovTrainingServiceTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.repository = unittest.mock.AsyncMock()
+        self.message_repository = unittest.mock.AsyncMock()
+        self.models = unittest.mock.Mock()
+        uow = unittest.mock.Mock()
+        uow.transaction.return_value = unittest.mock.AsyncMock()
+        self.service = MarkovTrainingService(message_repository=self.message_repository,
+                                             markov_repository=self.repository, uow=uow, models=self.models, workers=2)
+
+    async def test_train_merges_counts_of_all_shards(self) -> None:
+        self.message_repository.count.return_value = 3
+        self.repository.find_training_messages.return_value = pages(['aa', 'ab'], ['a'])
+
+        with unittest.mock.patch('bot.cogs.markov.training_service.SHARD_SIZE', 2):
+            await self.service.train(1)
+
+        merged: Counter[Tuple[str, str]] = Counter()
+        for call in self.repository.insert_many.call_args_list:
+            merged.update({(e.context, e.follows): e.frequency for e in call.args[0]})
+        self.assertEqual({('', 'a'): 3, ('a', 'a'): 1, ('a', 'b'): 1}, merged)
+        self.assertEqual(2, self.repository.insert_many.call_count)
+        self.models.evict.assert_called_with(1)
+
+    async def test_train_given_failed_merge_raises(self) -> None:
+        self.message_repository.count.return_value = 3
+        self.repository.find_training_messages.return_value = pages(['aa', 'ab'], ['a'])
+        self.repository.insert_many.side_effect = DatabaseUnavailable("database is down")
+
+        with unittest.mock.patch('bot.cogs.markov.training_service.SHARD_SIZE', 2):
+            with self.assertRaises(DatabaseUnavailable):
+                await self.service.train(1)
+
+        self.models.evict.assert_called_once_with()
+
+    async def test_train_messages_merges_counted_ngrams_at_once(self) -> None:
+        repository, models, service = self.repository, self.models, self.service
+
+        await service.train_messages([(1, 'aa'), (1, 'ab')])
+
+        repository.insert_many.assert_called_once()
+        entities = sorted(repository.insert_many.call_args.args[0], key=lambda e: (e.context, e.follows))
+        self.assertEqual([MarkovEntity(1, '', 'a', 2), MarkovEntity(1, 'a', 'a', 1), MarkovEntity(1, 'a', 'b', 1)],
+                         entities)
+        models.train_counts.assert_called_once_with(1, {('', 'a'): 2, ('a', 'a'): 1, ('a', 'b'): 1})
@@ -0,0 +1,56 @@
+import asyncio
+import unittest
+import unittest.mock
+from typing import List
+
+import asyncpg
+
+from bot.constants import DatabaseConfig
+from bot.db import DatabaseManager, PoolPartitions
+
+
+class DatabaseManagerTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.manager = DatabaseManager("postgres://localhost", DatabaseConfig(health_check_interval=3600))
+        self.connect_db = self.enterContext(unittest.mock.patch('bot.db.manager.connect_db'))
+        self.enterContext(unittest.mock.patch('bot.db.manager.backoff', return_value=0))
+        self.enterContext(unittest.mock.patch('bot.db.manager.BACKOFF_CAP', 0))
+
+    async def asyncTearDown(self) -> None:
+        if self.manager._task is not None:
+            self.manager._task.cancel()
+
+    async def test_start_given_unreachable_database_retries(self) -> None:
+        self.connect_db.side_effect = [OSError("connection refused"), PoolPartitions(unittest.mock.MagicMock())]
+
+        self.manager.start()
+        await asyncio.wait_for(self.manager.wait_available(), 1)
+
+        self.assertEqual(2, self.connect_db.call_count)
+
+    async def test_start_given_unexpected_error_logs_and_starts_over(self) -> None:
+        self.connect_db.side_effect = [asyncpg.InvalidPasswordError("wrong password"),
+                                       PoolPartitions(unittest.mock.MagicMock())]
+
+        with self.assertLogs('bot.db.manager', 'ERROR'):
+            self.manager.start()
+            await asyncio.wait_for(self.manager.wait_available(), 1)
+
+        self.assertTrue(self.manager.available)
+
+    async def test_ping_given_server_shutdown_marks_database_unavailable(self) -> None:
+        self.connect_db.return_value = PoolPartitions(unittest.mock.MagicMock())
+        self.manager.start()
+        await asyncio.wait_for(self.manager.wait_available(), 1)
+        pool = unittest.mock.MagicMock()
+        pool.acquire.side_effect = [asyncpg.AdminShutdownError("terminating connection"), unittest.mock.MagicMock()]
+        pool.expire_connections = unittest.mock.AsyncMock()
+        self.manager.partitions.replace(pool)
+        statuses: List[bool] = []
+        self.manager.on_status_change = statuses.append
+
+        self.assertFalse(await self.manager._ping())
+        await self.manager._recover()
+
+        self.assertEqual([False, True], statuses)
+        pool.expire_connections.assert_called_once()
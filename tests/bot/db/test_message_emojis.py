@@ -0,0 +1,37 @@
+import unittest
+
+import discord
+
+import tests.helpers as helpers
+from bot.db import MessageEmojiMapper
+from bot.utils import EmojiExtractor, MessageEmote
+
+
+class MessageEmojiMapperTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.emoji = helpers.MockEmoji(id=1054601880090705940, name='kek', guild_id=1)
+        self.extractor = EmojiExtractor()
+        self.extractor.rebuild([self.emoji])
+        self.mapper = MessageEmojiMapper(extractor=self.extractor)
+
+    def test_map_emojis_counts_unicode_and_custom_emojis(self) -> None:
+        message = helpers.MockMessage(
+            content="Hi 👍🏽 <:kek:1054601880090705940> 👨‍👩‍👧‍👦 <:kek:1054601880090705940> 👍🏽 <a:blob:42>"
+        )
+
+        emotes = self.mapper.map_emojis(message)
+
+        self.assertEqual((
+            MessageEmote(message, '👍🏽', 2),
+            MessageEmote(message, self.emoji, 2),
+            MessageEmote(message, '👨‍👩‍👧‍👦', 1),
+            MessageEmote(message, discord.PartialEmoji(name='blob', animated=True, id=42), 1),
+        ), emotes)
+
+    def test_update_guild_given_removed_emoji_resolves_partial_emoji(self) -> None:
+        self.extractor.update_guild(helpers.MockGuild(id=1), [])
+
+        (emoji, count), = self.extractor.extract("<:kek:1054601880090705940>").items()
+
+        self.assertIsInstance(emoji, discord.PartialEmoji)
+        self.assertEqual((1054601880090705940, 1), (emoji.id, count))
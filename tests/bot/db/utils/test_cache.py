@@ -0,0 +1,91 @@
+import asyncio
+import unittest
+import unittest.mock
+from typing import Any, List
+
+from freezegun import freeze_time
+
+from bot.db.utils import LruCache, cached, invalidates_cache
+from bot.db.utils.transaction import TransactionContext
+
+
+class Repository:
+    def __init__(self) -> None:
+        self._caches: dict[str, Any] = {}
+        self.calls: List[Any] = []
+
+    @cached(max_size=2, ttl=60)
+    async def find(self, key: int, conn: Any = None) -> int:
+        self.calls.append(key)
+        return key * 2
+
+    @invalidates_cache
+    async def insert(self, key: int) -> None:
+        pass
+
+
+class LruCacheTests(unittest.TestCase):
+    def test_get_given_missing_key_counts_miss(self) -> None:
+        cache: LruCache[str, int] = LruCache()
+
+        self.assertEqual((False, None), cache.get("key"))
+        self.assertEqual(1, cache.misses)
+
+    def test_set_given_full_cache_evicts_least_recently_used(self) -> None:
+        cache: LruCache[str, int] = LruCache(max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual((True, 1), cache.get("a"))
+        self.assertEqual((False, None), cache.get("b"))
+
+    def test_get_given_expired_entry_counts_miss(self) -> None:
+        cache: LruCache[str, int] = LruCache(ttl=10)
+        with freeze_time("2022-10-01 12:00:00") as frozen:
+            cache.set("a", 1)
+            frozen.tick(11)
+
+            self.assertEqual((False, None), cache.get("a"))
+        self.assertEqual(0, len(cache))
+
+
+class CachedTests(unittest.IsolatedAsyncioTestCase):
+    async def test_cached_given_same_arguments_calls_database_once(self) -> None:
+        repository = Repository()
+
+        self.assertEqual(4, await repository.find(2))
+        self.assertEqual(4, await repository.find(2))
+
+        self.assertEqual([2], repository.calls)
+
+    async def test_cached_given_explicit_connection_bypasses_cache(self) -> None:
+        repository = Repository()
+
+        await repository.find(2, conn=unittest.mock.Mock())
+        await repository.find(2, conn=unittest.mock.Mock())
+
+        self.assertEqual([2, 2], repository.calls)
+
+    async def test_invalidates_cache_given_write_clears_cached_results(self) -> None:
+        repository = Repository()
+
+        await repository.find(2)
+        await repository.insert(2)
+        await repository.find(2)
+
+        self.assertEqual([2, 2], repository.calls)
+
+    async def test_invalidates_cache_given_transaction_clears_cached_results_after_commit(self) -> None:
+        repository = Repository()
+        conn = unittest.mock.Mock(transaction=unittest.mock.Mock(return_value=unittest.mock.AsyncMock()))
+        metrics = unittest.mock.Mock(acquire_connection=unittest.mock.AsyncMock(return_value=conn))
+
+        async with TransactionContext(unittest.mock.AsyncMock(), metrics):
+            await repository.insert(2)
+            # tasks do not share the transaction, the row is cached before it is committed
+            await asyncio.create_task(repository.find(2))
+        await repository.find(2)
+
+        self.assertEqual([2, 2], repository.calls)
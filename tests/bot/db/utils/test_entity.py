@@ -0,0 +1,22 @@
+import unittest
+
+import tests.helpers as helpers
+from bot.db import MarkovEntity
+
+
+class EntityTests(unittest.TestCase):
+    def test_convert_given_columns_in_field_order_passes_them_positionally(self) -> None:
+        record = helpers.MockRecord(('guild_id', 'context', 'follows', 'frequency'), (1, 'ab', 'c', 3))
+
+        self.assertEqual(MarkovEntity(1, 'ab', 'c', 3), MarkovEntity.convert(record))
+
+    def test_convert_given_columns_out_of_order_passes_them_by_keyword(self) -> None:
+        record = helpers.MockRecord(('context', 'guild_id', 'follows'), ('ab', 1, 'c'))
+
+        self.assertEqual(MarkovEntity(1, 'ab', 'c'), MarkovEntity.convert(record))
+
+    def test_convert_many_given_unknown_column_raises(self) -> None:
+        record = helpers.MockRecord(('guild_id', 'context', 'follows', 'unknown'), (1, 'ab', 'c', 0))
+
+        with self.assertRaises(TypeError):
+            MarkovEntity.convert_many([record])
@@ -0,0 +1,69 @@
+import asyncio
+import unittest
+from typing import Any, List
+
+import tests.helpers as helpers
+from bot.db import MarkovEntity
+from bot.db.utils import Page
+
+
+class FakeCursor:
+    def __init__(self, count: int, delay: float = 0) -> None:
+        columns = ('guild_id', 'context', 'follows', 'frequency')
+        self.records = [helpers.MockRecord(columns, (1, str(i), 'a', 1)) for i in range(count)]
+        self.delay = delay
+        self.fetches: List[int] = []
+
+    async def fetch(self, n: int) -> List[Any]:
+        self.fetches.append(n)
+        await asyncio.sleep(self.delay)
+        rows, self.records = self.records[:n], self.records[n:]
+        return rows
+
+
+class PageTests(unittest.IsolatedAsyncioTestCase):
+    async def test_entities_yields_all_rows_in_order(self) -> None:
+        cursor = FakeCursor(125)
+        page = Page(cursor, MarkovEntity, per_page=50)  # type: ignore[arg-type]
+
+        contexts = [entity.context async for entity in page.entities()]
+
+        self.assertEqual([str(i) for i in range(125)], contexts)
+
+    async def test_next_batch_is_prefetched_while_consuming(self) -> None:
+        cursor = FakeCursor(200)
+        page = Page(cursor, MarkovEntity, per_page=50, prefetch=True)  # type: ignore[arg-type]
+
+        await anext(page)
+        await asyncio.sleep(0)
+
+        self.assertEqual(2, len(cursor.fetches))
+        await page.aclose()
+
+    async def test_batch_size_grows_when_consumer_waits_for_database(self) -> None:
+        cursor = FakeCursor(1_000, delay=0.01)
+        page = Page(cursor, MarkovEntity, per_page=10, max_per_page=40)  # type: ignore[arg-type]
+
+        async for _ in page:
+            pass
+
+        self.assertEqual(40, max(cursor.fetches))
+
+    async def test_without_prefetch_fetches_on_demand(self) -> None:
+        cursor = FakeCursor(200)
+        page = Page(cursor, MarkovEntity, per_page=50)  # type: ignore[arg-type]
+
+        await anext(page)
+        await asyncio.sleep(0)
+
+        self.assertEqual([50], cursor.fetches)
+
+    async def test_entities_given_early_stop_waits_for_prefetched_batch(self) -> None:
+        cursor = FakeCursor(200, delay=0.01)
+        page = Page(cursor, MarkovEntity, per_page=50, prefetch=True)  # type: ignore[arg-type]
+
+        entities = page.entities()
+        await anext(entities)
+        await entities.aclose()
+
+        self.assertIsNone(page._next)
@@ -0,0 +1,30 @@
+import unittest
+import unittest.mock
+
+from bot.db.utils.transaction import TransactionContext
+
+
+class TransactionContextTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.transaction = unittest.mock.AsyncMock()
+        self.conn = unittest.mock.Mock(transaction=unittest.mock.Mock(return_value=self.transaction))
+        self.pool = unittest.mock.AsyncMock()
+        self.metrics = unittest.mock.Mock(acquire_connection=unittest.mock.AsyncMock(return_value=self.conn))
+
+    async def test_commit_given_failed_commit_releases_connection(self) -> None:
+        self.transaction.commit.side_effect = ConnectionResetError("connection lost")
+
+        with self.assertRaises(ConnectionResetError):
+            async with TransactionContext(self.pool, self.metrics):
+                pass
+
+        self.pool.release.assert_called_once_with(self.conn)
+
+    async def test_rollback_given_failed_rollback_releases_connection(self) -> None:
+        self.transaction.rollback.side_effect = ConnectionResetError("connection lost")
+
+        with self.assertRaises(ConnectionResetError):
+            async with TransactionContext(self.pool, self.metrics):
+                raise ValueError("failed statement")
+
+        self.pool.release.assert_called_once_with(self.conn)
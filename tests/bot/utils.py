@@ -8,7 +8,9 @@ import bot.db
 
 
 def mock_database(binder: inject.Binder) -> None:
-    binder.bind(asyncpg.Pool, unittest.mock.MagicMock())
+    pool = unittest.mock.MagicMock()
+    binder.bind(asyncpg.Pool, pool)
+    binder.bind(bot.db.PoolPartitions, bot.db.PoolPartitions(pool))
 
     for repository in bot.db.discord.REPOSITORIES:
         binder.bind(repository, unittest.mock.AsyncMock())
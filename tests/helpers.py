@@ -362,6 +362,42 @@ class MockVoiceChannel(CustomMockMixin, unittest.mock.Mock, HashableMixin):
             self.mention = f"#{self.name}"
 
 
+# Create a Thread instance to get a realistic MagicMock of `discord.Thread`
+thread_data = {
+    'id': 1,
+    'guild_id': 1,
+    'parent_id': 1234567890,
+    'owner_id': 1,
+    'name': 'thread',
+    'type': 11,
+    'last_message_id': 1,
+    'message_count': 1,
+    'member_count': 1,
+    'rate_limit_per_user': 0,
+    'thread_metadata': {
+        'archived': False,
+        'auto_archive_duration': 1440,
+        'archive_timestamp': '2022-11-10T12:00:00+00:00',
+        'locked': False,
+    },
+}
+thread_instance = discord.Thread(guild=guild, state=state, data=thread_data)
+
+
+class MockThread(CustomMockMixin, unittest.mock.Mock, HashableMixin):
+    """
+    A MagicMock subclass to mock Thread objects.
+
+    Instances of this class will follow the specifications of `discord.Thread` instances. For
+    more information, see the `MockGuild` docstring.
+    """
+    spec_set = thread_instance
+
+    def __init__(self, **kwargs) -> None:
+        default_kwargs = {'id': next(self.discord_id), 'name': 'thread', 'guild': MockGuild()}
+        super().__init__(**collections.ChainMap(kwargs, default_kwargs))
+
+
 # Create data for the DMChannel instance
 state = unittest.mock.MagicMock()
 me = unittest.mock.MagicMock()
@@ -578,6 +614,23 @@ class MockAsyncWebhook(CustomMockMixin, unittest.mock.MagicMock):
     additional_spec_asyncs = ("send", "edit", "delete", "execute")
 
 
+class MockRecord(tuple):
+    """
+    Create a stand-in for `asyncpg.Record` from the column names and values of a row
+
+    Records are read by position and by `keys`/`items`, like the rows fetched by asyncpg.
+    """
+    def __new__(cls, columns: Iterable[str], values: Iterable[object]) -> MockRecord:
+        record = super().__new__(cls, values)
+        record._columns = tuple(columns)
+        return record
+
+    def keys(self) -> Iterable[str]:
+        return iter(self._columns)
+
+    def items(self) -> Iterable[tuple]:
+        return zip(self._columns, self)
+
 
 class AsyncIterator:
     """